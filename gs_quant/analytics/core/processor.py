@@ -141,32 +141,46 @@ class BaseProcessor(metaclass=ABCMeta):
         :param attribute: Attribute alinging to data coordinate in the processor
         :param result: Processor result including success and series from data query
         """
-        if not self.measure_processor:
-            self.__handle_date_range(result, rdate_entity_map)
-        self.children_data[attribute] = result
+        self._set_child_result(attribute, result, rdate_entity_map)
 
         if isinstance(result, ProcessorResult):
             if result.success:
-                try:
-                    if pool:
-                        if self.measure_processor:
-                            value = await asyncio.get_running_loop()\
-                                .run_in_executor(pool, functools.partial(self.process, query_info.entity))
-                        else:
-                            value = await asyncio.get_running_loop().run_in_executor(pool, self.process)
-                        self.value = value
-                    else:
-                        if self.measure_processor:
-                            self.process(query_info.entity)
-                        else:
-                            self.process()
-                    self.post_process()
-                except Exception as e:
-                    self.value = ProcessorResult(False,
-                                                 f'Error Calculating processor {self.__class__.__name__}  due to {e}')
+                await self._evaluate(pool, query_info)
             else:
                 self.value = result
 
+    def _set_child_result(self, attribute: str, result: ProcessorResult, rdate_entity_map: Dict[str, date]):
+        """ Set the result of a child without recalculating the value """
+        if not self.measure_processor:
+            self.__handle_date_range(result, rdate_entity_map)
+        self.children_data[attribute] = result
+
+    async def _evaluate(self,
+                        pool: ProcessPoolExecutor = None,
+                        query_info: Union[DataQueryInfo, MeasureQueryInfo] = None):
+        """ Calculate the value from the results of the children
+
+        :param pool: pool of processes on which to calculate, if any
+        :param query_info: query of a measure processor
+        """
+        try:
+            if pool:
+                if self.measure_processor:
+                    value = await asyncio.get_running_loop()\
+                        .run_in_executor(pool, functools.partial(self.process, query_info.entity))
+                else:
+                    value = await asyncio.get_running_loop().run_in_executor(pool, self.process)
+                self.value = value
+            else:
+                if self.measure_processor:
+                    self.process(query_info.entity)
+                else:
+                    self.process()
+            self.post_process()
+        except Exception as e:
+            self.value = ProcessorResult(False,
+                                         f'Error Calculating processor {self.__class__.__name__}  due to {e}')
+
     @abstractmethod
     def get_plot_expression(self):
         """ Returns a plot expression used to go from grid to plottool """
@@ -0,0 +1,150 @@
+"""
+Copyright 2021 Goldman Sachs.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+import asyncio
+import time
+from concurrent.futures.process import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Dict, List, NamedTuple, Optional, Set, Union
+
+from gs_quant.analytics.core.processor import BaseProcessor, DataQueryInfo, MeasureQueryInfo
+from gs_quant.analytics.core.processor_result import ProcessorResult
+
+
+class ProcessorTiming(NamedTuple):
+    processor: BaseProcessor
+    seconds: float
+
+
+class ProcessorGraph:
+    """
+    Evaluates the processors above a set of data queries as a graph
+
+    Each processor is calculated once, when the results of all its children have arrived, rather than each time one
+    arrives. Processors ready at the same time are calculated concurrently on the running event loop, on a pool of
+    processes if given. Measure processors are calculated once for each of their queries, in this process.
+
+    A processor with a child processor which failed is not calculated, leaving the error of the child on the cell
+    """
+
+    def __init__(self,
+                 query_infos: List[Union[DataQueryInfo, MeasureQueryInfo]],
+                 rdate_entity_map: Dict[str, date],
+                 pool: Optional[ProcessPoolExecutor] = None):
+        """
+        :param query_infos: the data queries, with their data, and measure queries at the leaves of the graph
+        :param rdate_entity_map: map of entity, rule, base_date to date value
+        :param pool: pool of processes on which to calculate processors, if any
+        """
+        self.__query_infos = query_infos
+        self.__rdate_entity_map = rdate_entity_map
+        self.__pool = pool
+        self.__pending: Dict[int, int] = {}
+        self.__received: Dict[int, List[ProcessorResult]] = {}
+        self.__failed: Set[int] = set()
+        self.__tasks: List[asyncio.Task] = []
+        self.timings: List[ProcessorTiming] = []
+
+    async def calculate(self) -> None:
+        """ Calculate every processor of the graph """
+        self.__pending, self.__received, self.__failed, self.__tasks, self.timings = {}, {}, set(), [], []
+
+        # count the results each processor is to receive: one from each of its queries and child processors
+        for query_info in self.__query_infos:
+            if isinstance(query_info, MeasureQueryInfo):
+                self.__add_parent(query_info.processor)
+            else:
+                self.__add(query_info.processor)
+
+        for query_info in self.__query_infos:
+            if isinstance(query_info, MeasureQueryInfo):
+                self.__tasks.append(asyncio.ensure_future(self.__calculate_measure(query_info)))
+            else:
+                self.__receive(query_info.processor, query_info.attr, self.__query_result(query_info))
+
+        while self.__tasks:
+            tasks, self.__tasks = self.__tasks, []
+            await asyncio.gather(*tasks)
+
+    def __add(self, processor: BaseProcessor):
+        first = id(processor) not in self.__pending
+        self.__pending[id(processor)] = self.__pending.get(id(processor), 0) + 1
+        if first:
+            self.__received[id(processor)] = []
+            self.__add_parent(processor)
+
+    def __add_parent(self, processor: BaseProcessor):
+        if isinstance(processor.parent, BaseProcessor):
+            self.__add(processor.parent)
+
+    @staticmethod
+    def __query_result(query_info: DataQueryInfo) -> ProcessorResult:
+        if query_info.data is None or len(query_info.data) == 0:
+            return ProcessorResult(False, f'No data found for Coordinate {query_info.query.coordinate}')
+        return ProcessorResult(True, query_info.data)
+
+    def __receive(self, processor: BaseProcessor, attribute: Optional[str], result: Optional[ProcessorResult]):
+        # a result of None is a child processor which failed
+        if result is None:
+            self.__failed.add(id(processor))
+        else:
+            processor._set_child_result(attribute, result, self.__rdate_entity_map)
+            self.__received[id(processor)].append(result)
+
+        self.__pending[id(processor)] -= 1
+        if self.__pending[id(processor)] == 0:
+            self.__tasks.append(asyncio.ensure_future(self.__calculate(processor)))
+
+    async def __calculate(self, processor: BaseProcessor):
+        received = self.__received[id(processor)]
+        if not received or id(processor) in self.__failed:
+            # a child processor failed and has put its error on the cell
+            self.__propagate(processor, calculated=False)
+            return
+
+        if not any(isinstance(r, ProcessorResult) and r.success for r in received):
+            processor.value = received[0]
+        else:
+            start = time.perf_counter()
+            await processor._evaluate(None if processor.measure_processor else self.__pool)
+            self.timings.append(ProcessorTiming(processor, time.perf_counter() - start))
+        self.__propagate(processor)
+
+    async def __calculate_measure(self, query_info: MeasureQueryInfo):
+        processor = query_info.processor
+        processor._set_child_result(query_info.attr, ProcessorResult(True, None), self.__rdate_entity_map)
+        start = time.perf_counter()
+        await processor._evaluate(query_info=query_info)
+        self.timings.append(ProcessorTiming(processor, time.perf_counter() - start))
+        self.__propagate(processor)
+
+    def __propagate(self, processor: BaseProcessor, calculated: bool = True):
+        """ Pass the value of a processor to its parent, or put it on the cell """
+        parent = processor.parent
+        value = processor.value
+        delivered = None
+        if calculated and parent and isinstance(value, ProcessorResult):
+            if value.success:
+                if isinstance(parent, BaseProcessor):
+                    delivered = value
+                else:
+                    # Must be the data cell
+                    parent.update(value)
+            else:
+                processor.data_cell.value = value  # Put the error on the data cell
+                processor.data_cell.updated_time = f'{datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]}Z'
+
+        if isinstance(parent, BaseProcessor):
+            self.__receive(parent, processor.parent_attr, delivered)
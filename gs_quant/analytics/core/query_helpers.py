@@ -17,12 +17,15 @@ import asyncio
 import logging
 from collections import defaultdict
 from datetime import date, datetime
-from typing import Dict, Tuple, Union
+from functools import partial
+from typing import Dict, List, Optional, Tuple, Union
 
-from pandas import DataFrame, to_datetime
+import numpy as np
+from pandas import DataFrame, concat, to_datetime
 
 from gs_quant.analytics.core.processor import MeasureQueryInfo
 from gs_quant.analytics.core.processor_result import ProcessorResult
+from gs_quant.api.utils import ThreadPoolManager
 from gs_quant.data import DataFrequency
 from gs_quant.session import GsSession
 
@@ -110,6 +113,59 @@ def fetch_query(query_info: Dict):
     return df
 
 
+def split_query(query_info: Dict, max_where_values: Optional[int] = None) -> List[Dict]:
+    """
+    Split a query with more than max_where_values values of a dimension into queries for chunks of those values
+    """
+    if not max_where_values:
+        return [query_info]
+    dimension, values = max(((k, v) for k, v in query_info['parameters'].items()
+                             if not any(isinstance(value, bool) for value in v)),
+                            key=lambda item: len(item[1]), default=(None, ()))
+    if len(values) <= max_where_values:
+        return [query_info]
+
+    values = list(values)
+    return [{**query_info, 'parameters': {**query_info['parameters'], dimension: set(values[i:i + max_where_values])}}
+            for i in range(0, len(values), max_where_values)]
+
+
+def fetch_queries(query_infos: List[Dict], max_where_values: Optional[int] = None) -> List[DataFrame]:
+    """
+    Fetch queries concurrently, splitting those with more than max_where_values values of a dimension
+
+    :param query_infos: queries, as aggregated by aggregate_queries
+    :param max_where_values: the maximum number of values of a dimension in a single request
+    :return: the data of each query
+    """
+    owners, tasks = [], []
+    for i, query_info in enumerate(query_infos):
+        for query in split_query(query_info, max_where_values):
+            owners.append(i)
+            tasks.append(partial(fetch_query, query))
+    frames = ThreadPoolManager.run_async(tasks) if len(tasks) > 1 else [task() for task in tasks]
+
+    parts = [[] for _ in query_infos]
+    for i, df in zip(owners, frames):
+        parts[i].append(df)
+    results = []
+    for query_parts in parts:
+        non_empty = [df for df in query_parts if not df.empty]
+        results.append(query_parts[0] if len(non_empty) == 0 else non_empty[0] if len(non_empty) == 1 else
+                       concat(non_empty))
+    return results
+
+
+def index_by_dimensions(df: DataFrame, dimensions: Tuple[str, ...]) -> Dict[Tuple, np.ndarray]:
+    """
+    The positions of the rows of a frame for each combination of the values of its dimension columns
+    """
+    if not dimensions:
+        return {(): np.arange(len(df))}
+    indices = df.groupby(list(dimensions), sort=False).indices
+    return {key if isinstance(key, tuple) else (key,): positions for key, positions in indices.items()}
+
+
 def build_query_string(dimensions):
     output = ''
     for count, dimension in enumerate(dimensions):
@@ -19,6 +19,7 @@ import json
 import logging
 import webbrowser
 from collections import defaultdict
+from concurrent.futures.process import ProcessPoolExecutor
 from dataclasses import asdict
 from numbers import Number
 from typing import List, Dict, Optional, Tuple, Union, Set
@@ -30,8 +31,10 @@ from gs_quant.analytics.common import DATAGRID_HELP_MSG
 from gs_quant.analytics.common.helpers import resolve_entities, get_entity_rdate_key, get_entity_rdate_key_from_rdate, \
     get_rdate_cache_key
 from gs_quant.analytics.core.processor import DataQueryInfo, MeasureQueryInfo
+from gs_quant.analytics.core.processor_graph import ProcessorGraph, ProcessorTiming
 from gs_quant.analytics.core.processor_result import ProcessorResult
-from gs_quant.analytics.core.query_helpers import aggregate_queries, fetch_query, build_query_string, valid_dimensions
+from gs_quant.analytics.core.query_helpers import aggregate_queries, fetch_queries, index_by_dimensions, \
+    valid_dimensions
 from gs_quant.analytics.datagrid.data_cell import DataCell
 from gs_quant.analytics.datagrid.data_column import DataColumn, ColumnFormat, MultiColumnGroup
 from gs_quant.analytics.datagrid.data_row import DataRow, DimensionsOverride, ProcessorOverride, Override, \
@@ -66,6 +69,10 @@ class DataGrid:
     :param sorts: Optional list of DataGridSort. Use this if you want to sort your columns.
     :param filters: Optional list of DataGridFilter. Use this to filter column's data.
     :param multiColumnGroups: Optional list of MultiColumnGroup. Useful to group columns for heatmaps.
+    :param max_where_values: Optional maximum number of values of a dimension in a single dataset query. Queries with
+        more are split into several, fetched concurrently
+    :param process_pool: Optional pool of processes on which to calculate processors. Processors and their cells must
+        then be picklable
     **Usage**
 
     To create a DataGrid, we define two components, rows and columns:
@@ -111,6 +118,8 @@ class DataGrid:
                  sorts: Optional[List[DataGridSort]] = None,
                  filters: Optional[List[DataGridFilter]] = None,
                  multiColumnGroups: Optional[List[MultiColumnGroup]] = None,
+                 max_where_values: Optional[int] = None,
+                 process_pool: Optional[ProcessPoolExecutor] = None,
                  **kwargs):
         self.id_ = id_
         self.entitlements = entitlements
@@ -121,6 +130,8 @@ class DataGrid:
         self.filters = filters or []
         self.multiColumnGroups = multiColumnGroups
         self.polling_time = polling_time or 0
+        self.max_where_values = max_where_values
+        self.process_pool = process_pool
 
         # store the graph, data queries to leaf processors and results
         self._primary_column_index: int = kwargs.get('primary_column_index', 0)
@@ -137,6 +148,7 @@ class DataGrid:
 
         self.results: List[List[DataCell]] = []
         self.is_initialized: bool = False
+        self._processor_timings: List[ProcessorTiming] = []
         print(DATAGRID_HELP_MSG)
 
     def get_id(self) -> Optional[str]:
@@ -389,40 +401,29 @@ class DataGrid:
 
     def _fetch_queries(self):
         query_aggregations = aggregate_queries(self._data_queries)
+        queries = [query for query_map in query_aggregations.values() for query in query_map.values()]
+
+        for query, df in zip(queries, fetch_queries(queries, self.max_where_values)):
+            # split the data once for each set of dimensions, rather than querying it for each coordinate
+            positions_by_dimensions = {}
+            for query_dimensions, query_infos in query['queries'].items():
+                if valid_dimensions(query_dimensions, df):
+                    dimensions = tuple(dimension for dimension, _ in query_dimensions)
+                    if dimensions not in positions_by_dimensions:
+                        positions_by_dimensions[dimensions] = index_by_dimensions(df, dimensions)
+                    positions = positions_by_dimensions[dimensions].get(tuple(value for _, value in query_dimensions))
+                    queried_df = df.iloc[positions if positions is not None else []]
+                    for query_info in query_infos:
+                        measure = query_info.query.coordinate.measure
+                        query_info.data = queried_df[measure if isinstance(measure, str) else measure.value]
+                else:
+                    for query_info in query_infos:
+                        query_info.data = Series(dtype=float)
 
-        for dataset_id, query_map in query_aggregations.items():
-            for query in query_map.values():
-                df = fetch_query(query)
-                for query_dimensions, query_infos in query['queries'].items():
-                    if valid_dimensions(query_dimensions, df):
-                        queried_df = df.query(build_query_string(query_dimensions))
-                        for query_info in query_infos:
-                            measure = query_info.query.coordinate.measure
-                            query_info.data = queried_df[measure if isinstance(measure, str) else measure.value]
-                    else:
-                        for query_info in query_infos:
-                            query_info.data = Series(dtype=float)
-
-        for query_info in self._data_queries:
-            if isinstance(query_info, MeasureQueryInfo):
-                asyncio.get_event_loop().run_until_complete(
-                    query_info.processor.calculate(query_info.attr,
-                                                   ProcessorResult(True, None),
-                                                   self.rule_cache,
-                                                   query_info=query_info))
-            elif query_info.data is None or len(query_info.data) == 0:
-                asyncio.get_event_loop().run_until_complete(
-                    query_info.processor.calculate(query_info.attr,
-                                                   ProcessorResult(False,
-                                                                   f'No data found for '
-                                                                   f'Coordinate {query_info.query.coordinate}'),
-                                                   self.rule_cache))
-            else:
-                asyncio.get_event_loop().run_until_complete(
-                    query_info.processor.calculate(query_info.attr,
-                                                   ProcessorResult(True,
-                                                                   query_info.data),
-                                                   self.rule_cache))
+        # calculate each processor once all its children have their results
+        graph = ProcessorGraph(self._data_queries, self.rule_cache, self.process_pool)
+        asyncio.get_event_loop().run_until_complete(graph.calculate())
+        self._processor_timings = graph.timings
 
     @staticmethod
     def aggregate_queries(query_infos):
@@ -566,6 +567,22 @@ class DataGrid:
 
         return self._post_process()
 
+    def get_processor_timings(self) -> DataFrame:
+        """
+        Returns the time taken to calculate each processor in the last poll, slowest first. Useful for finding the
+        processors which make a DataGrid slow to poll.
+        :return: DataFrame of the row, column, processor and seconds taken
+        """
+        timings = []
+        for timing in self._processor_timings:
+            cell = timing.processor.data_cell
+            timings.append({'row': getattr(cell, 'row_index', None),
+                            'column': getattr(cell, 'name', None),
+                            'processor': timing.processor.__class__.__name__,
+                            'seconds': timing.seconds})
+        df = DataFrame(timings, columns=['row', 'column', 'processor', 'seconds'])
+        return df.sort_values('seconds', ascending=False, ignore_index=True)
+
     @classmethod
     def from_dict(cls, obj, reference_list: Optional[List] = None):
         id_ = obj.get('id', None)
@@ -0,0 +1,269 @@
+"""
+Copyright 2021 Goldman Sachs.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from weakref import WeakKeyDictionary
+
+import requests
+
+from gs_quant.errors import MqRequestError
+from gs_quant.risk import RiskRequest
+from gs_quant.session import GsSession
+
+LatencyKey = Tuple[str, str]
+
+
+class RequestBatcher:
+    """
+    Sizes risk requests by their estimated duration
+
+    The cost of a request is its number of positions x dates x measures. The observed latency per unit of cost is
+    recorded for each session, instrument type and risk measure, and used to size the session's requests so that each
+    round trip takes about target_duration seconds: requests are split when latency is high, and merged when it is low.
+    Until latency has been observed, requests are sized as before
+
+    **Examples**
+
+    Aim for 30 second round trips:
+
+    >>> from gs_quant.api.batching import RequestBatcher
+    >>>
+    >>> RequestBatcher.configure(target_duration=30)
+    """
+    __enabled = True
+    __target_duration = 60.
+    __smoothing = 0.3
+    __latencies: 'WeakKeyDictionary[GsSession, Dict[LatencyKey, float]]' = WeakKeyDictionary()
+    __lock = threading.Lock()
+
+    TIMEOUT_STATUSES = (408, 504)
+
+    @classmethod
+    def configure(cls, target_duration: float = 60., smoothing: float = 0.3, enabled: bool = True):
+        """
+        Configure request sizing
+
+        :param target_duration: the desired duration of a request, in seconds. Keep well below the request timeout
+        :param smoothing: weight of the latest observation in the latency history (between 0 and 1)
+        :param enabled: if False, requests are sized by count alone
+        """
+        if target_duration <= 0 or not 0 < smoothing <= 1:
+            raise ValueError('target_duration must be positive and smoothing must be in (0, 1]')
+
+        cls.__target_duration = target_duration
+        cls.__smoothing = smoothing
+        cls.__enabled = enabled
+
+    @classmethod
+    def reset(cls):
+        """
+        Forget the latency history of every session
+        """
+        with cls.__lock:
+            cls.__latencies.clear()
+
+    @classmethod
+    def history(cls) -> Dict[LatencyKey, float]:
+        """
+        Observed latency in the current session, in seconds per position, date and measure, by (instrument type, risk
+        measure)
+        """
+        with cls.__lock:
+            return dict(cls.__session_latencies())
+
+    @classmethod
+    def record(cls, requests_: Sequence[RiskRequest], duration: float):
+        """
+        Record the duration of a round trip for requests. Requests sent together share one observation, so each of
+        their instrument types and measures is attributed the same latency per unit of cost
+        """
+        session = cls.__session()
+        cost = sum(cls.cost(r) for r in requests_)
+        if session is None or not cost:
+            return
+
+        unit_latency = duration / cost
+        keys = {key for r in requests_ for key in cls.__keys(r)}
+
+        with cls.__lock:
+            latencies = cls.__latencies.setdefault(session, {})
+            for key in keys:
+                previous = latencies.get(key)
+                latencies[key] = unit_latency if previous is None else \
+                    cls.__smoothing * unit_latency + (1 - cls.__smoothing) * previous
+
+    @classmethod
+    def estimate(cls, requests_: Iterable[RiskRequest]) -> Optional[float]:
+        """
+        Estimated duration of sending requests together, or None if there is no history for them
+        """
+        latencies = cls.__session_latencies()
+        total = 0.
+        for request in requests_:
+            dates = len(request.pricing_and_market_data_as_of)
+            for position in request.positions:
+                for risk_measure in request.measures:
+                    unit_latency = cls.__latency(latencies, type(position.instrument).__name__, risk_measure)
+                    if unit_latency is None:
+                        return None
+
+                    total += unit_latency * dates
+
+        return total
+
+    @classmethod
+    def group(cls, requests_: Sequence[RiskRequest]) -> List[tuple]:
+        """
+        Group requests, in order, so that each group is estimated to complete within the target duration. A request
+        which alone exceeds the target forms its own group. Without history for all requests, they form one group
+        """
+        if not requests_:
+            return []
+
+        if not cls.__enabled or cls.estimate(requests_) is None:
+            return [tuple(requests_)]
+
+        groups = []
+        group = []
+        group_estimate = 0.
+
+        for request in requests_:
+            estimate = cls.estimate((request,))
+            if group and group_estimate + estimate > cls.__target_duration:
+                groups.append(tuple(group))
+                group = []
+                group_estimate = 0.
+
+            group.append(request)
+            group_estimate += estimate
+
+        groups.append(tuple(group))
+        return groups
+
+    @classmethod
+    def merge(cls, requests_: Sequence[RiskRequest], max_positions: int) -> List[RiskRequest]:
+        """
+        Merge requests for the same measures, dates and parameters, in order, into requests of up to max_positions
+        positions, each estimated to complete within the target duration. Requests sized before latency was observed
+        thus grow once it is low. Without history for all requests, they are returned as they are
+        """
+        if not cls.__enabled or len(requests_) < 2 or cls.estimate(requests_) is None:
+            return list(requests_)
+
+        merged = []
+        estimates = []
+        open_requests = {}
+
+        for request in requests_:
+            shape = request.clone(positions=())
+            estimate = cls.estimate((request,))
+            index = open_requests.get(shape)
+            if index is not None and len(merged[index].positions) + len(request.positions) <= max_positions and \
+                    estimates[index] + estimate <= cls.__target_duration:
+                merged[index] = merged[index].clone(positions=merged[index].positions + request.positions)
+                estimates[index] += estimate
+                continue
+
+            open_requests[shape] = len(merged)
+            merged.append(request)
+            estimates.append(estimate)
+
+        return merged
+
+    @classmethod
+    def positions_per_request(cls,
+                              instruments: Sequence,
+                              risk_measures: Sequence,
+                              num_dates: int,
+                              max_positions: int) -> int:
+        """
+        The number of positions to put in each request
+
+        :param instruments: the instruments to be chunked
+        :param risk_measures: the measures requested for each
+        :param num_dates: the number of dates in each request
+        :param max_positions: the upper bound on positions per request
+        """
+        if not cls.__enabled or not instruments:
+            return max_positions
+
+        latencies = cls.__session_latencies()
+        unit_latencies = [cls.__latency(latencies, type(i).__name__, m) for i in instruments for m in risk_measures]
+        if any(latency is None for latency in unit_latencies):
+            return max_positions
+
+        position_latency = sum(unit_latencies) / len(instruments) * num_dates
+        if position_latency <= 0:
+            return max_positions
+
+        return max(1, min(max_positions, math.floor(cls.__target_duration / position_latency)))
+
+    @classmethod
+    def is_timeout(cls, error: Exception) -> bool:
+        """
+        True if the error indicates a request ran too long
+        """
+        return isinstance(error, requests.exceptions.Timeout) or \
+            (isinstance(error, MqRequestError) and error.status in cls.TIMEOUT_STATUSES)
+
+    @staticmethod
+    def cost(request: RiskRequest) -> int:
+        """
+        The number of calculations in a request: its positions x dates x measures. Halves from split() share the cost
+        of the request they came from
+        """
+        return len(request.positions) * len(request.pricing_and_market_data_as_of) * len(request.measures)
+
+    @staticmethod
+    def split(requests_: Sequence[RiskRequest]) -> Optional[Tuple[tuple, tuple]]:
+        """
+        Split requests in two, by request, then position, date and measure. None if they cannot be split further
+        """
+        if len(requests_) > 1:
+            mid = len(requests_) // 2
+            return tuple(requests_[:mid]), tuple(requests_[mid:])
+
+        request = requests_[0]
+        for field in ('positions', 'pricing_and_market_data_as_of', 'measures'):
+            values = getattr(request, field)
+            if len(values) > 1:
+                mid = len(values) // 2
+                return (request.clone(**{field: values[:mid]}),), (request.clone(**{field: values[mid:]}),)
+
+        return None
+
+    @staticmethod
+    def __measure_name(risk_measure) -> str:
+        return getattr(risk_measure, 'name', None) or str(risk_measure)
+
+    @classmethod
+    def __keys(cls, request: RiskRequest) -> Iterable[LatencyKey]:
+        return ((type(p.instrument).__name__, cls.__measure_name(m)) for p in request.positions
+                for m in request.measures)
+
+    @staticmethod
+    def __session() -> Optional[GsSession]:
+        return GsSession.current if GsSession.current_is_set else None
+
+    @classmethod
+    def __session_latencies(cls) -> Dict[LatencyKey, float]:
+        session = cls.__session()
+        return {} if session is None else cls.__latencies.get(session, {})
+
+    @classmethod
+    def __latency(cls, latencies: Dict[LatencyKey, float], instrument_type: str, risk_measure) -> Optional[float]:
+        return latencies.get((instrument_type, cls.__measure_name(risk_measure)))
@@ -16,7 +16,7 @@ under the License.
 import datetime as dt
 import logging
 from abc import ABCMeta
-from typing import Optional, Union, List
+from typing import Iterator, Optional, Union, List
 
 import inflection
 import pandas as pd
@@ -34,6 +34,11 @@ class DataApi(metaclass=ABCMeta):
     def query_data(cls, query: Union[DataQuery, FredQuery], dataset_id: str = None) -> Union[list, tuple]:
         raise NotImplementedError('Must implement get_data')
 
+    @classmethod
+    def query_data_pages(cls, query: Union[DataQuery, FredQuery], dataset_id: str = None, **kwargs) \
+            -> Iterator[Union[list, tuple]]:
+        yield cls.query_data(query, dataset_id, **kwargs)
+
     @classmethod
     def last_data(cls, query: DataQuery, dataset_id: str = None) -> Union[list, tuple]:
         raise NotImplementedError('Must implement last_data')
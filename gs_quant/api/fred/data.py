@@ -18,7 +18,7 @@ by the Federal Reserve Bank of St. Louis. FRED terms of use
 available at https://research.stlouisfed.org/docs/api/terms_of_use.html
 """
 
-from typing import Iterable, Optional, Union
+from typing import Iterable, Iterator, Optional, Union
 
 import pandas as pd
 import datetime as dt
@@ -95,6 +95,9 @@ class FredDataApi(DataApi):
         handled.name = dataset_id
         return handled
 
+    def query_data_pages(self, query: FredQuery, dataset_id: str, asset_id_type: str = None) -> Iterator[pd.Series]:
+        yield self.query_data(query, dataset_id, asset_id_type=asset_id_type)
+
     def last_data(self, query: FredQuery, dataset_id: str) -> pd.Series:
         """
         Get the last point for a data series, at or before as_of
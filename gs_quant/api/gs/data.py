@@ -16,9 +16,11 @@ under the License.
 import datetime as dt
 import logging
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from itertools import chain
-from typing import Iterable, List, Optional, Tuple, Union, Dict
+from typing import Iterable, Iterator, List, Optional, Tuple, Union, Dict
 
 import cachetools
 import numpy
@@ -164,6 +166,7 @@ class GsDataApi(DataApi):
     __definitions = {}
     __asset_coordinates_cache = TTLCache(10000, 86400)
     DEFAULT_SCROLL = '30s'
+    MAX_CONCURRENT_PAGES = 8
 
     # DataApi interface
 
@@ -189,25 +192,61 @@ class GsDataApi(DataApi):
         return GsSession.current._post('/data/{}/query'.format(dataset_id), **kwargs)
 
     @staticmethod
-    def get_results(dataset_id: str, response: Union[DataQueryResponse, dict], query: DataQuery) -> list:
+    def __page_data(response: Union[DataQueryResponse, dict]) -> Tuple[Optional[int], Union[tuple, list]]:
         if isinstance(response, dict):
-            total_pages = response.get('totalPages')
-            results = response.get('data', ())
-        else:
-            total_pages = response.total_pages if response.total_pages is not None else 0
-            results = response.data if response.data is not None else ()
-
-        if total_pages:
-            if query.page is None:
-                query.page = total_pages - 1
-                results = results + GsDataApi.get_results(dataset_id, GsDataApi.execute_query(dataset_id, query), query)
-            elif query.page - 1 > 0:
-                query.page -= 1
-                results = results + GsDataApi.get_results(dataset_id, GsDataApi.execute_query(dataset_id, query), query)
-            else:
-                return results
+            return response.get('totalPages'), response.get('data', ())
+        total_pages = response.total_pages if response.total_pages is not None else 0
+        return total_pages, response.data if response.data is not None else ()
 
-        return results
+    @classmethod
+    def query_data_pages(cls, query: Union[DataQuery, MDAPIDataQuery], dataset_id: str = None,
+                         asset_id_type: Union[GsIdType, str] = None) -> Iterator[Union[tuple, list]]:
+        if isinstance(query, MDAPIDataQuery) and query.market_data_coordinates:
+            yield cls.query_data(query, dataset_id, asset_id_type=asset_id_type)
+            return
+        response: Union[DataQueryResponse, dict] = cls.execute_query(dataset_id, query)
+        yield from cls.iter_results(dataset_id, response, query)
+
+    @staticmethod
+    def iter_results(dataset_id: str, response: Union[DataQueryResponse, dict], query: DataQuery) \
+            -> Iterator[Union[tuple, list]]:
+        total_pages, results = GsDataApi.__page_data(response)
+        yield results
+        if not total_pages:
+            return
+
+        # the first response holds the requested page; the remaining pages are fetched concurrently, with at most
+        # MAX_CONCURRENT_PAGES in flight, and yielded in page order
+        pages = range(1, total_pages if query.page is None else query.page)
+        if not pages:
+            return
+
+        session = GsSession.current
+
+        def fetch(page: int) -> Union[tuple, list]:
+            with session:
+                return GsDataApi.__page_data(GsDataApi.execute_query(dataset_id, query.clone(page=page)))[1]
+
+        max_workers = min(GsDataApi.MAX_CONCURRENT_PAGES, len(pages))
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                for page in pages:
+                    if len(in_flight) == max_workers:
+                        yield in_flight.popleft().result()
+                    in_flight.append(executor.submit(fetch, page))
+                while in_flight:
+                    yield in_flight.popleft().result()
+            finally:
+                for future in in_flight:
+                    future.cancel()
+
+    @staticmethod
+    def get_results(dataset_id: str, response: Union[DataQueryResponse, dict], query: DataQuery) -> list:
+        pages = GsDataApi.iter_results(dataset_id, response, query)
+        results = next(pages)
+        remaining = list(pages)
+        return list(chain(results, *remaining)) if remaining else results
 
     @classmethod
     def last_data(cls, query: Union[DataQuery, MDAPIDataQuery], dataset_id: str = None, timeout: int = None) \
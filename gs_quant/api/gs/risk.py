@@ -15,14 +15,18 @@ under the License.
 """
 import asyncio
 import base64
+from collections import deque
+from concurrent.futures import Future
 import datetime as dt
 import json
 import logging
 import math
 import msgpack
 from socket import gaierror
+import threading
 import time
-from typing import Iterable, Optional, Union
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+import weakref
 
 from gs_quant.api.risk import RiskApi
 from gs_quant.risk import RiskRequest
@@ -36,11 +40,238 @@ class WebsocketUnavailable(Exception):
     pass
 
 
+class RiskResultsSubscription:
+    """
+    A websocket subscription to batch risk results, kept open for a session and shared by all pricing contexts using it
+
+    Results are routed to subscribers by report id. On failure the socket is re-opened with exponential back-off and
+    in-flight report ids are subscribed again
+    """
+
+    MAX_ATTEMPTS = 5
+    MAX_BACKOFF = 60
+    SEND_TIMEOUT = 30
+    LATENCY_SAMPLES = 1000
+
+    __loop: Optional[asyncio.AbstractEventLoop] = None
+    __loop_lock = threading.Lock()
+
+    def __init__(self, session: GsSession, use_msgpack: bool = True):
+        self.__session = weakref.ref(session)
+        self.__use_msgpack = use_msgpack
+        self.__lock = threading.Lock()
+        self.__in_flight = {}
+        self.__latencies = deque(maxlen=self.LATENCY_SAMPLES)
+        self.__runner: Optional[asyncio.Future] = None
+        self.__connected: Optional[asyncio.Future] = None
+        self.__ws = None
+        self.__connects = 0
+        self.__results = 0
+        self.__errors = 0
+
+    @classmethod
+    def __event_loop(cls) -> asyncio.AbstractEventLoop:
+        # One long-lived loop services the sockets of all sessions
+        with cls.__loop_lock:
+            if cls.__loop is None:
+                cls.__loop = asyncio.new_event_loop()
+                threading.Thread(daemon=True, target=cls.__loop.run_forever, name='RiskResultsSubscription').start()
+
+        return cls.__loop
+
+    def connect(self) -> Future:
+        """
+        Ensure the socket is open
+
+        :return: a future which completes when connected, or raises WebsocketUnavailable if the host cannot be reached
+        """
+        return asyncio.run_coroutine_threadsafe(self.__connect(), self.__event_loop())
+
+    def subscribe(self, callbacks: Dict[str, Callable[[str, Union[dict, Exception]], None]]):
+        """
+        Subscribe to results
+
+        :param callbacks: callbacks keyed by report id, called with the report id and result (or error) on the
+            subscription's thread
+        """
+        dispatched = time.monotonic()
+        with self.__lock:
+            self.__in_flight.update((report_id, (callback, dispatched)) for report_id, callback in callbacks.items())
+
+        asyncio.run_coroutine_threadsafe(self.__send(tuple(callbacks.keys())), self.__event_loop())
+
+    def unsubscribe(self, report_ids: Iterable[str]):
+        """
+        Stop routing results for these report ids
+        """
+        with self.__lock:
+            for report_id in report_ids:
+                self.__in_flight.pop(report_id, None)
+
+    def close(self):
+        """
+        Close the socket. Any in-flight report ids will not receive results
+        """
+        asyncio.run_coroutine_threadsafe(self.__close(), self.__event_loop()).result()
+
+    def metrics(self) -> dict:
+        """
+        Subscription metrics: connection state, in-flight report ids and their ages, and the latency (in seconds)
+        from dispatch to result over recent results
+        """
+        now = time.monotonic()
+        with self.__lock:
+            in_flight = {report_id: now - dispatched for report_id, (_, dispatched) in self.__in_flight.items()}
+            latencies = tuple(self.__latencies)
+
+        return {
+            'connected': self.__ws is not None,
+            'connects': self.__connects,
+            'in_flight': len(in_flight),
+            'in_flight_ids': tuple(in_flight.keys()),
+            'oldest_in_flight': max(in_flight.values(), default=None),
+            'results': self.__results,
+            'errors': self.__errors,
+            'mean_latency': sum(latencies) / len(latencies) if latencies else None,
+            'max_latency': max(latencies, default=None)
+        }
+
+    def __start(self):
+        if self.__runner is None or self.__runner.done():
+            self.__connected = asyncio.get_running_loop().create_future()
+            self.__runner = asyncio.ensure_future(self.__run())
+
+    async def __connect(self):
+        self.__start()
+        await asyncio.shield(self.__connected)
+
+    async def __send(self, report_ids: Tuple[str, ...]):
+        self.__start()
+        ws = self.__ws
+        if ws is not None:
+            try:
+                await asyncio.wait_for(ws.send(json.dumps(report_ids)), timeout=self.SEND_TIMEOUT)
+            except Exception as e:
+                # In-flight report ids are sent again on reconnection
+                _logger.warning(f'Failed to subscribe to results: {e}')
+
+    async def __close(self):
+        if self.__runner is not None:
+            self.__runner.cancel()
+            self.__runner = None
+
+        if self.__ws is not None:
+            await self.__ws.close()
+            self.__ws = None
+
+    async def __run(self):
+        attempts = 0
+
+        while True:
+            session = self.__session()
+            if session is None:
+                self.__fail(RuntimeError('Session closed'))
+                return
+
+            try:
+                async with session._connect_websocket('/risk/calculate/results/subscribe') as ws:
+                    self.__ws = ws
+                    self.__connects += 1
+                    attempts = 0
+                    if not self.__connected.done():
+                        self.__connected.set_result(True)
+
+                    with self.__lock:
+                        report_ids = tuple(self.__in_flight.keys())
+
+                    if report_ids:
+                        _logger.info(f'Re-sending {len(report_ids)} requests')
+                        await asyncio.wait_for(ws.send(json.dumps(report_ids)), timeout=self.SEND_TIMEOUT)
+
+                    async for message in ws:
+                        self.__on_message(message)
+
+                error = 'Connection closed'
+            except gaierror:
+                if not self.__connected.done():
+                    self.__connected.set_exception(WebsocketUnavailable())
+                    return
+
+                error = 'Connection failed: host unavailable'
+            except Exception as e:
+                error = f'Connection failed: {e}'
+            finally:
+                self.__ws = None
+
+            with self.__lock:
+                idle = not self.__in_flight
+
+            if idle and self.__connected.done():
+                # Re-connect on the next subscription
+                return
+
+            attempts += 1
+            if attempts >= self.MAX_ATTEMPTS:
+                _logger.error(f'Fatal error: {error}')
+                self.__fail(RuntimeError(error))
+                return
+
+            _logger.error(f'{error}, retrying (attempt {attempts + 1} of {self.MAX_ATTEMPTS})')
+            await asyncio.sleep(min(math.pow(2, attempts), self.MAX_BACKOFF))
+
+    def __on_message(self, message: str):
+        request_id, status_result_str = message.split(';', 1)
+        status, result_str = status_result_str[0], status_result_str[1:]
+
+        with self.__lock:
+            entry = self.__in_flight.pop(request_id, None)
+            if entry is not None:
+                self.__latencies.append(time.monotonic() - entry[1])
+
+        if entry is None:
+            # Not subscribed, or the subscriber has given up
+            return
+
+        self.__results += 1
+        if status == 'E':
+            self.__errors += 1
+            result = RuntimeError(result_str)
+        else:
+            try:
+                result = msgpack.unpackb(base64.b64decode(result_str), raw=False) \
+                    if self.__use_msgpack else json.loads(result_str)
+            except Exception as ee:
+                result = ee
+
+        self.__deliver(entry[0], request_id, result)
+
+    def __fail(self, error: Exception):
+        with self.__lock:
+            failed = tuple(self.__in_flight.items())
+            self.__in_flight.clear()
+
+        if not self.__connected.done():
+            self.__connected.set_exception(error)
+
+        for report_id, (callback, _) in failed:
+            self.__deliver(callback, report_id, error)
+
+    @staticmethod
+    def __deliver(callback: Callable, report_id: str, result: Union[dict, Exception]):
+        try:
+            callback(report_id, result)
+        except Exception as e:
+            _logger.warning(f'Unable to deliver result for {report_id}: {e}')
+
+
 class GsRiskApi(RiskApi):
 
     USE_MSGPACK = True
     POLL_FOR_BATCH_RESULTS = False
 
+    __subscriptions = weakref.WeakKeyDictionary()
+    __subscriptions_lock = threading.Lock()
+
     @classmethod
     def calc_multi(cls, requests: Iterable[RiskRequest]) -> dict:
         requests = tuple(requests)
@@ -127,116 +358,76 @@ class GsRiskApi(RiskApi):
                 return
 
     @classmethod
-    async def __get_results_ws(cls, responses: asyncio.Queue, results: asyncio.Queue, timeout: Optional[int] = None):
-        async def handle_websocket():
-            ret = ''
-
-            try:
-                # If we're re-connecting then re-send any in-flight request ids
-
-                outstanding_request_ids = [i for i in pending_requests.keys() if i not in dispatched]
-                if outstanding_request_ids:
-                    _logger.info(f'Re-sending {len(outstanding_request_ids)} requests')
-                    await asyncio.wait_for(ws.send(json.dumps(outstanding_request_ids)), timeout=send_timeout)
+    def results_subscription(cls, session: Optional[GsSession] = None) -> RiskResultsSubscription:
+        """
+        The results subscription for a session, shared by all pricing contexts using it
+
+        :param session: the session (defaults to the current session)
+        :return: the subscription, whose metrics() report in-flight requests and result latency
+        """
+        session = session or GsSession.current
+        with cls.__subscriptions_lock:
+            subscription = cls.__subscriptions.get(session)
+            if subscription is None:
+                subscription = RiskResultsSubscription(session, use_msgpack=cls.USE_MSGPACK)
+                cls.__subscriptions[session] = subscription
+
+        return subscription
 
-                all_requests_dispatched = False
-
-                while pending_requests or not all_requests_dispatched:
-                    # Continue while we have pending or un-dispatched requests
-
-                    request_listener = asyncio.ensure_future(cls.drain_queue_async(responses))\
-                        if not all_requests_dispatched else None
-                    result_listener = asyncio.ensure_future(ws.recv())
-                    listeners = tuple(filter(None, (request_listener, result_listener)))
-
-                    # Wait for either a request or result
-                    complete, pending = await asyncio.wait(listeners, return_when=asyncio.FIRST_COMPLETED)
+    @classmethod
+    async def __get_results_ws(cls, responses: asyncio.Queue, results: asyncio.Queue, timeout: Optional[int] = None):
+        def on_result(request_id: str, request: RiskRequest, result: Union[dict, Exception]):
+            outstanding.discard(request_id)
+            results.put_nowait((request, result))
+            if all_requests_dispatched and not outstanding:
+                complete.set()
 
-                    # Check results before sending more requests. Results can be lost otherwise
+        def result_callback(request: RiskRequest):
+            return lambda request_id, result: loop.call_soon_threadsafe(on_result, request_id, request, result)
 
-                    if result_listener in complete:
-                        # New results have been received
+        subscription = cls.results_subscription()
+        end_time = time.monotonic() + timeout if timeout else None
 
-                        request_id, status_result_str = result_listener.result().split(';', 1)
-                        status, result_str = status_result_str[0], status_result_str[1:]
+        try:
+            await asyncio.wrap_future(subscription.connect())
+        except WebsocketUnavailable:
+            raise
+        except Exception as e:
+            _logger.error(f'Fatal error: {e}')
+            cls.shutdown_queue_listener(results)
+            return
 
-                        if status == 'E':
-                            # An error
-                            result = RuntimeError(result_str)
-                        else:
-                            # Unpack the result
+        loop = asyncio.get_running_loop()
+        outstanding = set()
+        complete = asyncio.Event()
+        all_requests_dispatched = False
 
-                            try:
-                                result = msgpack.unpackb(base64.b64decode(result_str), raw=False)\
-                                    if cls.USE_MSGPACK else json.loads(result_str)
-                            except Exception as ee:
-                                result = ee
+        try:
+            while not all_requests_dispatched:
+                all_requests_dispatched, items = await cls.drain_queue_async(responses)
+                callbacks = {}
 
-                        # Enqueue the request and result for the listener to handle
-                        results.put_nowait((pending_requests.pop(request_id), result))
+                for request, response in items:
+                    if isinstance(response, dict) and 'reportId' in response:
+                        callbacks[response['reportId']] = result_callback(request)
                     else:
-                        result_listener.cancel()
-
-                    if request_listener:
-                        if request_listener in complete:
-                            # New requests have been posted ...
-
-                            all_requests_dispatched, items = request_listener.result()
-                            if items:
-                                if not isinstance(items[0][1], dict):
-                                    raise RuntimeError(items[0][1][0][0][0]['errorString'])
-
-                                # ... extract the request IDs ...
-                                request_ids = [i[1]['reportId'] for i in items]
-
-                                # ... update the pending requests ...
-                                pending_requests.update(zip(request_ids, (i[0] for i in items)))
-
-                                # ... add to our result subscription ...
-                                await asyncio.wait_for(ws.send(json.dumps(request_ids)), timeout=send_timeout)
-
-                                # ... note dispatched
-                                dispatched.update(request_ids)
-                        else:
-                            request_listener.cancel()
-            except Exception as ee:
-                ret = str(ee)
-
-            return ret
-
-        pending_requests = {}
-        dispatched = set()
-        error = ''
-        attempts = 0
-        max_attempts = 5
-        send_timeout = 30
-
-        from websockets import ConnectionClosedError
-        while attempts < max_attempts:
-            if attempts > 0:
-                await asyncio.sleep(math.pow(2, attempts))
-                _logger.error(f'{error} error, retrying (attempt {attempts + 1} of {max_attempts})')
-
-            try:
-                async with GsSession.current._connect_websocket('/risk/calculate/results/subscribe') as ws:
-                    error = await handle_websocket()
-
-                attempts = max_attempts
-            except ConnectionClosedError as cce:
-                error = 'Connection failed: ' + str(cce)
-                attempts += 1
-            except asyncio.TimeoutError:
-                error = 'Timed out'
-                attempts = max_attempts
-            except gaierror:
-                raise WebsocketUnavailable()
-            except Exception as e:
-                error = str(e)
-                attempts = max_attempts
-
-        if error != '':
-            _logger.error(f'Fatal error: {error}')
-            cls.shutdown_queue_listener(results)
+                        # Results (or errors) returned directly by the calculation request
+                        results.put_nowait((request, response))
+
+                if callbacks:
+                    outstanding.update(callbacks.keys())
+                    subscription.subscribe(callbacks)
+
+            if outstanding:
+                try:
+                    await asyncio.wait_for(complete.wait(),
+                                           timeout=max(end_time - time.monotonic(), 0) if end_time else None)
+                except asyncio.TimeoutError:
+                    _logger.error('Fatal error: timeout while waiting for results')
+                    cls.shutdown_queue_listener(results)
+        finally:
+            if outstanding:
+                subscription.unsubscribe(outstanding)
 
     @classmethod
     def create_pretrade_execution_optimization(cls, request: OptimizationRequest) -> str:
@@ -15,15 +15,18 @@ under the License.
 """
 from abc import ABCMeta, abstractmethod
 import asyncio
-from concurrent.futures import TimeoutError
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import partial
 import itertools
 import logging
 import queue
 import sys
 from threading import Thread
+import time
 from tqdm import tqdm
 from typing import Iterable, Optional, Union, Tuple
 
+from gs_quant.api.batching import RequestBatcher
 from gs_quant.base import RiskKey, Sentinel
 from gs_quant.risk import ErrorValue, RiskRequest
 from gs_quant.risk.result_handlers import result_handlers
@@ -35,6 +38,9 @@ _logger = logging.getLogger(__name__)
 class RiskApi(metaclass=ABCMeta):
 
     __SHUTDOWN_SENTINEL = Sentinel('QueueListenerShutdown')
+    __executor: Optional[ThreadPoolExecutor] = None
+
+    MAX_DISPATCH_WORKERS = 32
 
     @classmethod
     @abstractmethod
@@ -50,6 +56,56 @@ class RiskApi(metaclass=ABCMeta):
     def calc_multi(cls, requests: Iterable[RiskRequest]) -> dict:
         return {request: cls.calc(request) for request in requests}
 
+    @classmethod
+    async def calc_multi_async(cls, requests: Iterable[RiskRequest]) -> dict:
+        """
+        Dispatch requests without blocking the running event loop
+
+        The blocking transport runs on a shared, long-lived pool of dispatch threads, reusing the pooled HTTP
+        connections of the current session
+        """
+        if RiskApi.__executor is None:
+            RiskApi.__executor = ThreadPoolExecutor(max_workers=cls.MAX_DISPATCH_WORKERS,
+                                                    thread_name_prefix='RiskApiDispatch')
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(RiskApi.__executor,
+                                          partial(cls.__calc_multi_in_session, GsSession.current, tuple(requests)))
+
+    @classmethod
+    def __calc_multi_in_session(cls, session: GsSession, requests: Tuple[RiskRequest, ...]) -> dict:
+        with session:
+            return cls._calc_multi_adaptive(requests)
+
+    @classmethod
+    def _calc_multi_adaptive(cls, requests: Tuple[RiskRequest, ...]) -> dict:
+        """
+        calc_multi, recording the round trip in the latency history and splitting and retrying requests which time out
+        """
+        start = time.monotonic()
+        try:
+            responses = cls.calc_multi(requests)
+        except Exception as e:
+            halves = RequestBatcher.split(requests) if RequestBatcher.is_timeout(e) else None
+            if halves is None:
+                raise
+
+            # The requests took at least this long
+            RequestBatcher.record(requests, time.monotonic() - start)
+            _logger.warning(f'Request timed out, retrying as {len(halves)} smaller requests')
+
+            responses = {}
+            for half in halves:
+                responses.update(cls._calc_multi_adaptive(half))
+
+            return responses
+
+        if requests and requests[0].wait_for_results:
+            # Batch requests return before calculating, so their round trip says nothing of their cost
+            RequestBatcher.record(requests, time.monotonic() - start)
+
+        return responses
+
     @classmethod
     def __handle_queue_update(cls,
                               q: Union[queue.Queue, asyncio.Queue],
@@ -143,29 +199,25 @@ class RiskApi(metaclass=ABCMeta):
                 shutdown = False
                 while not shutdown:
                     shutdown, requests_chunk = cls.drain_queue(outstanding_requests)
-                    if requests_chunk:
+                    # Send the chunk in groups sized to the target request duration, merging small requests
+                    for requests_group in RequestBatcher.group(RequestBatcher.merge(requests_chunk, max_concurrent)):
                         try:
-                            # Get the responses for our requests chunk
-                            responses_chunk = cls.calc_multi(requests_chunk)
+                            # Get the responses for our requests group
+                            responses_group = cls._calc_multi_adaptive(requests_group)
 
                             # Enqueue the replies for either the result subscriber (if async requests) or directly
-                            cls.enqueue(responses, responses_chunk.items(), loop=loop)
+                            cls.enqueue(responses, responses_group.items(), loop=loop)
                         except Exception as e:
                             # Enqueue the error as a reply
-                            cls.enqueue(raw_results, ((r, e) for r in requests_chunk), loop=loop)
+                            cls.enqueue(raw_results, ((r, e) for r in requests_group), loop=loop)
 
                 if responses != raw_results:
                     # If we are in async mode, indicate to the result subscriber that there are no more requests
                     cls.shutdown_queue_listener(responses, loop=loop)
 
         async def run_async():
-            def num_risk_jobs(request: RiskRequest):
-                # size of calculation job
-                return len(request.pricing_and_market_data_as_of) * len(request.positions)
-
-            def num_risk_keys(request: RiskRequest):
-                # total number of risk calculations
-                return num_risk_jobs(request) * len(request.measures)
+            # size of calculation job, counting measures so that requests split by measure add up to the original
+            num_risk_jobs = RequestBatcher.cost
 
             is_async = not requests[0].wait_for_results
             loop = asyncio.get_event_loop()
@@ -218,8 +270,7 @@ class RiskApi(metaclass=ABCMeta):
                 chunk_size = min(risk_jobs_received, expected - received)
 
                 if progress_bar:
-                    risk_calcs_received = sum(num_risk_keys(request) for request, _ in completed)
-                    progress_bar.update(risk_calcs_received)
+                    progress_bar.update(risk_jobs_received)
                     progress_bar.refresh()
 
                 received += risk_jobs_received
@@ -275,6 +326,86 @@ class RiskApi(metaclass=ABCMeta):
                     main_loop.close()
                     asyncio.set_event_loop(None)
 
+    @classmethod
+    async def run_async(cls,
+                        requests: list,
+                        max_concurrent: int,
+                        progress_bar: Optional[tqdm] = None,
+                        timeout: Optional[int] = None) -> dict:
+        """
+        Run requests on the running event loop and return the formatted results, keyed on (risk key, instrument)
+
+        Requests are dispatched in the same chunks as run(), with at most max_concurrent risk jobs outstanding
+        """
+        num_risk_jobs = RequestBatcher.cost
+
+        async def dispatch(requests_group: tuple):
+            try:
+                responses_group = await cls.calc_multi_async(requests_group)
+                cls.enqueue(responses, responses_group.items())
+            except Exception as e:
+                cls.enqueue(raw_results, ((r, e) for r in requests_group))
+
+        requests = list(requests)
+        is_async = not requests[0].wait_for_results
+        raw_results = asyncio.Queue()
+        responses = asyncio.Queue() if is_async else raw_results
+        results_handler = asyncio.ensure_future(cls.get_results(responses, raw_results, timeout=timeout)) \
+            if is_async else None
+
+        expected = sum(num_risk_jobs(r) for r in requests)
+        received = 0
+        chunk_size = min(max_concurrent, expected)
+        dispatches = []
+        results = {}
+
+        try:
+            while received < expected:
+                if requests:
+                    dispatch_risk_keys = 0
+                    dispatch_requests = []
+                    while requests and dispatch_risk_keys < chunk_size:
+                        dispatch_request = requests.pop()
+                        dispatch_requests.append(dispatch_request)
+                        dispatch_risk_keys += num_risk_jobs(dispatch_request)
+
+                    dispatches.extend(asyncio.ensure_future(dispatch(requests_group)) for requests_group in
+                                      RequestBatcher.group(RequestBatcher.merge(dispatch_requests, max_concurrent)))
+
+                shutdown, completed = await cls.drain_queue_async(raw_results)
+                if shutdown:
+                    # Only happens on error
+                    break
+
+                # Enable as many new requests as we've received results, to keep the outstanding number constant
+                risk_jobs_received = sum(num_risk_jobs(request) for request, _ in completed)
+                chunk_size = min(risk_jobs_received, expected - received)
+                received += risk_jobs_received
+
+                if progress_bar:
+                    progress_bar.update(risk_jobs_received)
+                    progress_bar.refresh()
+
+                for request, result in completed:
+                    results.update(cls._handle_results(request, result))
+        except BaseException:
+            if results_handler:
+                results_handler.cancel()
+            raise
+        finally:
+            for pending_dispatch in dispatches:
+                pending_dispatch.cancel()
+
+            if progress_bar:
+                progress_bar.close()
+
+        if results_handler:
+            # Indicate to the result subscriber that there are no more requests
+            cls.shutdown_queue_listener(responses)
+            await results_handler
+
+        return results
+
     @classmethod
     def _handle_results(cls, request: RiskRequest, results: Union[Iterable, Exception]) -> dict:
         formatted_results = {}
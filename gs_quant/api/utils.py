@@ -14,10 +14,17 @@ specific language governing permissions and limitations
 under the License.
 """
 
-import concurrent
+import bisect
+import concurrent.futures
+import logging
+import math
+import os
 import socket
+import threading
+import time
 from concurrent.futures.thread import ThreadPoolExecutor
-from typing import List, Callable
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import requests
 
@@ -25,6 +32,12 @@ from gs_quant.data import DataContext
 from gs_quant.errors import MqUninitialisedError
 from gs_quant.session import GsSession
 
+_logger = logging.getLogger(__name__)
+
+THREAD_POOL_MAX_WORKERS = 'GSQ_THREAD_POOL_MAX_WORKERS'
+THREAD_POOL_MAX_QUEUE = 'GSQ_THREAD_POOL_MAX_QUEUE'
+THREAD_POOL_TIMEOUT = 'GSQ_THREAD_POOL_TIMEOUT'
+
 
 def handle_proxy(url, params):
     try:
@@ -43,30 +56,239 @@ def handle_proxy(url, params):
     return response
 
 
+class _Histogram:
+    """
+    Counts of durations in seconds, by upper bound
+    """
+    BUCKETS = (0.001, 0.01, 0.1, 1., 10., 60., math.inf)
+
+    def __init__(self):
+        self.counts = [0] * len(self.BUCKETS)
+        self.total = 0.
+        self.max = 0.
+
+    def record(self, duration: float):
+        self.counts[bisect.bisect_left(self.BUCKETS, duration)] += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+    def as_dict(self) -> dict:
+        return {'total': self.total, 'max': self.max, 'buckets': dict(zip(self.BUCKETS, self.counts))}
+
+
+class _TaskStats:
+    def __init__(self):
+        self.count = 0
+        self.failed = 0
+        self.queue_wait = _Histogram()
+        self.run_time = _Histogram()
+
+    def as_dict(self) -> dict:
+        return {'count': self.count, 'failed': self.failed, 'queue_wait': self.queue_wait.as_dict(),
+                'run_time': self.run_time.as_dict()}
+
+
 class ThreadPoolManager:
+    """
+    Runs tasks on a shared pool of threads, in the session and data context of the caller
+
+    The pool is sized by configure, or else by the GSQ_THREAD_POOL_MAX_WORKERS, GSQ_THREAD_POOL_MAX_QUEUE and
+    GSQ_THREAD_POOL_TIMEOUT environment variables. The time each task waits in the queue and runs is recorded by task
+    label, the name of its function unless given
+
+    **Examples**
+
+    >>> from gs_quant.api.utils import ThreadPoolManager
+    >>>
+    >>> ThreadPoolManager.configure(max_workers=16, max_queue=64, timeout=300)
+    >>> ThreadPoolManager.run_async(tasks)
+    >>> ThreadPoolManager.stats()['tasks']['_market_data_timed']['run_time']
+    """
     __executor: ThreadPoolExecutor = None
+    __configured = False
+    __max_workers: Optional[int] = None
+    __max_queue: Optional[int] = None
+    __timeout: Optional[float] = None
+    __slots: Optional[threading.BoundedSemaphore] = None
+    __queued = 0
+    __running = 0
+    __stats: Dict[str, _TaskStats] = {}
+    __lock = threading.Lock()
+    __local = threading.local()
 
     @classmethod
     def initialize(cls, max_workers: int):
-        cls.__executor = ThreadPoolExecutor(max_workers=max_workers)
+        cls.configure(max_workers=max_workers)
+
+    @classmethod
+    def configure(cls, max_workers: Optional[int] = None, max_queue: Optional[int] = None,
+                  timeout: Optional[float] = None):
+        """
+        Configure the pool. Tasks already running are unaffected
+
+        :param max_workers: the number of threads. Defaults to GSQ_THREAD_POOL_MAX_WORKERS, or else to that of
+            ThreadPoolExecutor
+        :param max_queue: the maximum number of tasks waiting for a thread. run_async blocks while the queue is full,
+            except in tasks of the pool. Defaults to GSQ_THREAD_POOL_MAX_QUEUE, or else to no limit
+        :param timeout: the default number of seconds for which run_async waits for its tasks. Defaults to
+            GSQ_THREAD_POOL_TIMEOUT, or else to no limit
+        """
+        max_workers = _env_number(THREAD_POOL_MAX_WORKERS, int) if max_workers is None else max_workers
+        max_queue = _env_number(THREAD_POOL_MAX_QUEUE, int) if max_queue is None else max_queue
+        timeout = _env_number(THREAD_POOL_TIMEOUT, float) if timeout is None else timeout
+        for name, value in (('max_workers', max_workers), ('timeout', timeout)):
+            if value is not None and value <= 0:
+                raise ValueError(f'{name} must be positive')
+        if max_queue is not None and max_queue < 0:
+            raise ValueError('max_queue must not be negative')
+
+        with cls.__lock:
+            executor = cls.__executor
+            cls.__executor = None
+            cls.__configured = True
+            cls.__max_workers = max_workers
+            cls.__max_queue = max_queue
+            cls.__timeout = timeout
+
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    @classmethod
+    def stats(cls) -> dict:
+        """
+        A snapshot of the pool: its size, the number of tasks queued and running, and for each task label the number
+        of tasks run and failed, and histograms of the seconds they waited in the queue and ran
+        """
+        with cls.__lock:
+            return {
+                'max_workers': cls.__executor._max_workers if cls.__executor else cls.__max_workers,
+                'max_queue': cls.__max_queue,
+                'queued': cls.__queued,
+                'running': cls.__running,
+                'tasks': {label: s.as_dict() for label, s in cls.__stats.items()}
+            }
 
     @classmethod
-    def run_async(cls, tasks: List[Callable]) -> List:
-        if not cls.__executor:
-            cls.__executor = ThreadPoolExecutor()
+    def reset_stats(cls):
+        with cls.__lock:
+            cls.__stats = {}
 
+    @classmethod
+    def run_async(cls, tasks: List[Callable], labels: Union[str, Iterable[str], None] = None,
+                  timeout: Optional[float] = None, cancel_on_error: bool = True) -> List:
+        """
+        Run tasks concurrently
+
+        :param tasks: functions of no arguments
+        :param labels: the label of each task, or one for all, under which to record its timings
+        :param timeout: the number of seconds to wait for all the tasks, after which concurrent.futures.TimeoutError
+            is raised. Defaults to the configured timeout
+        :param cancel_on_error: cancel the tasks not yet started once one fails or the timeout expires
+        :return: the result of each task
+        """
+        executor, slots, default_timeout = cls.__get_executor()
+        timeout = default_timeout if timeout is None else timeout
+        if labels is None:
+            labels = [cls.__label(t) for t in tasks]
+        elif isinstance(labels, str):
+            labels = [labels] * len(tasks)
+
+        # tasks of the pool are not held back by the queue, as the threads they wait on may be waiting to queue
+        nested = getattr(cls.__local, 'in_pool', False)
+        session, data_context = GsSession.current, DataContext.current
         tasks_to_idx = {}
-        for i, task in enumerate(tasks):
-            tasks_to_idx[cls.__executor.submit(cls.__run, GsSession.current, DataContext.current, task)] = i
-        results = [None] * len(tasks_to_idx)
-        for task in concurrent.futures.as_completed(tasks_to_idx):
-            idx = tasks_to_idx[task]
-            results[idx] = task.result()
+        try:
+            for i, (task, label) in enumerate(zip(tasks, labels)):
+                if slots is not None and not nested:
+                    slots.acquire()
+                with cls.__lock:
+                    cls.__queued += 1
+                run_args = (session, data_context, task, label, time.perf_counter())
+                future = executor.submit(cls.__run, *run_args)
+                future.add_done_callback(partial(cls.__done, slots if slots is not None and not nested else None))
+                tasks_to_idx[future] = i, run_args
+
+            results = [None] * len(tasks_to_idx)
+            if nested:
+                # run here the tasks no thread has started, as every thread may be waiting on tasks like this one
+                for future, (idx, run_args) in list(tasks_to_idx.items()):
+                    if future.cancel():
+                        del tasks_to_idx[future]
+                        results[idx] = cls.__run(*run_args, queued=False)
+
+            for task in concurrent.futures.as_completed(tasks_to_idx, timeout=timeout):
+                idx = tasks_to_idx[task][0]
+                results[idx] = task.result()
+        except BaseException:
+            if cancel_on_error:
+                for future in tasks_to_idx:
+                    future.cancel()
+            raise
 
         return results
 
+    @classmethod
+    def __get_executor(cls) -> Tuple[ThreadPoolExecutor, Optional[threading.BoundedSemaphore], Optional[float]]:
+        if not cls.__configured:
+            cls.configure()
+
+        with cls.__lock:
+            if cls.__executor is None:
+                cls.__executor = ThreadPoolExecutor(max_workers=cls.__max_workers)
+                cls.__slots = None if cls.__max_queue is None else \
+                    threading.BoundedSemaphore(cls.__executor._max_workers + cls.__max_queue)
+
+            return cls.__executor, cls.__slots, cls.__timeout
+
     @staticmethod
-    def __run(session, data_context, func):
-        with session:
-            with data_context:
-                return func()
+    def __label(task: Callable) -> str:
+        while isinstance(task, partial):
+            task = task.func
+        return getattr(task, '__qualname__', None) or type(task).__name__
+
+    @classmethod
+    def __done(cls, slots: Optional[threading.BoundedSemaphore], future: concurrent.futures.Future):
+        if slots is not None:
+            slots.release()
+        if future.cancelled():
+            with cls.__lock:
+                cls.__queued -= 1
+
+    @classmethod
+    def __run(cls, session, data_context, func, label: str, submitted: float, queued: bool = True):
+        started = time.perf_counter()
+        with cls.__lock:
+            cls.__queued -= queued
+            cls.__running += 1
+
+        failed = True
+        in_pool = getattr(cls.__local, 'in_pool', False)
+        cls.__local.in_pool = True
+        try:
+            with session:
+                with data_context:
+                    result = func()
+            failed = False
+            return result
+        finally:
+            cls.__local.in_pool = in_pool
+            finished = time.perf_counter()
+            with cls.__lock:
+                cls.__running -= 1
+                stats = cls.__stats.setdefault(label, _TaskStats())
+                stats.count += 1
+                stats.failed += failed
+                stats.queue_wait.record(started - submitted)
+                stats.run_time.record(finished - started)
+
+
+def _env_number(name: str, type_: type) -> Optional[Union[int, float]]:
+    value = os.environ.get(name)
+    if not value:
+        return None
+
+    try:
+        return type_(value)
+    except ValueError:
+        _logger.warning(f'Ignoring {name}={value}, which is not a number')
+        return None
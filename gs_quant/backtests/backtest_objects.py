@@ -49,6 +49,7 @@ class BackTest(BaseBacktest):
         self._results = defaultdict(list)
         self._risks = tuple(risks)  # list of risks to calculate
         self._calc_calls = 0
+        self._calc_calls_saved = 0
         self._calculations = 0
 
     @property
@@ -108,6 +109,14 @@ class BackTest(BaseBacktest):
     def calc_calls(self, calc_calls):
         self._calc_calls = calc_calls
 
+    @property
+    def calc_calls_saved(self):
+        return self._calc_calls_saved
+
+    @calc_calls_saved.setter
+    def calc_calls_saved(self, calc_calls_saved):
+        self._calc_calls_saved = calc_calls_saved
+
     @property
     def calculations(self):
         return self._calculations
@@ -203,30 +212,92 @@ class PredefinedAssetBacktest(BaseBacktest):
     :param orders: a list of all the orders generated
     :param initial_value: the initial value of the index
     :param results: a dictionary which can be used to store intermediate results
+
+    Holdings and valuations are kept in arrays with a column per instrument, in order of first fill, and a row per
+    valuation date. historical_holdings_frame and historical_weights_frame return them as date x instrument frames
     """
 
     def __init__(self, data_handler: DataHandler, initial_value: float):
         self.data_handler = data_handler
-        self.performance = pd.Series(dtype=float)
         self.cash_asset = Cash('USD')
-        self.holdings = defaultdict(float)
-        self.historical_holdings = pd.Series(dtype=float)
-        self.historical_weights = pd.Series(dtype=float)
         self.orders = []
         self.initial_value = initial_value
         self.results = {}
+        self._instruments = []
+        self._columns = {}
+        self._units = np.zeros(0)
+        self._performance = {}
+        self._historical_units = {}
+        self._historical_weights = {}
+        self._orders_by_date = defaultdict(list)
+
+    @property
+    def holdings(self) -> defaultdict:
+        """
+        Quantity held of each instrument. This is a copy: holdings are changed by fills
+        """
+        return defaultdict(float, zip(self._instruments, self._units.tolist()))
+
+    @property
+    def performance(self) -> pd.Series:
+        return pd.Series(self._performance, dtype=float)
+
+    @property
+    def historical_holdings(self) -> pd.Series:
+        """
+        Quantity of each instrument held on each valuation date, omitting instruments not held
+        """
+        return self.__as_dicts(self._historical_units)
+
+    @property
+    def historical_weights(self) -> pd.Series:
+        """
+        Weight of each instrument held on each valuation date, omitting instruments not held
+        """
+        return self.__as_dicts(self._historical_weights)
+
+    @property
+    def historical_holdings_frame(self) -> pd.DataFrame:
+        return self.__as_frame(self._historical_units)
+
+    @property
+    def historical_weights_frame(self) -> pd.DataFrame:
+        return self.__as_frame(self._historical_weights)
+
+    def __as_frame(self, rows: dict) -> pd.DataFrame:
+        matrix = np.zeros((len(rows), len(self._instruments)))
+        for i, row in enumerate(rows.values()):
+            matrix[i, :len(row)] = row
+        return pd.DataFrame(matrix, index=list(rows), columns=pd.Index(self._instruments, dtype=object))
+
+    def __as_dicts(self, rows: dict) -> pd.Series:
+        held = self._historical_units
+        return pd.Series({date: {self._instruments[i]: row[i] for i in np.flatnonzero(held[date])}
+                          for date, row in rows.items()}, dtype=object)
+
+    def __column(self, instrument) -> int:
+        column = self._columns.get(instrument)
+        if column is None:
+            column = self._columns[instrument] = len(self._instruments)
+            self._instruments.append(instrument)
+            self._units = np.append(self._units, 0.)
+        return column
 
     def set_start_date(self, start: dt.date):
-        self.performance[start] = self.initial_value
-        self.holdings[self.cash_asset] = self.initial_value
+        self._performance[start] = self.initial_value
+        cash = self.__column(self.cash_asset)
+        self._units[cash] = self.initial_value
 
     def record_orders(self, orders: Iterable[OrderBase]):
+        orders = tuple(orders)
         self.orders.extend(orders)
+        for order in orders:
+            self._orders_by_date[order.execution_end_time().date()].append(order)
 
     def update_fill(self, fill: FillEvent):
-        inst = fill.order.instrument
-        self.holdings[self.cash_asset] -= fill.filled_price * fill.filled_units
-        self.holdings[inst] += fill.filled_units
+        cash, inst = self.__column(self.cash_asset), self.__column(fill.order.instrument)
+        self._units[cash] -= fill.filled_price * fill.filled_units
+        self._units[inst] += fill.filled_units
 
     def trade_ledger(self):
         instrument_queues = {}
@@ -277,36 +348,39 @@ class PredefinedAssetBacktest(BaseBacktest):
     def mark_to_market(self, state: dt.datetime, valuation_method: ValuationMethod):
         epsilon = 1e-12
         date = state.date()
-        mtm = 0
-        self.historical_holdings[date] = {}
-        self.historical_weights[date] = {}
-        for instrument, units in self.holdings.items():
-            if abs(units) > epsilon:
-                self.historical_holdings[date][instrument] = units
-
-                if isinstance(instrument, Cash):
-                    fixing = 1
-                else:
-                    tag, window = valuation_method.data_tag, valuation_method.window
-                    if window:
-                        start = dt.datetime.combine(state.date(), window.start)
-                        end = dt.datetime.combine(state.date(), window.end)
-                        fixings = self.data_handler.get_data_range(start, end, instrument, tag)
-                        fixing = np.mean(fixings) if len(fixings) else np.nan
-                    else:  # no time window specified, use daily fixing
-                        fixing = self.data_handler.get_data(state.date(), instrument, tag)
-
-                notional = fixing * units
-                self.historical_weights[date][instrument] = notional
-                mtm += notional
-
-        self.performance[date] = mtm
-
-        for instrument, notional in self.historical_weights[date].items():
-            self.historical_weights[date][instrument] = notional / mtm
+        held = np.flatnonzero(np.abs(self._units) > epsilon)
+        fixings = np.ones(len(held))
+
+        # cash is valued at par and everything else from its fixings, fetched for all instruments at once
+        priced = [i for i, column in enumerate(held) if not isinstance(self._instruments[column], Cash)]
+        if priced:
+            tag, window = valuation_method.data_tag, valuation_method.window
+            keys = [(self._instruments[held[i]], tag) for i in priced]
+            if window:
+                start = dt.datetime.combine(state.date(), window.start)
+                end = dt.datetime.combine(state.date(), window.end)
+                # the mean of the fixings in the window, skipping missing ones as Series.mean
+                windows = self.data_handler.get_data_range_for_keys(start, end, keys)
+                counts = np.array([np.count_nonzero(~np.isnan(f)) for f in windows])
+                sums = np.array([np.nansum(f) for f in windows])
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    fixings[priced] = np.where(counts > 0, sums / counts, np.nan)
+            else:  # no time window specified, use daily fixing
+                fixings[priced] = self.data_handler.get_data_for_keys(state.date(), keys)
+
+        units = np.zeros(len(self._units))
+        units[held] = self._units[held]
+        notionals = np.zeros(len(self._units))
+        notionals[held] = fixings * units[held]
+        mtm = notionals.sum()
+
+        self._performance[date] = mtm
+        self._historical_units[date] = units
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self._historical_weights[date] = notionals / mtm
 
     def get_level(self, date: dt.date) -> float:
-        return self.performance[date]
+        return self._performance[date]
 
     def get_costs(self) -> pd.Series(dtype=float):
         costs = defaultdict(float)
@@ -317,5 +391,4 @@ class PredefinedAssetBacktest(BaseBacktest):
         return pd.Series(costs)
 
     def get_orders_for_date(self, date: dt.date) -> pd.DataFrame():
-        return pd.DataFrame([order.to_dict(self.data_handler) for order in self.orders
-                             if order.execution_end_time().date() == date])
+        return pd.DataFrame([order.to_dict(self.data_handler) for order in self._orders_by_date.get(date, ())])
@@ -15,7 +15,7 @@ under the License.
 """
 
 import datetime as dt
-from typing import Union
+from typing import Iterable, Union
 from gs_quant.backtests.data_sources import DataManager
 from pytz import timezone, utc
 
@@ -75,6 +75,17 @@ class DataHandler(object):
 
     def get_data_range(self, start: Union[dt.date, dt.datetime], end: Union[dt.date, dt.datetime], *key):
         self._clock.time_check(end)
-        if type(start) != type(end):
+        if type(start) is not type(end):
             raise RuntimeError('expect same type for start and end when asking for data range')
         return self._data_mgr.get_data_range(self._utc_time(start), self._utc_time(end), *key)
+
+    def get_data_for_keys(self, state: Union[dt.date, dt.datetime], keys: Iterable[tuple]) -> list:
+        self._clock.time_check(state)
+        return self._data_mgr.get_data_for_keys(self._utc_time(state), keys)
+
+    def get_data_range_for_keys(self, start: Union[dt.date, dt.datetime], end: Union[dt.date, dt.datetime],
+                                keys: Iterable[tuple]) -> list:
+        self._clock.time_check(end)
+        if type(start) is not type(end):
+            raise RuntimeError('expect same type for start and end when asking for data range')
+        return self._data_mgr.get_data_range_for_keys(self._utc_time(start), self._utc_time(end), keys)
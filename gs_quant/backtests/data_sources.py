@@ -16,11 +16,10 @@ under the License.
 
 import datetime
 from enum import Enum
-from typing import Union, Iterable
+from typing import Iterable, Tuple, Union
 import datetime as dt
 from gs_quant.data import Dataset
 import pandas as pd
-import pytz
 import numpy as np
 from gs_quant.data import DataFrequency
 
@@ -56,10 +55,23 @@ class GsDataSource(DataSource):
         return self._loaded_data[self._value_header].at[pd.to_datetime(state)]
 
 
+def _to_nanos(values: Iterable) -> np.ndarray:
+    """
+    Dates or datetimes as int64 nanoseconds since the epoch. Timezone aware values are converted to UTC and naive
+    values are taken to be UTC
+    """
+    try:
+        return pd.DatetimeIndex(pd.to_datetime(values)).asi8
+    except (TypeError, ValueError):
+        values = tuple(values)
+        return np.fromiter((pd.Timestamp(v).value for v in values), dtype=np.int64, count=len(values))
+
+
 class GenericDataSource(DataSource):
     def __init__(self, data_set: pd.Series, missing_data_strategy: MissingDataStrategy = MissingDataStrategy.fail):
         """
-        A data source which holds a pandas series indexed by date or datetime
+        A data source which holds a pandas series indexed by date or datetime. The series is sorted and filled once,
+        and is not modified
         :param data_set: a pandas dataframe indexed by date or datetime
         :param missing_data_strategy: MissingDataStrategy which defines behaviour if data is missing, will only take
                                       effect if using get_data, gat_data_range has no expectations of the number of
@@ -67,12 +79,24 @@ class GenericDataSource(DataSource):
         """
         self._data_set = data_set
         self._missing_data_strategy = missing_data_strategy
-        self._tz_aware = isinstance(self._data_set.index[0],
-                                    datetime.datetime) and self._data_set.index[0].tzinfo is not None
+
+        times = _to_nanos(data_set.index)
+        order = np.argsort(times, kind='stable')
+        self._times = times[order]
+        self._sorted_data = data_set.iloc[order]
+
         if self._missing_data_strategy == MissingDataStrategy.interpolate:
-            self._data_set.interpolate()
+            # interpolate linearly in time between valid points, holding the last value flat
+            values = self._sorted_data.to_numpy(dtype=float)
+            valid = ~np.isnan(values)
+            self._values = values[valid]
+            self._times_for_values = self._times[valid]
         elif self._missing_data_strategy == MissingDataStrategy.fill_forward:
-            self._data_set.ffill()
+            self._values = self._sorted_data.ffill().to_numpy()
+        elif self._missing_data_strategy == MissingDataStrategy.fail:
+            self._values = self._sorted_data.to_numpy()
+        else:
+            raise RuntimeError(f'unrecognised missing data strategy: {str(self._missing_data_strategy)}')
 
     def get_data(self, state: Union[datetime.date, datetime.datetime, Iterable]):
         """
@@ -81,29 +105,43 @@ class GenericDataSource(DataSource):
         :return: float value
         """
         if isinstance(state, Iterable):
-            return [self.get_data(i) for i in state]
-
-        if self._tz_aware and (state.tzinfo is None or state.tzinfo.utcoffset(state) is None):
-            state = pytz.utc.localize(state)
-        if pd.Timestamp(state) in self._data_set:
-            return self._data_set[pd.Timestamp(state)]
-        elif state in self._data_set or self._missing_data_strategy == MissingDataStrategy.fail:
-            return self._data_set[state]
-        else:
-            if isinstance(self._data_set.index, pd.DatetimeIndex):
-                self._data_set.at[pd.to_datetime(state)] = np.nan
-                self._data_set.sort_index(inplace=True)
-            else:
-                self._data_set.at[state] = np.nan
-            self._data_set.sort_index()
-            if self._missing_data_strategy == MissingDataStrategy.interpolate:
-                self._data_set = self._data_set.interpolate()
-            elif self._missing_data_strategy == MissingDataStrategy.fill_forward:
-                self._data_set = self._data_set.ffill()
-            else:
-                raise RuntimeError(f'unrecognised missing data strategy: {str(self._missing_data_strategy)}')
-            return self._data_set[pd.to_datetime(state)] if isinstance(self._data_set.index,
-                                                                       pd.DatetimeIndex) else self._data_set[state]
+            states = tuple(state)
+            return list(self.__values_at(_to_nanos(states), states)) if states else []
+
+        return self.__values_at(np.array([pd.Timestamp(state).value]), (state,))[0]
+
+    def __values_at(self, times: np.ndarray, states: tuple) -> np.ndarray:
+        # position after the last point at or before each time
+        ends = np.searchsorted(self._times, times, side='right')
+
+        if self._missing_data_strategy == MissingDataStrategy.interpolate:
+            return self.__interpolate(times)
+
+        if self._missing_data_strategy == MissingDataStrategy.fail:
+            found = ends > 0
+            found[found] = self._times[ends[found] - 1] == times[found]
+            if not found.all():
+                raise KeyError(states[int(np.argmin(found))])
+            return self._values[ends - 1]
+
+        if not len(self._values):
+            return np.full(len(times), np.nan)
+        return np.where(ends > 0, self._values[np.maximum(ends - 1, 0)], np.nan)
+
+    def __interpolate(self, times: np.ndarray) -> np.ndarray:
+        results = np.full(len(times), np.nan)
+        after = np.searchsorted(self._times_for_values, times, side='right')
+        known = after > 0
+        if not known.any():
+            return results
+
+        # flat after the last valid point
+        before, after = after[known] - 1, np.minimum(after[known], len(self._values) - 1)
+        span = self._times_for_values[after] - self._times_for_values[before]
+        elapsed = times[known] - self._times_for_values[before]
+        weights = np.divide(elapsed, span, out=np.zeros(len(span)), where=span > 0)
+        results[known] = self._values[before] + weights * (self._values[after] - self._values[before])
+        return results
 
     def get_data_range(self, start: Union[datetime.date, datetime.datetime],
                        end: Union[datetime.date, datetime.datetime, int]):
@@ -115,18 +153,104 @@ class GenericDataSource(DataSource):
         :return: pd.Series
         """
         if isinstance(end, int):
-            return self._data_set.loc[:start].tail(end)
-        return self._data_set.loc[(start < self._data_set.index) & (self._data_set.index <= end)]
+            stop = np.searchsorted(self._times, pd.Timestamp(start).value, side='right')
+            return self._sorted_data.iloc[max(stop - end, 0):stop]
+
+        first, stop = np.searchsorted(self._times, (pd.Timestamp(start).value, pd.Timestamp(end).value), side='right')
+        return self._sorted_data.iloc[first:stop]
+
+
+class _StackedDataSources:
+    """
+    The numeric GenericDataSources of a DataManager stacked into single arrays, so that many of them are looked up with
+    one search. Other sources are looked up one by one
+    """
+
+    def __init__(self, sources: dict):
+        stacked = {k: s for k, s in sources.items() if isinstance(s, GenericDataSource) and
+                   np.issubdtype(s._sorted_data.dtype, np.number)}
+        self.__ids = {k: i for i, k in enumerate(stacked)}
+        self.__sources = sources
+        self.__strategies = np.array([s._missing_data_strategy.value for s in stacked.values()] or [''])
+        self.__offsets = np.cumsum([0] + [len(s._times) for s in stacked.values()])
+
+        times = np.concatenate([s._times for s in stacked.values()] or [np.empty(0, dtype=np.int64)])
+        self.__times = times
+        self.__raw_values = np.concatenate([s._sorted_data.to_numpy(dtype=float) for s in stacked.values()] or
+                                           [np.empty(0)])
+        self.__filled_values = np.concatenate(
+            [s._values.astype(float) if s._missing_data_strategy != MissingDataStrategy.interpolate else
+             np.full(len(s._times), np.nan) for s in stacked.values()] or [np.empty(0)])
+
+        # a single sorted array of (source, rank of time among those of all sources), so that the position of a time in
+        # every source is found with one search
+        self.__unique_times = np.unique(times)
+        self.__stride = len(self.__unique_times) + 1
+        ids = np.repeat(np.arange(len(stacked)), np.diff(self.__offsets))
+        self.__keys = ids * self.__stride + np.searchsorted(self.__unique_times, times) + 1
+
+    def __ends(self, ids: np.ndarray, time: int) -> np.ndarray:
+        """ Positions after the last point at or before time of each source """
+        rank = np.searchsorted(self.__unique_times, time, side='right')
+        return np.searchsorted(self.__keys, ids * self.__stride + rank, side='right')
+
+    def __split(self, keys: list) -> Tuple[np.ndarray, np.ndarray]:
+        stacked = np.fromiter((k in self.__ids for k in keys), dtype=bool, count=len(keys))
+        ids = np.fromiter((self.__ids[k] for k, s in zip(keys, stacked) if s), dtype=np.int64, count=stacked.sum())
+        return stacked, ids
+
+    def get_data(self, state: Union[dt.date, dt.datetime], keys: list) -> list:
+        stacked, ids = self.__split(keys)
+        time = pd.Timestamp(state).value
+        ends = self.__ends(ids, time)
+        found = ends > self.__offsets[ids]
+        last = np.maximum(ends - 1, 0)
+        strategies = self.__strategies[ids]
+
+        fail = strategies == MissingDataStrategy.fail.value
+        exact = found.copy()
+        exact[found] = self.__times[last[found]] == time
+        if (fail & ~exact).any():
+            raise KeyError(state)
+
+        values = np.where(found, np.where(fail, self.__raw_values[last], self.__filled_values[last]), np.nan)
+        interpolated = np.flatnonzero(strategies == MissingDataStrategy.interpolate.value)
+        stacked_keys = [k for k, s in zip(keys, stacked) if s]
+        for i in interpolated:
+            values[i] = self.__sources[stacked_keys[i]].get_data(state)
+
+        results = iter(values.tolist())
+        return [next(results) if s else self.__sources[k].get_data(state) for k, s in zip(keys, stacked)]
+
+    def get_data_range(self, start: Union[dt.date, dt.datetime], end: Union[dt.date, dt.datetime],
+                       keys: list) -> list:
+        stacked, ids = self.__split(keys)
+        start_time, end_time = pd.Timestamp(start).value, pd.Timestamp(end).value
+        firsts = self.__ends(ids, start_time)
+        stops = self.__ends(ids, end_time)
+
+        ranges = iter(zip(firsts.tolist(), stops.tolist()))
+        return [self.__raw_values[slice(*next(ranges))] if s else
+                np.asarray(self.__sources[k].get_data_range(start, end), dtype=float) for k, s in zip(keys, stacked)]
 
 
 class DataManager:
     def __init__(self):
         self._data_sources = {DataFrequency.DAILY: {}, DataFrequency.REAL_TIME: {}}
+        self.__stacked = {}
 
     def add_data_source(self, series: Union[pd.Series, DataSource], data_freq: DataFrequency, *key):
         if not isinstance(series, DataSource) and not len(series):
             return
         self._data_sources[data_freq][key] = GenericDataSource(series) if isinstance(series, pd.Series) else series
+        self.__stacked.pop(data_freq, None)
+
+    def __stacked_sources(self, state: Union[dt.date, dt.datetime]) -> _StackedDataSources:
+        data_freq = DataFrequency.REAL_TIME if isinstance(state, dt.datetime) else DataFrequency.DAILY
+        stacked = self.__stacked.get(data_freq)
+        if stacked is None:
+            stacked = self.__stacked[data_freq] = _StackedDataSources(self._data_sources[data_freq])
+        return stacked
 
     def get_data(self, state: Union[dt.date, dt.datetime], *key):
         if isinstance(state, dt.datetime):
@@ -140,3 +264,17 @@ class DataManager:
             return self._data_sources[DataFrequency.REAL_TIME][key].get_data_range(start, end)
         else:
             return self._data_sources[DataFrequency.DAILY][key].get_data_range(start, end)
+
+    def get_data_for_keys(self, state: Union[dt.date, dt.datetime], keys: Iterable[tuple]) -> list:
+        """
+        The value of each keyed data source at state, as get_data, looked up for all sources at once
+        """
+        return self.__stacked_sources(state).get_data(state, list(keys))
+
+    def get_data_range_for_keys(self, start: Union[dt.date, dt.datetime],
+                                end: Union[dt.date, dt.datetime], keys: Iterable[tuple]) -> list:
+        """
+        The values of each keyed data source over a range, as get_data_range, looked up for all sources at once. Values
+        are returned as arrays rather than series
+        """
+        return self.__stacked_sources(start).get_data_range(start, end, list(keys))
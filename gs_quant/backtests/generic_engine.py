@@ -14,7 +14,7 @@ specific language governing permissions and limitations
 under the License.
 """
 
-from typing import Union, Iterable, Optional
+from typing import Dict, List, Tuple, Union, Iterable, Optional
 from gs_quant.backtests.action_handler import ActionHandlerBaseFactory, ActionHandler
 from gs_quant.backtests.backtest_engine import BacktestBaseEngine
 from gs_quant.backtests.backtest_utils import make_list, CalcType, get_final_date
@@ -26,6 +26,7 @@ from gs_quant.instrument import Instrument
 from gs_quant.markets.portfolio import Portfolio
 from gs_quant.markets import PricingContext, HistoricalPricingContext
 from gs_quant.risk import Price
+from gs_quant.risk.results import PortfolioPath, PortfolioRiskResult
 from gs_quant.common import ParameterisedRiskMeasure
 from functools import reduce
 from datetime import date
@@ -204,6 +205,79 @@ class GenericEngineActionFactory(ActionHandlerBaseFactory):
         raise RuntimeError(f'Action {type(action)} not supported by engine')
 
 
+class PricingLookahead:
+    """
+    Prices positions already scheduled on future states before the path dependent loop reaches them
+
+    Positions added to future states by path dependent actions or hedge scaling must be priced on those states
+    whatever later triggers do, so they are priced in the batch of the current state. Their results are held until
+    the loop reaches their state, and only added for positions which are still held then
+    """
+
+    def __init__(self, states: Iterable[date], risks: tuple):
+        self.__states = tuple(states)
+        self.__positions = {s: i for i, s in enumerate(self.__states)}
+        self.__risks = risks
+        self.__priced = defaultdict(list)
+        self.__priced_ids = defaultdict(set)
+
+    @staticmethod
+    def unpriced(backtest: BackTest, state: date) -> list:
+        """
+        Positions held on state without results
+        """
+        results = backtest.results.get(state)
+        priced = results.portfolio if isinstance(results, PortfolioRiskResult) else ()
+        return [t for t in backtest.portfolio_dict.get(state, ()) if t.name not in priced]
+
+    def unscheduled(self, backtest: BackTest, state: date) -> Dict[date, list]:
+        """
+        Positions held on states after state, which are neither priced nor held for pricing
+        """
+        positions_by_state = {}
+        for future_state in self.__states[self.__positions[state] + 1:]:
+            positions = [t for t in self.unpriced(backtest, future_state)
+                         if id(t) not in self.__priced_ids[future_state]]
+            if positions:
+                positions_by_state[future_state] = positions
+
+        return positions_by_state
+
+    def price(self, positions_by_state: Dict[date, list]) -> int:
+        """
+        Price positions on their states. Must be called in a batch PricingContext
+
+        :return: the number of calculations requested
+        """
+        calculations = 0
+        for state, positions in positions_by_state.items():
+            with PricingContext(pricing_date=state):
+                self.__priced[state].append((tuple(positions), Portfolio(positions).calc(self.__risks)))
+                self.__priced_ids[state].update(id(t) for t in positions)
+                calculations += len(positions) * len(self.__risks)
+
+        return calculations
+
+    def take(self, state: date, positions: list) -> Tuple[List[PortfolioRiskResult], list]:
+        """
+        Claim the results held for positions on state
+
+        :return: the held results and the positions which have none
+        """
+        results = []
+        found = set()
+        wanted = {id(t) for t in positions}
+        for priced_positions, priced_results in self.__priced.pop(state, ()):
+            indices = [i for i, t in enumerate(priced_positions) if id(t) in wanted]
+            if indices:
+                found.update(id(priced_positions[i]) for i in indices)
+                results.append(priced_results if len(indices) == len(priced_positions) else
+                               priced_results.subset([PortfolioPath(i) for i in indices]))
+
+        self.__priced_ids.pop(state, None)
+        return results, [t for t in positions if id(t) not in found]
+
+
 class GenericEngine(BacktestBaseEngine):
 
     def __init__(self, action_impl_map={}):
@@ -329,6 +403,8 @@ class GenericEngine(BacktestBaseEngine):
 
         logging.info('Scaling semi-deterministic triggers and actions and calculating path dependent triggers '
                      'and actions')
+        lookahead = PricingLookahead(strategy_pricing_dates, tuple(risks))
+        lookahead_due = True
         for d in strategy_pricing_dates:
             logging.info(f'{d}: Processing triggers and actions')
             # path dependent
@@ -337,31 +413,44 @@ class GenericEngine(BacktestBaseEngine):
                     if trigger.has_triggered(d, backtest):
                         for action in trigger.actions:
                             self.get_action_handler(action).apply_action(d, backtest)
+                            lookahead_due = True
                 else:
                     for action in trigger.actions:
                         if action.calc_type == CalcType.path_dependent:
                             if trigger.has_triggered(d, backtest):
                                 self.get_action_handler(action).apply_action(d, backtest)
-            # test to see if new trades have been added and calc
-            port = []
-            for t in backtest.portfolio_dict[d]:
-                if t.name not in backtest.results[d].portfolio:
-                    port.append(t)
-
-            with PricingContext(is_batch=True, csa_term=csa_term, show_progress=show_progress,
-                                visible_to_gs=visible_to_gs):
-                if len(port):
-                    with PricingContext(pricing_date=d):
-                        results = Portfolio(port).calc(tuple(risks))
-
-                for sp in backtest.scaling_portfolios[d]:
-                    if sp.results is None:
+                                lookahead_due = True
+            # test to see if new trades have been added and calc, using any results priced ahead
+            held_results, port = lookahead.take(d, lookahead.unpriced(backtest, d))
+            scaling = [sp for sp in backtest.scaling_portfolios[d] if sp.results is None]
+
+            # price positions already scheduled on later dates in the same batch
+            future_port = lookahead.unscheduled(backtest, d) if lookahead_due else {}
+            lookahead_due = False
+
+            if len(port) or len(scaling) or len(future_port):
+                with PricingContext(is_batch=True, csa_term=csa_term, show_progress=show_progress,
+                                    visible_to_gs=visible_to_gs):
+                    backtest.calc_calls += 1
+                    if len(port):
+                        with PricingContext(pricing_date=d):
+                            backtest.calculations += len(port) * len(risks)
+                            results = Portfolio(port).calc(tuple(risks))
+
+                    for sp in scaling:
                         with HistoricalPricingContext(dates=sp.dates):
                             backtest.calculations += len(risks) * len(sp.dates)
                             port_sp = sp.trade if isinstance(sp.trade, Portfolio) else Portfolio([sp.trade])
                             sp.results = port_sp.calc(tuple(risks))
 
+                    backtest.calculations += lookahead.price(future_port)
+            elif len(held_results):
+                backtest.calc_calls_saved += 1
+
             # results should be added outside of pricing context and not in the same call as valuating them
+            for held in held_results:
+                backtest.add_results(d, held)
+
             if len(port):
                 backtest.add_results(d, results)
 
@@ -387,6 +476,7 @@ class GenericEngine(BacktestBaseEngine):
                         for day in p.dates:
                             # add scaled hedge position to portfolio for day. NOTE this adds leaves, not the portfolio
                             backtest.portfolio_dict[day] += copy.deepcopy(scaled_portfolio_position)
+                        lookahead_due = True
 
                         # now apply scaled portfolio to cash payments
                         for d, payments in backtest.cash_payments.items():
@@ -405,6 +495,8 @@ class GenericEngine(BacktestBaseEngine):
                             backtest.add_results(day, p.results[day] * -scaling_factor)
                             backtest.portfolio_dict[day] += Portfolio(scaled_trade)
 
+        logging.info(f'Path dependent pricing made {backtest.calc_calls_saved} fewer calls by pricing ahead')
+
         logging.info('Calculating and scaling newly added portfolio positions')
         # test to see if new trades have been added and calc
         with PricingContext(is_batch=True, show_progress=show_progress, csa_term=csa_term, visible_to_gs=visible_to_gs):
@@ -0,0 +1,161 @@
+"""
+Copyright 2021 Goldman Sachs.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+import itertools
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Mapping, Optional, Type
+
+import pandas as pd
+
+from gs_quant.backtests.backtest_engine import BacktestBaseEngine
+from gs_quant.backtests.backtest_objects import BackTest, PredefinedAssetBacktest
+from gs_quant.backtests.equity_vol_engine import BacktestResult, EquityVolEngine
+from gs_quant.backtests.generic_engine import GenericEngine
+from gs_quant.backtests.predefined_asset_engine import PredefinedAssetEngine
+from gs_quant.backtests.strategy import Strategy
+from gs_quant.context_base import nullcontext
+from gs_quant.markets.core import SharedCalculations
+from gs_quant.session import GsSession
+
+_logger = logging.getLogger(__name__)
+
+SWEEP_COLUMNS = ['date', 'measure', 'value']
+
+
+def _tidy(result) -> pd.DataFrame:
+    """
+    The results of a backtest as rows of date, measure and value
+    """
+    if isinstance(result, BackTest):
+        summary = result.result_summary
+        frames = [pd.DataFrame({'date': summary.index, 'measure': str(column), 'value': summary[column].values})
+                  for column in summary.columns]
+    elif isinstance(result, PredefinedAssetBacktest):
+        performance = result.performance
+        frames = [pd.DataFrame({'date': performance.index, 'measure': 'Performance', 'value': performance.values})]
+    elif isinstance(result, BacktestResult):
+        frames = []
+        for risk in result._results.risks:
+            records = pd.DataFrame.from_records(risk.timeseries, columns=['date', 'value'])
+            frames.append(pd.DataFrame({'date': pd.to_datetime(records['date']), 'measure': risk.name,
+                                        'value': records['value'].values}))
+    else:
+        raise RuntimeError(f'Cannot tabulate backtest results of type {type(result).__name__}')
+
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=SWEEP_COLUMNS)
+
+
+def _run_variant(engine: BacktestBaseEngine, strategy_builder: Callable[..., Strategy], parameters: dict,
+                 args: tuple, kwargs: dict, session: Optional[GsSession] = None) -> pd.DataFrame:
+    # the caller's session, for the duration of this variant only
+    with session if session is not None else nullcontext():
+        result = engine.run_backtest(strategy_builder(**parameters), *args, **kwargs)
+    return _tidy(result)
+
+
+class BacktestSweep:
+    """
+    Runs variants of a strategy over a grid of parameters
+
+    Each combination of parameters is passed to the strategy builder, and the resulting strategies are backtested
+    concurrently:
+
+    - with the PredefinedAssetEngine, on a pool of processes. The strategy builder must then be picklable, e.g. a
+      module-level function
+    - with the GenericEngine, on a pool of threads. Calculations which variants share, of the same risk measure on
+      the same date for instruments with the same contents, are requested once for the whole sweep
+    - with the EquityVolEngine, as concurrent requests
+
+    **Examples**
+
+    >>> from gs_quant.backtests.sweep import BacktestSweep
+    >>>
+    >>> def build(tenor: str, notional: float) -> Strategy:
+    >>>     swap = IRSwap('Pay', tenor, 'USD', notional_amount=notional)
+    >>>     return Strategy(None, PeriodicTrigger(..., actions=AddTradeAction(swap, '1m')))
+    >>>
+    >>> sweep = BacktestSweep(build, {'tenor': ['5y', '10y'], 'notional': [1e6, 1e7]}, GenericEngine())
+    >>> results = sweep.run(start=dt.date(2021, 1, 4), end=dt.date(2021, 6, 30), show_progress=False)
+    """
+
+    def __init__(self,
+                 strategy_builder: Callable[..., Strategy],
+                 parameters: Mapping[str, Iterable],
+                 engine: Optional[BacktestBaseEngine] = None):
+        """
+        :param strategy_builder: a function building a strategy from keyword arguments, one for each parameter
+        :param parameters: the values of each parameter. The sweep runs every combination
+        :param engine: the engine with which to run the backtests. Defaults to the GenericEngine
+        """
+        clashes = set(parameters).intersection(SWEEP_COLUMNS)
+        if clashes:
+            raise ValueError(f'Parameter names {sorted(clashes)} clash with the result columns {SWEEP_COLUMNS}')
+
+        self.__strategy_builder = strategy_builder
+        self.__parameter_names = list(parameters)
+        self.__variants = [dict(zip(self.__parameter_names, values))
+                           for values in itertools.product(*(list(v) for v in parameters.values()))]
+        self.__engine = engine if engine is not None else GenericEngine()
+
+    @property
+    def variants(self) -> List[dict]:
+        return [dict(v) for v in self.__variants]
+
+    @property
+    def engine(self) -> BacktestBaseEngine:
+        return self.__engine
+
+    def run(self, *args, max_workers: Optional[int] = None, **kwargs) -> pd.DataFrame:
+        """
+        Run the backtest of every variant
+
+        :param args: positional arguments to the engine's run_backtest, after the strategy
+        :param max_workers: the maximum number of variants to run at once. 1 runs them in turn in this thread
+        :param kwargs: keyword arguments to the engine's run_backtest
+        :return: a dataframe with a column for each parameter, and date, measure and value columns
+        """
+        if not self.__variants:
+            return pd.DataFrame(columns=self.__parameter_names + SWEEP_COLUMNS)
+
+        session = GsSession.current if GsSession.current_is_set else None
+        run_args = [(self.__engine, self.__strategy_builder, v, args, kwargs) for v in self.__variants]
+
+        if isinstance(self.__engine, PredefinedAssetEngine):
+            results = self.__map(ProcessPoolExecutor, max_workers, run_args)
+        elif isinstance(self.__engine, (GenericEngine, EquityVolEngine)):
+            with SharedCalculations():
+                SharedCalculations.reset_stats()
+                results = self.__map(ThreadPoolExecutor, max_workers, [a + (session,) for a in run_args])
+                _logger.info(f'{SharedCalculations.shared_count()} calculations shared between variants')
+        else:
+            raise RuntimeError(f'Cannot sweep backtests on {type(self.__engine).__name__}')
+
+        frames = []
+        for variant, result in zip(self.__variants, results):
+            for name, value in variant.items():
+                result[name] = [value] * len(result)
+            frames.append(result[self.__parameter_names + SWEEP_COLUMNS])
+
+        return pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def __map(executor_type: Type[Executor], max_workers: Optional[int], run_args: list) -> list:
+        if max_workers == 1:
+            return [_run_variant(*a) for a in run_args]
+
+        with executor_type(max_workers=max_workers) as executor:
+            futures = [executor.submit(_run_variant, *a) for a in run_args]
+            return [f.result() for f in futures]
@@ -14,11 +14,28 @@ specific language governing permissions and limitations
 under the License.
 """
 
-import threading
+from contextvars import ContextVar
+from typing import Any
 
 from gs_quant.errors import MqUninitialisedError
 
-thread_local = threading.local()
+# The state of all contexts, copied on write. Each thread and each asyncio task has its own, so that contexts entered
+# in one task are not seen by those running concurrently with it
+context_state = ContextVar('context_state', default={})
+
+
+def _get_state(key: str, default: Any = None) -> Any:
+    return context_state.get().get(key, default)
+
+
+def _set_state(key: str, value: Any):
+    state = dict(context_state.get())
+    if value is None:
+        state.pop(key, None)
+    else:
+        state[key] = value
+
+    context_state.set(state)
 
 
 class ContextMeta(type):
@@ -37,7 +54,7 @@ class ContextMeta(type):
 
     @property
     def path(cls) -> tuple:
-        return getattr(thread_local, cls.__path_key, ())
+        return _get_state(cls.__path_key, ())
 
     @property
     def current(cls):
@@ -53,7 +70,7 @@ class ContextMeta(type):
 
     @current.setter
     def current(cls, current):
-        setattr(thread_local, cls.__path_key, (current,))
+        _set_state(cls.__path_key, (current,))
 
     @property
     def current_is_set(cls) -> bool:
@@ -61,20 +78,20 @@ class ContextMeta(type):
 
     @property
     def __default(cls):
-        default = getattr(thread_local, cls.__default_key, None)
+        default = _get_state(cls.__default_key)
         if default is None:
             default = cls.default_value()
             if default is not None:
-                setattr(thread_local, cls.__default_key, default)
+                _set_state(cls.__default_key, default)
 
         return default
 
     def push(cls, context):
-        setattr(thread_local, cls.__path_key, (context,) + cls.path)
+        _set_state(cls.__path_key, (context,) + cls.path)
 
     def pop(cls):
         path = cls.path
-        setattr(thread_local, cls.__path_key, path[1:])
+        _set_state(cls.__path_key, path[1:])
         return path[0]
 
 
@@ -82,7 +99,7 @@ class ContextBase(metaclass=ContextMeta):
 
     def __enter__(self):
         self._cls.push(self)
-        setattr(thread_local, self.__entered_key, True)
+        _set_state(self.__entered_key, True)
         self._on_enter()
         return self
 
@@ -91,7 +108,7 @@ class ContextBase(metaclass=ContextMeta):
             self._on_exit(exc_type, exc_val, exc_tb)
         finally:
             self._cls.pop()
-            setattr(thread_local, self.__entered_key, False)
+            _set_state(self.__entered_key, None)
 
     @property
     def __entered_key(self) -> str:
@@ -117,7 +134,7 @@ class ContextBase(metaclass=ContextMeta):
 
     @property
     def is_entered(self) -> bool:
-        return getattr(thread_local, self.__entered_key, False)
+        return _get_state(self.__entered_key, False)
 
     def _on_enter(self):
         pass
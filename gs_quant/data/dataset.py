@@ -16,7 +16,7 @@ under the License.
 import datetime as dt
 import webbrowser
 from enum import Enum
-from typing import Iterable, Optional, Union, List, Dict
+from typing import Iterable, Iterator, Optional, Union, List, Dict
 from urllib.parse import quote
 import re
 
@@ -101,8 +101,9 @@ class Dataset:
             since: Optional[dt.datetime] = None,
             fields: Optional[Iterable[Union[str, Fields]]] = None,
             asset_id_type: str = None,
+            chunked: bool = False,
             **kwargs
-    ) -> pd.DataFrame:
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
         """
         Get data for the given range and parameters
 
@@ -111,6 +112,8 @@ class Dataset:
         :param as_of: Request data as_of
         :param since: Request data since
         :param fields: DataSet fields to include
+        :param chunked: Return an iterator of DataFrames, one per page of results, instead of a single DataFrame.
+            See :meth:`iter_data`
         :param kwargs: Extra query arguments, e.g. ticker='EDZ19'
         :return: A Dataframe of the requested data
 
@@ -122,10 +125,64 @@ class Dataset:
         >>> weather = Dataset('WEATHER')
         >>> weather_data = weather.get_data(dt.date(2016, 1, 15), dt.date(2016, 1, 16), city=('Boston', 'Austin'))
         """
+        if chunked:
+            return self.iter_data(start, end, as_of, since, fields, asset_id_type, **kwargs)
+
+        query = self.__build_data_query(start, end, as_of, since, fields, **kwargs)
+        data = self.provider.query_data(query, self.id, asset_id_type=asset_id_type)
+
+        return self.provider.construct_dataframe_with_types(self.id, data)
 
+    def iter_data(
+            self,
+            start: Optional[Union[dt.date, dt.datetime]] = None,
+            end: Optional[Union[dt.date, dt.datetime]] = None,
+            as_of: Optional[dt.datetime] = None,
+            since: Optional[dt.datetime] = None,
+            fields: Optional[Iterable[Union[str, Fields]]] = None,
+            asset_id_type: str = None,
+            **kwargs
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Iterate over data for the given range and parameters, one typed DataFrame per page of results
+
+        :param start: Requested start date/datetime for data
+        :param end: Requested end date/datetime for data
+        :param as_of: Request data as_of
+        :param since: Request data since
+        :param fields: DataSet fields to include
+        :param kwargs: Extra query arguments, e.g. ticker='EDZ19' or page_size=10000
+        :return: An iterator of Dataframes of the requested data
+
+        Pages are requested as the iterator is consumed, so large histories can be written out or aggregated without
+        holding the whole result in memory. Empty pages are skipped.
+
+        **Examples**
+
+        >>> from gs_quant.data import Dataset
+        >>> import datetime as dt
+        >>>
+        >>> weather = Dataset('WEATHER')
+        >>> for chunk in weather.iter_data(dt.date(2016, 1, 15), dt.date(2016, 1, 16), city=('Boston', 'Austin')):
+        >>>     chunk.to_parquet(...)
+        """
+        query = self.__build_data_query(start, end, as_of, since, fields, **kwargs)
+        pages = self.provider.query_data_pages(query, self.id, asset_id_type=asset_id_type)
+
+        return (self.provider.construct_dataframe_with_types(self.id, data) for data in pages if len(data))
+
+    def __build_data_query(
+            self,
+            start: Optional[Union[dt.date, dt.datetime]],
+            end: Optional[Union[dt.date, dt.datetime]],
+            as_of: Optional[dt.datetime],
+            since: Optional[dt.datetime],
+            fields: Optional[Iterable[Union[str, Fields]]],
+            **kwargs
+    ):
         field_names = None if fields is None else list(map(lambda f: f if isinstance(f, str) else f.value, fields))
 
-        query = self.provider.build_query(
+        return self.provider.build_query(
             start=start,
             end=end,
             as_of=as_of,
@@ -133,9 +190,6 @@ class Dataset:
             fields=field_names,
             **kwargs
         )
-        data = self.provider.query_data(query, self.id, asset_id_type=asset_id_type)
-
-        return self.provider.construct_dataframe_with_types(self.id, data)
 
     def get_data_series(
             self,
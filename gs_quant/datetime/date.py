@@ -16,6 +16,7 @@ under the License.
 
 import datetime as dt
 import numpy as np
+import pandas as pd
 import calendar as cal
 from enum import Enum, IntEnum
 from pytz import timezone
@@ -300,3 +301,67 @@ def day_count_fraction(
         return 1
     else:
         raise ValueError('Unknown day count convention: ' + convention.value)
+
+
+def _leap_days_through(dates: pd.DatetimeIndex) -> np.ndarray:
+    # number of 29Febs on or before each date
+    years = dates.year.values.astype(np.int64)
+    prior = years - 1
+    leap = (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+    past_feb_29 = (dates.month.values > 2) | ((dates.month.values == 2) & (dates.day.values == 29))
+    return prior // 4 - prior // 100 + prior // 400 + (leap & past_feb_29)
+
+
+def consecutive_day_count_fractions(
+        dates: Union[pd.DatetimeIndex, Iterable[dt.date]],
+        convention: DayCountConvention = DayCountConvention.ACTUAL_360,
+        frequency: PaymentFrequency = PaymentFrequency.MONTHLY
+) -> np.ndarray:
+    """
+    Compute day count fractions between consecutive dates
+
+    :param dates: dates, in order
+    :param convention: day count convention
+    :param frequency: payment frequency of instrument
+    :return: array of day count fractions between each date and the next, one shorter than dates
+
+    **Usage**
+
+    Vectorised equivalent of :func:`day_count_fraction` applied to each consecutive pair of *dates*
+
+    **Examples**
+
+    Compute day count fractions between month ends using Actual/360 convention:
+
+    >>> dates = pd.date_range('2020-01-31', periods=12, freq='M')
+    >>> consecutive_day_count_fractions(dates, DayCountConvention.ACTUAL_360)
+
+    **See also**
+
+    :func:`day_count_fraction`
+    """
+    dates = pd.DatetimeIndex(dates)
+    days = (np.diff(dates.values) // np.timedelta64(1, 'D')).astype(np.double)
+
+    if convention == DayCountConvention.ACTUAL_360:
+        return days / 360
+    elif convention == DayCountConvention.ACTUAL_364:
+        return days / 364
+    elif convention == DayCountConvention.ACTUAL_365F:
+        return days / 365
+    elif convention == DayCountConvention.ACTUAL_365L:
+        if frequency == PaymentFrequency.ANNUALLY:
+            # a 29Feb after the start date and on or before the end date, counting whole days from the start
+            starts = dates[:-1].normalize()
+            ends = starts + pd.to_timedelta(days, unit='D')
+            feb_29 = _leap_days_through(ends) > _leap_days_through(starts)
+        else:
+            years = dates.year.values[1:]
+            feb_29 = (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+        return days / np.where(feb_29, 366, 365)
+    elif convention == DayCountConvention.ACTUAL_365_25:
+        return days / 365.25
+    elif convention == DayCountConvention.ONE_ONE:
+        return np.ones(len(days))
+    else:
+        raise ValueError('Unknown day count convention: ' + convention.value)
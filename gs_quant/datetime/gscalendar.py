@@ -14,13 +14,192 @@ specific language governing permissions and limitations
 under the License.
 """
 import datetime as dt
-from typing import Tuple, Union
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from enum import Enum
+from typing import Dict, Iterable, Optional, Tuple, Union
 
 import numpy as np
+import pandas as pd
 
-from gs_quant.data import Dataset
 from gs_quant.common import PricingLocation
 
+_logger = logging.getLogger(__name__)
+
+CalendarKey = Tuple[str, str]
+
+
+class HolidayStore:
+    """
+    Holiday calendars, shared by GsCalendar and relative date rules
+
+    Each exchange or currency calendar is fetched once, for all dates between DATE_LOW_LIMIT and DATE_HIGH_LIMIT, and
+    held as a sorted datetime64[D] array. If a path is configured, calendars are also saved there, a file each, so that
+    other processes and later sessions load them from disk rather than fetch them. Calendars are fetched again once
+    older than max_age
+
+    **Examples**
+
+    Share calendars between the processes on a host, refreshing them daily:
+
+    >>> from gs_quant.datetime.gscalendar import HolidayStore
+    >>>
+    >>> HolidayStore.configure(path='~/.gs_quant/holidays', max_age=86400)
+    """
+    DATE_LOW_LIMIT = dt.date(1952, 1, 1)
+    DATE_HIGH_LIMIT = dt.date(2052, 12, 31)
+    DATASETS = {'exchange': 'HOLIDAY', 'currency': 'HOLIDAY_CURRENCY'}
+
+    __path: Optional[str] = None
+    __max_age: Optional[float] = 86400
+    __calendars: Dict[CalendarKey, Tuple[np.ndarray, float]] = {}
+    __business_day_calendars: Dict[tuple, np.busdaycalendar] = {}
+    __lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, path: Optional[str] = None, max_age: Optional[float] = 86400):
+        """
+        Configure the store. Calendars already loaded are discarded
+
+        :param path: directory in which to save calendars, e.g. '~/.gs_quant/holidays'. None to keep them in memory only
+        :param max_age: age in seconds after which a calendar is fetched again. None never to fetch again
+        """
+        if max_age is not None and max_age < 0:
+            raise ValueError('max_age must not be negative')
+
+        cls.__path = os.path.expanduser(path) if path else None
+        cls.__max_age = max_age
+        cls.clear()
+
+    @classmethod
+    def clear(cls):
+        """
+        Discard the calendars loaded in memory. Saved calendars are kept
+        """
+        with cls.__lock:
+            cls.__calendars.clear()
+            cls.__business_day_calendars.clear()
+
+    @classmethod
+    def holidays(cls,
+                 exchanges: Iterable[Union[str, Enum]] = (),
+                 currencies: Iterable[Union[str, Enum]] = ()) -> np.ndarray:
+        """
+        The union of the holidays of exchange and currency calendars
+
+        :param exchanges: exchange calendars, from the HOLIDAY dataset
+        :param currencies: currency calendars, from the HOLIDAY_CURRENCY dataset
+        :return: sorted datetime64[D] array
+        """
+        keys = cls.__keys(exchanges, currencies)
+        calendars = [cls.__calendar(key) for key in keys]
+        if not calendars:
+            return np.array([], dtype='datetime64[D]')
+
+        return calendars[0] if len(calendars) == 1 else np.unique(np.concatenate(calendars))
+
+    @classmethod
+    def business_day_calendar(cls,
+                              exchanges: Iterable[Union[str, Enum]] = (),
+                              currencies: Iterable[Union[str, Enum]] = (),
+                              week_mask: str = '1111100') -> np.busdaycalendar:
+        """
+        A business day calendar of the holidays of exchange and currency calendars, built once for each combination of
+        calendars and week mask
+        """
+        keys = cls.__keys(exchanges, currencies)
+        # reloads stale calendars, discarding their business day calendars
+        holidays = cls.holidays(exchanges, currencies)
+        cache_key = (keys, week_mask)
+        with cls.__lock:
+            calendar = cls.__business_day_calendars.get(cache_key)
+            if calendar is None:
+                calendar = np.busdaycalendar(weekmask=week_mask, holidays=holidays)
+                cls.__business_day_calendars[cache_key] = calendar
+
+        return calendar
+
+    @staticmethod
+    def __keys(exchanges: Iterable[Union[str, Enum]], currencies: Iterable[Union[str, Enum]]) -> Tuple[CalendarKey]:
+        codes = [('exchange', c) for c in exchanges or ()] + [('currency', c) for c in currencies or ()]
+        return tuple(sorted({(field, c.value if isinstance(c, Enum) else str(c)) for field, c in codes}))
+
+    @classmethod
+    def __is_stale(cls, loaded: float) -> bool:
+        return cls.__max_age is not None and time.time() - loaded > cls.__max_age
+
+    @classmethod
+    def __calendar(cls, key: CalendarKey) -> np.ndarray:
+        with cls.__lock:
+            entry = cls.__calendars.get(key)
+        if entry is not None and not cls.__is_stale(entry[1]):
+            return entry[0]
+
+        entry = cls.__load(key)
+        if entry is None:
+            entry = (cls.__fetch(key), time.time())
+            cls.__save(key, entry[0])
+
+        with cls.__lock:
+            cls.__calendars[key] = entry
+            for cache_key in [k for k in cls.__business_day_calendars if key in k[0]]:
+                del cls.__business_day_calendars[cache_key]
+
+        return entry[0]
+
+    @classmethod
+    def __fetch(cls, key: CalendarKey) -> np.ndarray:
+        from gs_quant.data import Dataset
+
+        field, code = key
+        data = Dataset(cls.DATASETS[field]).get_data(start=cls.DATE_LOW_LIMIT, end=cls.DATE_HIGH_LIMIT,
+                                                     **{field: [code]})
+        if data.empty:
+            return np.array([], dtype='datetime64[D]')
+
+        return np.unique(pd.to_datetime(data.index).values.astype('datetime64[D]'))
+
+    @classmethod
+    def __file(cls, key: CalendarKey) -> Optional[str]:
+        if cls.__path is None:
+            return None
+
+        field, code = key
+        return os.path.join(cls.__path, f'{cls.DATASETS[field]}_{re.sub(r"[^A-Za-z0-9_-]", "_", code)}.npy')
+
+    @classmethod
+    def __load(cls, key: CalendarKey) -> Optional[Tuple[np.ndarray, float]]:
+        path = cls.__file(key)
+        try:
+            if path is None or cls.__is_stale(os.path.getmtime(path)):
+                return None
+
+            return np.load(path, allow_pickle=False).astype('datetime64[D]'), os.path.getmtime(path)
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                _logger.warning(f'Unable to load holiday calendar {key[1]} from {path}: {e}')
+            return None
+
+    @classmethod
+    def __save(cls, key: CalendarKey, holidays: np.ndarray):
+        path = cls.__file(key)
+        if path is None:
+            return
+
+        try:
+            # write then rename, so that other processes never load a partial file
+            os.makedirs(cls.__path, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=cls.__path, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, holidays, allow_pickle=False)
+            os.replace(temp_path, path)
+        except OSError as e:
+            _logger.warning(f'Unable to save holiday calendar {key[1]} to {path}: {e}')
+
 
 class GsCalendar:
 
@@ -35,9 +214,6 @@ class GsCalendar:
             calendars = (calendars,)
 
         self.__calendars = calendars
-        self.__holidays = set()
-        self.__holidays_loaded = False
-        self.__business_day_calendars = {}
 
     @staticmethod
     def get(calendars: Union[str, Tuple]):
@@ -48,22 +224,16 @@ class GsCalendar:
 
     @staticmethod
     def reset():
-        GsCalendar.__CALENDAR_CACHE = set()
+        GsCalendar.__CALENDAR_CACHE = {}
+        HolidayStore.clear()
 
     def calendars(self) -> Tuple:
         return self.__calendars
 
     @property
     def holidays(self) -> set:
-        if self.__calendars and not self.__holidays_loaded:
-            dataset = Dataset(Dataset.GS.HOLIDAY)
-            data = dataset.get_data(exchange=self.__calendars, start=self.DATE_LOW_LIMIT, end=self.DATE_HIGH_LIMIT)
-            if not data.empty:
-                self.__holidays.update(data.index.values.astype('datetime64[D]'))
-            self.__holidays_loaded = True
-
-        return self.__holidays
+        return set(HolidayStore.holidays(exchanges=self.__calendars))
 
     def business_day_calendar(self, week_mask: str = None) -> np.busdaycalendar:
-        return self.__business_day_calendars.setdefault(week_mask, np.busdaycalendar(
-            weekmask=week_mask or self.DEFAULT_WEEK_MASK, holidays=tuple(self.holidays)))
+        return HolidayStore.business_day_calendar(exchanges=self.__calendars,
+                                                  week_mask=week_mask or self.DEFAULT_WEEK_MASK)
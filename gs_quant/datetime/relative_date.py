@@ -17,9 +17,11 @@ under the License.
 import logging
 from copy import copy
 from datetime import date, datetime
-from typing import Union, Optional, List
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
 
-from pandas import Timestamp
+import numpy as np
+from pandas import DatetimeIndex, Timestamp
 
 import gs_quant.datetime.rules as rules
 from gs_quant.errors import MqValueError
@@ -30,6 +32,134 @@ from gs_quant.target.common import Currency
 _logger = logging.getLogger(__name__)
 
 
+class _RuleStep(NamedTuple):
+    rule: str
+    rule_class: type
+    number: int
+
+
+def _split_rules(rule: str) -> List[str]:
+    rule_list = []
+    current_rule = ''
+    if not len(rule):
+        raise MqValueError('Invalid Rule ""')
+    current_alpha = rule[0].isalpha()
+    for c in rule:
+        is_alpha = c.isalpha()
+        if current_alpha and not is_alpha:
+            if current_rule.startswith('+'):
+                rule_list.append(current_rule[1:])
+            else:
+                rule_list.append(current_rule)
+            current_rule = ''
+            current_alpha = False
+        if is_alpha:
+            current_alpha = True
+        current_rule += c
+    if current_rule.startswith('+'):
+        rule_list.append(current_rule[1:])
+    else:
+        rule_list.append(current_rule)
+    return rule_list
+
+
+def _parse_rule(rule: str) -> _RuleStep:
+    if rule.startswith('-'):
+        index = 1
+        while index != len(rule) and rule[index].isdigit():
+            index += 1
+        number = int(rule[1:index]) * -1 if index < len(rule) else 0
+        rule_str = rule[index]
+    else:
+        index = 0
+        if not rule[0].isdigit():
+            rule_str = rule
+            number = 0
+        else:
+            while index != len(rule) and rule[index].isdigit():
+                index += 1
+            if index < len(rule):
+                number = int(rule[0:index])
+                rule_str = rule[index]
+            else:
+                rule_str = rule
+                number = 0
+
+    if not rule_str:
+        raise MqValueError(f'Invalid rule "{rule}"')
+
+    rule_class = getattr(rules, f'{rule_str}Rule', None)
+    if rule_class is None:
+        raise NotImplementedError(f'Rule {rule} not implemented')
+
+    return _RuleStep(rule, rule_class, number)
+
+
+@lru_cache(maxsize=1024)
+def _compile_rule(rule: str) -> Tuple[_RuleStep, ...]:
+    """
+    Parse a rule string into the class and number of each of its rules. Rule strings are compiled once and cached, as
+    the same few are applied to many dates
+    """
+    return tuple(_parse_rule(r) for r in _split_rules(rule))
+
+
+def _to_datetime64(dates: Iterable[date]) -> np.ndarray:
+    if isinstance(dates, DatetimeIndex):
+        return (dates.tz_localize(None) if dates.tz is not None else dates).values.astype('datetime64[D]')
+    if isinstance(dates, np.ndarray) and dates.dtype.kind == 'M':
+        return dates.astype('datetime64[D]')
+    return np.array([d.date() if isinstance(d, (datetime, Timestamp)) else d for d in dates], dtype='datetime64[D]')
+
+
+def apply_rule_to_dates(rule: str,
+                        base_dates: Iterable[date],
+                        currencies: List[Union[Currency, str]] = None,
+                        exchanges: List[Union[ExchangeCode, str]] = None,
+                        holiday_calendar: List[date] = None,
+                        week_mask: str = '1111100',
+                        **kwargs) -> List[date]:
+    """
+    Applies a rule to many base dates at once. The result is as applying RelativeDate(rule, base_date) to each, but
+    the rule is compiled once and each of its rules is applied to all of the dates in one vectorised pass, with one
+    business day calendar
+
+    :param rule: Rule to use
+    :param base_dates: Base dates to apply the rule to
+    :param holiday_calendar: Optional list of date to use for holiday calendar. This parameter takes precedence over
+    currencies/exchanges.
+    :param currencies: List of currency holiday calendars to use. (GS Internal only)
+    :param exchanges: List of exchange holiday calendars to use.
+    :param week_mask: String of seven-element boolean mask indicating valid days. Default weekend is Sat and Sun.
+    :return: list of dt.date, one for each base date
+
+    **Examples**
+
+    Previous business day of each day in January 2021:
+
+    >>> dates = apply_rule_to_dates('-1b', pd.date_range('2021-01-01', '2021-01-31'))
+    """
+    program = _compile_rule(rule)
+    results = _to_datetime64(base_dates)
+    if not len(results):
+        return []
+
+    for step in program:
+        params = dict(number=step.number, week_mask=week_mask, currencies=currencies, exchanges=exchanges,
+                      holiday_calendar=holiday_calendar, usd_calendar=kwargs.get('usd_calendar'))
+        try:
+            handled = step.rule_class(None, **params).handle_dates(results)
+            if handled is None:
+                handled = np.array([step.rule_class(d, results=d, **params).handle() for d in results.tolist()],
+                                   dtype='datetime64[D]')
+        except AttributeError:
+            raise NotImplementedError(f'Rule {step.rule} not implemented')
+
+        results = np.asarray(handled, dtype='datetime64[D]')
+
+    return results.astype(object).tolist()
+
+
 class RelativeDate:
     """
     RelativeDates are objects which provide utilities for getting dates given a relative date rule.
@@ -92,81 +222,35 @@ class RelativeDate:
 
         result = copy(self.base_date)
 
-        for rule in self._get_rules():
-            result = self.__handle_rule(rule, result, week_mask,
+        for step in _compile_rule(self.rule):
+            result = self.__handle_rule(step, result, week_mask,
                                         currencies=currencies, exchanges=exchanges, holiday_calendar=holiday_calendar,
                                         **kwargs)
 
         return result
 
     def _get_rules(self) -> List[str]:
-        rule_list = []
-        current_rule = ''
-        if not len(self.rule):
-            raise MqValueError('Invalid Rule ""')
-        current_alpha = self.rule[0].isalpha()
-        for c in self.rule:
-            is_alpha = c.isalpha()
-            if current_alpha and not is_alpha:
-                if current_rule.startswith('+'):
-                    rule_list.append(current_rule[1:])
-                else:
-                    rule_list.append(current_rule)
-                current_rule = ''
-                current_alpha = False
-            if is_alpha:
-                current_alpha = True
-            current_rule += c
-        if current_rule.startswith('+'):
-            rule_list.append(current_rule[1:])
-        else:
-            rule_list.append(current_rule)
-        return rule_list
+        return _split_rules(self.rule)
 
-    def __handle_rule(self,
-                      rule: str,
+    @staticmethod
+    def __handle_rule(step: _RuleStep,
                       result: date,
                       week_mask: str,
                       currencies: List[Union[Currency, str]] = None,
                       exchanges: List[Union[ExchangeCode, str]] = None,
                       holiday_calendar: List[date] = None,
                       **kwargs) -> date:
-        if rule.startswith('-'):
-            index = 1
-            while index != len(rule) and rule[index].isdigit():
-                index += 1
-            number = int(rule[1:index]) * -1 if index < len(rule) else 0
-            rule_str = rule[index]
-        else:
-            index = 0
-            if not rule[0].isdigit():
-                rule_str = rule
-                number = 0
-            else:
-                while index != len(rule) and rule[index].isdigit():
-                    index += 1
-                if index < len(rule):
-                    number = int(rule[0:index])
-                    rule_str = rule[index]
-                else:
-                    rule_str = rule
-                    number = 0
-
-        if not rule_str:
-            raise MqValueError(f'Invalid rule "{rule}"')
-
         try:
-            rule_class = getattr(rules, f'{rule_str}Rule')
-            return rule_class(result,
-                              results=result,
-                              number=number,
-                              week_mask=week_mask,
-                              currencies=currencies,
-                              exchanges=exchanges,
-                              holiday_calendar=holiday_calendar,
-                              usd_calendar=kwargs.get('usd_calendar')).handle()
+            return step.rule_class(result,
+                                   results=result,
+                                   number=step.number,
+                                   week_mask=week_mask,
+                                   currencies=currencies,
+                                   exchanges=exchanges,
+                                   holiday_calendar=holiday_calendar,
+                                   usd_calendar=kwargs.get('usd_calendar')).handle()
         except AttributeError:
-            raise NotImplementedError(f'Rule {rule} not implemented')
+            raise NotImplementedError(f'Rule {step.rule} not implemented')
 
     def as_dict(self):
         rdate_dict = {'rule': self.rule}
@@ -232,6 +316,10 @@ class RelativeDateSchedule:
         :return: dt.date
         """
 
+        schedule = self.__apply_rule_vectorised(currencies, exchanges, holiday_calendar, week_mask, **kwargs)
+        if schedule is not None:
+            return schedule
+
         i = 1
         schedule = [self.base_date]
         while True:
@@ -245,6 +333,58 @@ class RelativeDateSchedule:
 
         return schedule
 
+    def __apply_rule_vectorised(self,
+                                currencies: List[Union[Currency, str]] = None,
+                                exchanges: List[Union[ExchangeCode, str]] = None,
+                                holiday_calendar: List[date] = None,
+                                week_mask: str = '1111100',
+                                **kwargs) -> Optional[List[date]]:
+        # Parse the rule once, then apply it for many periods at a time, sharing one business day calendar. None if
+        # the schedule must be built a period at a time: rules without a vectorised form, or schedules which do not
+        # move forward from a date to an end date
+        if type(self.base_date) is not date or type(self.end_date) is not date:
+            return None
+
+        try:
+            number = int(self.rule[:-1])
+        except ValueError:
+            return None
+
+        rule_class = getattr(rules, f'{self.rule[-1]}Rule', None)
+        if number <= 0 or rule_class is None:
+            return None
+
+        rule = rule_class(self.base_date,
+                          week_mask=week_mask,
+                          currencies=currencies,
+                          exchanges=exchanges,
+                          holiday_calendar=holiday_calendar,
+                          usd_calendar=kwargs.get('usd_calendar'))
+        end_date = np.datetime64(self.end_date, 'D')
+        periods = [np.array([self.base_date], dtype='datetime64[D]')]
+
+        # each period moves forward by at least number days, so the first block usually reaches the end date
+        first, count = 1, max((self.end_date - self.base_date).days // number, 0) + 2
+        while True:
+            results = rule.handle_schedule(number * np.arange(first, first + count))
+            if results is None:
+                return None
+
+            past_end = results > end_date
+            if past_end.any():
+                periods.append(results[:past_end.argmax()])
+                break
+
+            if len(results) > 1 and results[-1] <= results[0]:
+                # the rule does not move forward with the number of periods
+                return None
+
+            periods.append(results)
+            first += count
+            count *= 2
+
+        return np.concatenate(periods).astype(object).tolist()
+
     def as_dict(self):
         rdate_dict = {'rule': self.rule}
         if self.base_date_passed_in:
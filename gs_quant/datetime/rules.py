@@ -18,21 +18,19 @@ import calendar
 import logging
 from abc import ABC, abstractmethod
 from datetime import date, timedelta
-from typing import List, Union
+from typing import List, Optional, Union
 
-from cachetools import TTLCache
-from cachetools.keys import hashkey
-from dateutil.relativedelta import relativedelta, FR, SA, SU, TH, TU, WE, MO
-from numpy import busday_offset
-from pandas import Series, to_datetime, DataFrame
+from dateutil.relativedelta import relativedelta, weekday as weekday_, FR, SA, SU, TH, TU, WE, MO
+from numpy import array, broadcast, broadcast_arrays, broadcast_to, busday_offset, busdaycalendar, datetime64, \
+    int64, minimum, ndarray, where
+from pandas import to_datetime
 
-from gs_quant.api.gs.data import GsDataApi
+from gs_quant.datetime.gscalendar import HolidayStore
 from gs_quant.markets.securities import ExchangeCode
 from gs_quant.target.common import Currency
 
-DATE_LOW_LIMIT = date(1952, 1, 1)
-DATE_HIGH_LIMIT = date(2052, 12, 31)
-_cache = TTLCache(maxsize=128, ttl=600)
+DATE_LOW_LIMIT = HolidayStore.DATE_LOW_LIMIT
+DATE_HIGH_LIMIT = HolidayStore.DATE_HIGH_LIMIT
 _logger = logging.getLogger(__name__)
 
 
@@ -52,6 +50,7 @@ class RDateRule(ABC):
         self.exchanges = params.get('exchanges')
         self.holiday_calendar = params.get('holiday_calendar')
         self.usd_calendar = params.get('usd_calendar')
+        self.__business_day_calendar = None
         super().__init__()
 
     @abstractmethod
@@ -68,33 +67,15 @@ class RDateRule(ABC):
                 return self.holiday_calendar
             return list(set().union(self.holiday_calendar, self.usd_calendar))
         try:
-            holidays = Series(dtype=object)
-            currencies = [] if self.currencies is None else self.currencies
-
-            cached_data = _cache.get(hashkey(str(currencies), str(self.exchanges)))
-            if cached_data:
-                return cached_data
-            if self.exchanges:
-                exchanges = [x.value if isinstance(x, ExchangeCode) else x.upper() for x in self.exchanges]
-                exchange_query = GsDataApi.build_query(start=DATE_LOW_LIMIT, end=DATE_HIGH_LIMIT,
-                                                       exchange=exchanges)
-                data = GsDataApi.query_data(exchange_query, 'HOLIDAY')
-                holidays = holidays.append(Series(to_datetime(DataFrame(data)['date']).dt.date))
-
-            if len(currencies):
-                currencies = [x.value if isinstance(x, Currency) else x.upper() for x in currencies]
-                currency_query = GsDataApi.build_query(start=DATE_LOW_LIMIT, end=DATE_HIGH_LIMIT,
-                                                       currency=currencies)
-                data = GsDataApi.query_data(currency_query, 'HOLIDAY_CURRENCY')
-                holidays = holidays.append(Series(to_datetime(DataFrame(data)['date']).dt.date))
-
-            holidays = holidays.unique().tolist()
-            _cache[hashkey(str(currencies), str(self.exchanges))] = holidays
-            return holidays
+            return HolidayStore.holidays(**self.__calendar_codes()).astype(object).tolist()
         except Exception as e:
             _logger.warning('Unable to fetch holiday calendar. Try passing your own when applying a rule.', e)
             return []
 
+    def __calendar_codes(self) -> dict:
+        return {'exchanges': [x.value if isinstance(x, ExchangeCode) else x.upper() for x in self.exchanges or ()],
+                'currencies': [x.value if isinstance(x, Currency) else x.upper() for x in self.currencies or ()]}
+
     def _apply_business_days_logic(self, holidays: List[date], offset: int = None, roll: str = 'preceding'):
         if offset is not None:
             offset_to_use = offset
@@ -103,6 +84,88 @@ class RDateRule(ABC):
         return to_datetime(busday_offset(self.result, offset_to_use, roll,
                                          holidays=holidays, weekmask=self.week_mask)).date()
 
+    def handle_schedule(self, numbers: ndarray) -> Optional[ndarray]:
+        """
+        Handle the rule from the same date for each of numbers at once, instead of constructing a rule for each
+        :return: datetime64[D] array of the same length as numbers, or None if the rule has no vectorised form
+        """
+        return self._handle_many(datetime64(self.result, 'D'), numbers)
+
+    def handle_dates(self, dates: ndarray) -> Optional[ndarray]:
+        """
+        Handle the rule with the same number for each of dates at once, instead of constructing a rule for each
+        :return: datetime64[D] array of the same length as dates, or None if the rule has no vectorised form
+        """
+        return self._handle_many(dates.astype('datetime64[D]'), self.number)
+
+    def _handle_many(self, dates: Union[ndarray, datetime64], numbers: Union[ndarray, int]) -> Optional[ndarray]:
+        # Rules which have a vectorised form override this, broadcasting dates (datetime64[D]) against numbers
+        return None
+
+    def _get_business_day_calendar(self) -> busdaycalendar:
+        if self.__business_day_calendar is None:
+            if self.holiday_calendar is None:
+                try:
+                    self.__business_day_calendar = HolidayStore.business_day_calendar(week_mask=self.week_mask,
+                                                                                      **self.__calendar_codes())
+                except Exception as e:
+                    _logger.warning('Unable to fetch holiday calendar. Try passing your own when applying a rule.', e)
+                    self.__business_day_calendar = busdaycalendar(weekmask=self.week_mask)
+            else:
+                self.__business_day_calendar = busdaycalendar(weekmask=self.week_mask, holidays=self._get_holidays())
+        return self.__business_day_calendar
+
+    def _offset_business_days(self, dates: ndarray, offsets: Union[ndarray, int], roll: str) -> ndarray:
+        return busday_offset(dates, offsets, roll, busdaycal=self._get_business_day_calendar())
+
+    def _offset_business_days_by_sign(self, dates: ndarray, numbers: Union[ndarray, int]) -> ndarray:
+        # roll forward for non-positive offsets and back for positive ones
+        dates, numbers = broadcast_arrays(dates, numbers)
+        forward = numbers <= 0
+        results = self._offset_business_days(dates, numbers, 'preceding')
+        if forward.any():
+            results[forward] = self._offset_business_days(dates[forward], numbers[forward], 'forward')
+        return results
+
+    @staticmethod
+    def _add_months(dates: Union[ndarray, datetime64], months: Union[ndarray, int]) -> ndarray:
+        # as relativedelta(months=...), clipping the day to the end of the month
+        month = dates.astype('datetime64[M]') + months
+        month_end = (month + 1).astype('datetime64[D]') - 1
+        return minimum(month.astype('datetime64[D]') + (dates - dates.astype('datetime64[M]').astype('datetime64[D]')),
+                       month_end)
+
+    @staticmethod
+    def _month_starts(dates: Union[ndarray, datetime64]) -> ndarray:
+        return dates.astype('datetime64[M]').astype('datetime64[D]')
+
+    @staticmethod
+    def _month_ends(dates: Union[ndarray, datetime64], months: Union[ndarray, int] = 0) -> ndarray:
+        return (dates.astype('datetime64[M]') + months + 1).astype('datetime64[D]') - 1
+
+    @staticmethod
+    def _weekdays(dates: Union[ndarray, datetime64]) -> ndarray:
+        # Monday is 0, as date.weekday(). 1970-01-01 was a Thursday
+        return (dates.astype('datetime64[D]').astype(int64) + 3) % 7
+
+    def _add_weekdays(self, dates: Union[ndarray, datetime64], numbers: Union[ndarray, int],
+                      weekday: weekday_) -> ndarray:
+        # as relativedelta(weekday=weekday(number)), which treats 0 as 1
+        nth = where(array(numbers) == 0, 1, numbers)
+        days = self._weekdays(dates)
+        jumps = where(nth > 0, (abs(nth) - 1) * 7 + (7 - days + weekday.weekday) % 7,
+                      -((abs(nth) - 1) * 7 + (days - weekday.weekday) % 7))
+        return dates + jumps
+
+    def _add_years_to_weekmask_day(self, dates: Union[ndarray, datetime64], numbers: Union[ndarray, int]) -> ndarray:
+        results = busday_offset(self._add_months(dates, array(numbers) * 12), 0, 'forward', weekmask=self.week_mask)
+        return self._offset_business_days(results, 0, 'preceding')
+
+    def _nth_days_of_month(self, dates: Union[ndarray, datetime64], numbers: Union[ndarray, int],
+                           calendar_day: int) -> ndarray:
+        firsts = self._month_starts(dates)
+        return firsts + (calendar_day - self._weekdays(firsts)) % 7 + (array(numbers) - 1) * 7
+
     def _get_nth_day_of_month(self, calendar_day):
         temp = self.result.replace(day=1)
         adj = (calendar_day - temp.weekday()) % 7
@@ -126,6 +189,13 @@ class ARule(RDateRule):
         result = self.result.replace(month=1, day=1)
         return result + relativedelta(year=self.number)
 
+    def _handle_many(self, dates, numbers):
+        numbers = broadcast_to(numbers, broadcast(dates, numbers).shape)
+        if ((numbers < 0) | (numbers > 9999)).any():
+            raise ValueError('year is out of range')
+        years = where(numbers != 0, numbers - 1970, dates.astype('datetime64[Y]').astype(int64))
+        return years.astype('datetime64[Y]').astype('datetime64[D]')
+
 
 class bRule(RDateRule):
     def handle(self) -> date:
@@ -133,22 +203,34 @@ class bRule(RDateRule):
         roll = 'forward' if self.number <= 0 else 'preceding'
         return self._apply_business_days_logic(holidays, offset=self.number, roll=roll)
 
+    def _handle_many(self, dates, numbers):
+        return self._offset_business_days_by_sign(dates, numbers)
+
 
 class dRule(RDateRule):
     def handle(self) -> date:
         return self.result + relativedelta(days=self.number)
 
+    def _handle_many(self, dates, numbers):
+        return dates + array(numbers)
+
 
 class eRule(RDateRule):
     def handle(self) -> date:
         month_range = calendar.monthrange(self.result.year, self.result.month)
         return self.result.replace(day=month_range[1])
 
+    def _handle_many(self, dates, numbers):
+        return broadcast_to(self._month_ends(dates), broadcast(dates, numbers).shape)
+
 
 class FRule(RDateRule):
     def handle(self) -> date:
         return self._get_nth_day_of_month(calendar.FRIDAY)
 
+    def _handle_many(self, dates, numbers):
+        return self._nth_days_of_month(dates, numbers, calendar.FRIDAY)
+
 
 class gRule(RDateRule):
     def handle(self) -> date:
@@ -156,26 +238,41 @@ class gRule(RDateRule):
         holidays = self._get_holidays()
         return self._apply_business_days_logic(holidays, offset=0)
 
+    def _handle_many(self, dates, numbers):
+        return self._offset_business_days(dates + array(numbers) * 7, 0, 'preceding')
+
 
 class NRule(RDateRule):
     def handle(self) -> date:
         return self.result + relativedelta(weekday=MO(self.number))
 
+    def _handle_many(self, dates, numbers):
+        return self._add_weekdays(dates, numbers, MO)
+
 
 class GRule(RDateRule):
     def handle(self) -> date:
         return self.result + relativedelta(weekday=FR(self.number))
 
+    def _handle_many(self, dates, numbers):
+        return self._add_weekdays(dates, numbers, FR)
+
 
 class IRule(RDateRule):
     def handle(self) -> date:
         return self.result + relativedelta(weekday=SA(self.number))
 
+    def _handle_many(self, dates, numbers):
+        return self._add_weekdays(dates, numbers, SA)
+
 
 class JRule(RDateRule):
     def handle(self) -> date:
         return self.result.replace(day=1)
 
+    def _handle_many(self, dates, numbers):
+        return broadcast_to(self._month_starts(dates), broadcast(dates, numbers).shape)
+
 
 class kRule(RDateRule):
     def handle(self) -> date:
@@ -185,42 +282,66 @@ class kRule(RDateRule):
         holidays = self._get_holidays()
         return self._apply_business_days_logic(holidays, offset=0)
 
+    def _handle_many(self, dates, numbers):
+        return self._add_years_to_weekmask_day(dates, numbers)
+
 
 class mRule(RDateRule):
     def handle(self) -> date:
         self.result = self.result + relativedelta(months=self.number)
         return self._apply_business_days_logic(self._get_holidays(), offset=0, roll='forward')
 
+    def _handle_many(self, dates, numbers):
+        return self._offset_business_days(self._add_months(dates, numbers), 0, 'forward')
+
 
 class MRule(RDateRule):
     def handle(self) -> date:
         return self._get_nth_day_of_month(calendar.MONDAY)
 
+    def _handle_many(self, dates, numbers):
+        return self._nth_days_of_month(dates, numbers, calendar.MONDAY)
+
 
 class PRule(RDateRule):
     def handle(self) -> date:
         return self.result + relativedelta(weekday=SU(self.number))
 
+    def _handle_many(self, dates, numbers):
+        return self._add_weekdays(dates, numbers, SU)
+
 
 class rRule(RDateRule):
     def handle(self) -> date:
         return self.result.replace(month=12, day=31) + relativedelta(years=self.number)
 
+    def _handle_many(self, dates, numbers):
+        return (dates.astype('datetime64[Y]') + array(numbers) + 1).astype('datetime64[D]') - 1
+
 
 class RRule(RDateRule):
     def handle(self) -> date:
         return self._get_nth_day_of_month(calendar.THURSDAY)
 
+    def _handle_many(self, dates, numbers):
+        return self._nth_days_of_month(dates, numbers, calendar.THURSDAY)
+
 
 class SRule(RDateRule):
     def handle(self) -> date:
         return self.result + relativedelta(weekday=TH(self.number))
 
+    def _handle_many(self, dates, numbers):
+        return self._add_weekdays(dates, numbers, TH)
+
 
 class TRule(RDateRule):
     def handle(self) -> date:
         return self._get_nth_day_of_month(calendar.TUESDAY)
 
+    def _handle_many(self, dates, numbers):
+        return self._nth_days_of_month(dates, numbers, calendar.TUESDAY)
+
 
 class uRule(RDateRule):
     def handle(self) -> date:
@@ -228,11 +349,17 @@ class uRule(RDateRule):
         roll = 'forward' if self.number <= 0 else 'preceding'
         return self._apply_business_days_logic(holidays, offset=self.number, roll=roll)
 
+    def _handle_many(self, dates, numbers):
+        return self._offset_business_days_by_sign(dates, numbers)
+
 
 class URule(RDateRule):
     def handle(self) -> date:
         return self.result + relativedelta(weekday=TU(self.number))
 
+    def _handle_many(self, dates, numbers):
+        return self._add_weekdays(dates, numbers, TU)
+
 
 class vRule(RDateRule):
     def handle(self) -> date:
@@ -242,16 +369,25 @@ class vRule(RDateRule):
         holidays = self._get_holidays()
         return self._apply_business_days_logic(holidays, offset=0, roll='backward')
 
+    def _handle_many(self, dates, numbers):
+        return self._offset_business_days(self._month_ends(dates, numbers), 0, 'backward')
+
 
 class VRule(RDateRule):
     def handle(self) -> date:
         return self._get_nth_day_of_month(calendar.SATURDAY)
 
+    def _handle_many(self, dates, numbers):
+        return self._nth_days_of_month(dates, numbers, calendar.SATURDAY)
+
 
 class WRule(RDateRule):
     def handle(self) -> date:
         return self._get_nth_day_of_month(calendar.WEDNESDAY)
 
+    def _handle_many(self, dates, numbers):
+        return self._nth_days_of_month(dates, numbers, calendar.WEDNESDAY)
+
 
 class wRule(RDateRule):
     def handle(self) -> date:
@@ -259,6 +395,9 @@ class wRule(RDateRule):
         holidays = self._get_holidays()
         return self._apply_business_days_logic(holidays)
 
+    def _handle_many(self, dates, numbers):
+        return self._offset_business_days(dates + array(numbers) * 7, numbers, 'preceding')
+
 
 class xRule(RDateRule):
     def handle(self) -> date:
@@ -267,11 +406,18 @@ class xRule(RDateRule):
         holidays = self._get_holidays()
         return self._apply_business_days_logic(holidays, offset=0, roll='backward')
 
+    def _handle_many(self, dates, numbers):
+        return broadcast_to(self._offset_business_days(self._month_ends(dates), 0, 'backward'),
+                            broadcast(dates, numbers).shape)
+
 
 class XRule(RDateRule):
     def handle(self) -> date:
         return self.result + relativedelta(weekday=WE(self.number))
 
+    def _handle_many(self, dates, numbers):
+        return self._add_weekdays(dates, numbers, WE)
+
 
 class yRule(RDateRule):
     def handle(self) -> date:
@@ -281,7 +427,13 @@ class yRule(RDateRule):
         holidays = self._get_holidays()
         return self._apply_business_days_logic(holidays, offset=0)
 
+    def _handle_many(self, dates, numbers):
+        return self._add_years_to_weekmask_day(dates, numbers)
+
 
 class ZRule(RDateRule):
     def handle(self) -> date:
         return self._get_nth_day_of_month(calendar.SUNDAY)
+
+    def _handle_many(self, dates, numbers):
+        return self._nth_days_of_month(dates, numbers, calendar.SUNDAY)
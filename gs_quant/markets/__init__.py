@@ -14,5 +14,6 @@ specific language governing permissions and limitations
 under the License.
 """
 from .core import PricingCache, PricingContext, PositionContext
+from .core import SharedCalculations  # noqa: F401 re-exported
 from .historical import HistoricalPricingContext, BackToTheFuturePricingContext
 from .markets import *
@@ -0,0 +1,247 @@
+"""
+Copyright 2021 Goldman Sachs.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple, Union
+
+import pandas as pd
+
+from gs_quant.base import InstrumentBase, RiskKey
+from gs_quant.json_encoder import JSONEncoder
+from gs_quant.risk import DataFrameWithInfo, FloatWithInfo, SeriesWithInfo, StringWithInfo
+
+CacheKey = Tuple[str, str]
+CacheResult = Union[DataFrameWithInfo, FloatWithInfo, StringWithInfo]
+CacheEntry = Tuple[CacheResult, Optional[float]]
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(json.dumps(value, cls=JSONEncoder, sort_keys=True).encode()).hexdigest()
+
+
+def instrument_cache_key(instrument: InstrumentBase) -> str:
+    """
+    Stable hash of the contents of an instrument, so that equal instruments share results across rebuilds and sessions
+    """
+    return _digest((type(instrument).__name__, instrument.instrument_quantity, instrument.to_dict()))
+
+
+def risk_key_cache_key(risk_key: RiskKey) -> str:
+    """
+    Stable hash of a risk key
+    """
+    provider = getattr(risk_key.provider, '__name__', str(risk_key.provider))
+    return _digest((provider, risk_key.date, risk_key.market, risk_key.params, risk_key.scenario,
+                    risk_key.risk_measure))
+
+
+def _sizeof(result: CacheResult) -> int:
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        # a frame's usage is by column, a series' a single number
+        usage = result.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    return sys.getsizeof(result)
+
+
+class CacheStore(metaclass=ABCMeta):
+    """
+    A store for cached calculation results. Entries may carry an expiry time (seconds since the epoch)
+    """
+
+    def __init__(self):
+        self.evictions = 0
+        self.expirations = 0
+
+    @abstractmethod
+    def get(self, key: CacheKey, risk_key: RiskKey) -> Optional[CacheEntry]:
+        ...
+
+    @abstractmethod
+    def put(self, key: CacheKey, result: CacheResult, expires: Optional[float]):
+        ...
+
+    @abstractmethod
+    def drop(self, instrument_key: str):
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class MemoryCacheStore(CacheStore):
+    """
+    In-memory LRU store, bounded by number of entries and approximate size in bytes
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_size: Optional[int] = None):
+        super().__init__()
+        self.__max_entries = max_entries
+        self.__max_size = max_size
+        self.__entries = OrderedDict()
+        self.__size = 0
+        self.__lock = threading.RLock()
+
+    @property
+    def size(self) -> int:
+        """Approximate size of the cached results in bytes"""
+        return self.__size
+
+    def get(self, key: CacheKey, risk_key: RiskKey) -> Optional[CacheEntry]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+
+            result, size, expires = entry
+            if expires is not None and expires <= time.time():
+                self.__remove(key)
+                self.expirations += 1
+                return None
+
+            self.__entries.move_to_end(key)
+            return result, expires
+
+    def put(self, key: CacheKey, result: CacheResult, expires: Optional[float]):
+        size = _sizeof(result)
+        if self.__max_size is not None and size > self.__max_size:
+            return
+
+        with self.__lock:
+            if key in self.__entries:
+                self.__remove(key)
+
+            self.__entries[key] = (result, size, expires)
+            self.__size += size
+
+            while (self.__max_entries is not None and len(self.__entries) > self.__max_entries) or \
+                    (self.__max_size is not None and self.__size > self.__max_size):
+                _, (_, evicted_size, _) = self.__entries.popitem(last=False)
+                self.__size -= evicted_size
+                self.evictions += 1
+
+    def drop(self, instrument_key: str):
+        with self.__lock:
+            for key in [k for k in self.__entries if k[0] == instrument_key]:
+                self.__remove(key)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__size = 0
+
+    def __remove(self, key: CacheKey):
+        _, size, _ = self.__entries.pop(key)
+        self.__size -= size
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
+class SqliteCacheStore(CacheStore):
+    """
+    Persistent store in a local SQLite database, which survives restarts and may be shared between processes
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        path = os.path.expanduser(path)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.__lock, self.__connection:
+            self.__connection.execute('CREATE TABLE IF NOT EXISTS results (instrument TEXT, risk_key TEXT, '
+                                      'expires REAL, payload BLOB, PRIMARY KEY (instrument, risk_key))')
+            self.__connection.execute('DELETE FROM results WHERE expires <= ?', (time.time(),))
+
+    @staticmethod
+    def __encode(result: CacheResult) -> Optional[bytes]:
+        # Results are stored without their risk key, which is supplied again on lookup
+        if isinstance(result, FloatWithInfo):
+            kind, value = 'float', float(result)
+        elif isinstance(result, StringWithInfo):
+            kind, value = 'str', str(result)
+        elif isinstance(result, DataFrameWithInfo):
+            kind, value = 'frame', pd.DataFrame(result)
+        elif isinstance(result, SeriesWithInfo):
+            kind, value = 'series', pd.Series(result)
+        else:
+            return None
+
+        return pickle.dumps((kind, value, result.unit, result.error, result.request_id))
+
+    @staticmethod
+    def __decode(risk_key: RiskKey, payload: bytes) -> CacheResult:
+        kind, value, unit, error, request_id = pickle.loads(payload)
+        if kind == 'float':
+            return FloatWithInfo(risk_key, value, unit=unit, error=error, request_id=request_id)
+        elif kind == 'str':
+            return StringWithInfo(risk_key, value, unit=unit, error=error, request_id=request_id)
+        elif kind == 'frame':
+            return DataFrameWithInfo(value, risk_key=risk_key, unit=unit, error=error, request_id=request_id)
+        else:
+            return SeriesWithInfo(value, risk_key=risk_key, unit=unit, error=error, request_id=request_id)
+
+    def get(self, key: CacheKey, risk_key: RiskKey) -> Optional[CacheEntry]:
+        with self.__lock:
+            row = self.__connection.execute('SELECT expires, payload FROM results WHERE instrument = ? AND '
+                                            'risk_key = ?', key).fetchone()
+        if row is None:
+            return None
+
+        expires, payload = row
+        if expires is not None and expires <= time.time():
+            with self.__lock, self.__connection:
+                self.__connection.execute('DELETE FROM results WHERE instrument = ? AND risk_key = ?', key)
+            self.expirations += 1
+            return None
+
+        return self.__decode(risk_key, payload), expires
+
+    def put(self, key: CacheKey, result: CacheResult, expires: Optional[float]):
+        payload = self.__encode(result)
+        if payload is None:
+            return
+
+        with self.__lock, self.__connection:
+            self.__connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)', key + (expires, payload))
+
+    def drop(self, instrument_key: str):
+        with self.__lock, self.__connection:
+            self.__connection.execute('DELETE FROM results WHERE instrument = ?', (instrument_key,))
+
+    def clear(self):
+        with self.__lock, self.__connection:
+            self.__connection.execute('DELETE FROM results')
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return self.__connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
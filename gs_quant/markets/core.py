@@ -18,7 +18,8 @@ import datetime as dt
 import logging
 import queue
 import sys
-import weakref
+import threading
+import time
 from abc import ABCMeta
 from concurrent.futures import ThreadPoolExecutor
 from inspect import signature
@@ -27,46 +28,203 @@ from typing import Optional, Union
 
 from tqdm import tqdm
 
+from gs_quant.api.batching import RequestBatcher
 from gs_quant.base import InstrumentBase, RiskKey, Scenario, get_enum_value
 from gs_quant.common import PricingLocation, RiskMeasure
 from gs_quant.context_base import ContextBaseWithDefault
-from gs_quant.datetime.date import business_day_offset, today
-from gs_quant.risk import CompositeScenario, DataFrameWithInfo, ErrorValue, FloatWithInfo, MarketDataScenario, \
-    StringWithInfo
+from gs_quant.datetime.date import business_day_offset, prev_business_date, today
+from gs_quant.risk import CompositeScenario, ErrorValue, MarketDataScenario, ResolvedInstrumentValues, StringWithInfo
 from gs_quant.risk.results import PricingFuture
 from gs_quant.session import GsSession
 from gs_quant.target.common import PricingDateAndMarketDataAsOf
 from gs_quant.target.risk import RiskPosition, RiskRequest, RiskRequestParameters
+from .cache import CacheResult, CacheStore, MemoryCacheStore, SqliteCacheStore, instrument_cache_key, \
+    risk_key_cache_key
 from .markets import CloseMarket, LiveMarket, Market, close_market_date, OverlayMarket, RelativeMarket
 
 _logger = logging.getLogger(__name__)
 
-CacheResult = Union[DataFrameWithInfo, FloatWithInfo, StringWithInfo]
-
 
 class PricingCache(metaclass=ABCMeta):
     """
-    Weakref cache for instrument calcs
+    Cache for instrument calcs, keyed on the contents of the instrument and the risk key
+
+    Results are held in a size-bounded, least-recently-used memory tier and, if configured, a persistent tier which
+    survives restarts. Results on the latest close or on undated markets expire after a time-to-live; results on
+    earlier closes never expire
     """
-    __cache = weakref.WeakKeyDictionary()
+    __memory: CacheStore = MemoryCacheStore(max_size=2 ** 30)
+    __persistent: Optional[CacheStore] = None
+    __ttl: Optional[float] = 3600
+    __hits = 0
+    __misses = 0
+    __lock = threading.Lock()
+
+    @classmethod
+    def configure(cls,
+                  max_entries: Optional[int] = None,
+                  max_size: Optional[int] = 2 ** 30,
+                  path: Optional[str] = None,
+                  ttl: Optional[float] = 3600,
+                  persistent_store: Optional[CacheStore] = None):
+        """
+        Configure the cache. Existing in-memory results are discarded
+
+        :param max_entries: maximum number of results held in memory
+        :param max_size: maximum approximate size in bytes of the results held in memory
+        :param path: path of a SQLite file in which to persist results, e.g. '~/.gs_quant/pricing_cache.db'
+        :param ttl: time-to-live in seconds for results on the latest close or undated markets. None for no expiry
+        :param persistent_store: a custom persistent store, instead of the SQLite store created from path
+
+        **Examples**
+
+        >>> from gs_quant.markets import PricingCache, PricingContext
+        >>>
+        >>> PricingCache.configure(max_size=2 ** 28, path='~/.gs_quant/pricing_cache.db')
+        >>> with PricingContext(use_cache=True):
+        >>>     price = swap.price()
+        """
+        cls.__memory = MemoryCacheStore(max_entries=max_entries, max_size=max_size)
+        cls.__persistent = persistent_store or (SqliteCacheStore(path) if path else None)
+        cls.__ttl = ttl
+        cls.reset_stats()
 
     @classmethod
     def clear(cls):
-        __cache = weakref.WeakKeyDictionary()
+        cls.__memory.clear()
+        if cls.__persistent is not None:
+            cls.__persistent.clear()
 
     @classmethod
     def get(cls, risk_key: RiskKey, instrument: InstrumentBase) -> Optional[CacheResult]:
-        return cls.__cache.get(instrument, {}).get(risk_key)
+        key = (instrument_cache_key(instrument), risk_key_cache_key(risk_key))
+        entry = cls.__memory.get(key, risk_key)
+        if entry is None and cls.__persistent is not None:
+            entry = cls.__persistent.get(key, risk_key)
+            if entry is not None:
+                cls.__memory.put(key, *entry)
+
+        with cls.__lock:
+            if entry is None:
+                cls.__misses += 1
+                return None
+
+            cls.__hits += 1
+            return entry[0]
 
     @classmethod
     def put(cls, risk_key: RiskKey, instrument: InstrumentBase, result: CacheResult):
         if not isinstance(result, ErrorValue) and not isinstance(risk_key.market, LiveMarket):
-            cls.__cache.setdefault(instrument, {})[risk_key] = result
+            key = (instrument_cache_key(instrument), risk_key_cache_key(risk_key))
+            expires = cls.__expiry(risk_key)
+            cls.__memory.put(key, result, expires)
+            if cls.__persistent is not None:
+                cls.__persistent.put(key, result, expires)
 
     @classmethod
     def drop(cls, instrument: InstrumentBase):
-        if instrument in cls.__cache:
-            cls.__cache.pop(instrument)
+        instrument_key = instrument_cache_key(instrument)
+        cls.__memory.drop(instrument_key)
+        if cls.__persistent is not None:
+            cls.__persistent.drop(instrument_key)
+
+    @classmethod
+    def stats(cls) -> dict:
+        """
+        Hit, miss, eviction and expiration counts, along with the number and approximate size of results in memory
+        """
+        stores = (cls.__memory,) if cls.__persistent is None else (cls.__memory, cls.__persistent)
+        return {
+            'hits': cls.__hits,
+            'misses': cls.__misses,
+            'evictions': cls.__memory.evictions,
+            'expirations': sum(s.expirations for s in stores),
+            'entries': len(cls.__memory),
+            'size': cls.__memory.size
+        }
+
+    @classmethod
+    def reset_stats(cls):
+        with cls.__lock:
+            cls.__hits = cls.__misses = 0
+        cls.__memory.evictions = cls.__memory.expirations = 0
+        if cls.__persistent is not None:
+            cls.__persistent.evictions = cls.__persistent.expirations = 0
+
+    @classmethod
+    def __expiry(cls, risk_key: RiskKey) -> Optional[float]:
+        market_date = getattr(risk_key.market, 'date', None)
+        if isinstance(market_date, dt.datetime):
+            market_date = market_date.date()
+        if (isinstance(market_date, dt.date) and market_date < prev_business_date(dt.date.today())) or \
+                cls.__ttl is None:
+            return None
+
+        return time.time() + cls.__ttl
+
+
+class SharedCalculations:
+    """
+    Shares calculations between pricing contexts, across threads, while active
+
+    A calculation of the same risk key for an instrument with the same contents as one already pending or complete in
+    any pricing context is not requested again; its future is shared instead. Resolution is never shared, as the
+    resolved instrument is returned to the caller to modify. Used to run variants of a backtest concurrently
+
+    **Examples**
+
+    >>> from gs_quant.markets.core import SharedCalculations
+    >>>
+    >>> with SharedCalculations():
+    >>>     results = list(executor.map(run_variant, variants))
+    """
+    __futures = {}
+    __active = 0
+    __shared = 0
+    __lock = threading.Lock()
+
+    def __enter__(self):
+        with SharedCalculations.__lock:
+            SharedCalculations.__active += 1
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        with SharedCalculations.__lock:
+            SharedCalculations.__active -= 1
+            if not SharedCalculations.__active:
+                SharedCalculations.__futures.clear()
+
+    @classmethod
+    def is_active(cls) -> bool:
+        return cls.__active > 0
+
+    @classmethod
+    def shared_count(cls) -> int:
+        """
+        The number of calculations which were not requested as they were shared
+        """
+        return cls.__shared
+
+    @classmethod
+    def reset_stats(cls):
+        with cls.__lock:
+            cls.__shared = 0
+
+    @classmethod
+    def share(cls, risk_key: RiskKey, instrument: InstrumentBase, future: PricingFuture) -> PricingFuture:
+        """
+        The future of an equal calculation already registered, else future, which is registered
+        """
+        if not cls.__active or risk_key.risk_measure == ResolvedInstrumentValues:
+            return future
+
+        key = (instrument_cache_key(instrument), risk_key_cache_key(risk_key))
+        with cls.__lock:
+            shared = cls.__futures.setdefault(key, future)
+            if shared is not future:
+                cls.__shared += 1
+
+        return shared
 
 
 class PricingContext(ContextBaseWithDefault):
@@ -199,36 +357,67 @@ class PricingContext(ContextBaseWithDefault):
         else:
             self.__calc()
 
-    def __calc(self):
-        def run_requests(requests_: list, provider_, create_event_loop: bool):
-            if create_event_loop:
-                asyncio.set_event_loop(asyncio.new_event_loop())
+    async def __aenter__(self):
+        return self.__enter__()
 
-            results = queue.Queue()
-            done = False
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_val is None:
+                await self.calc_async()
+        finally:
+            # Nothing is left pending, so exiting the context does not dispatch again
+            self.__exit__(exc_type, exc_val, exc_tb)
 
+    async def calc_async(self):
+        """
+        Calculate the pending requests on the running event loop, without creating threads or event loops per context.
+        Requests are grouped and chunked as they would be on exiting the context
+
+        **Examples**
+
+        >>> from gs_quant.instrument import IRSwap
+        >>>
+        >>> swap = IRSwap('Pay', '10y', 'USD')
+        >>>
+        >>> async with PricingContext():
+        >>>     price_f = swap.dollar_price()
+        >>>
+        >>> price = price_f.result()
+        """
+        async def run_requests(requests_: list, provider_):
             try:
-                with session:
-                    provider_.run(requests_, results, self._max_concurrent, progress_bar, timeout=self.__timeout)
+                results = await provider_.run_async(requests_, self._max_concurrent, progress_bar,
+                                                    timeout=self.__timeout)
             except Exception as e:
-                provider_.enqueue(results, ((k, e) for k in self.__pending.keys()))
+                results = {k: e for k in self.__pending.keys() if k[0].provider == provider_}
 
-            while self.__pending and not done:
-                done, chunk_results = provider_.drain_queue(results)
-                for (risk_key_, priceable_), result in chunk_results:
-                    future = self.__pending.pop((risk_key_, priceable_), None)
-                    if future is not None:
-                        future.set_result(result)
+            self.__set_results(results.items())
 
-                        if self.__use_cache:
-                            PricingCache.put(risk_key_, priceable_, result)
+        requests_for_provider = self.__requests_for_provider()
+        progress_bar = self.__progress_bar(requests_for_provider)
+        await asyncio.gather(*(run_requests(requests, provider)
+                               for provider, requests in requests_for_provider.items()))
 
-            if not self.__is_async:
-                # In async mode we can't tell if we've completed, we could be re-used
-                while self.__pending:
-                    (risk_key_, _), future = self.__pending.popitem()
-                    future.set_result(ErrorValue(risk_key_, 'No result returned'))
+        # All requests have completed, so anything outstanding will not be returned
+        while self.__pending:
+            (risk_key_, _), future = self.__pending.popitem()
+            future.set_result(ErrorValue(risk_key_, 'No result returned'))
+
+    def __set_results(self, results):
+        for (risk_key_, priceable_), result in results:
+            future = self.__pending.pop((risk_key_, priceable_), None)
+            if future is not None:
+                future.set_result(result)
+
+                if self.__use_cache:
+                    PricingCache.put(risk_key_, priceable_, result)
 
+    def __progress_bar(self, requests_for_provider: dict) -> Optional[tqdm]:
+        show_status = self.__show_progress and requests_for_provider and \
+            (len(requests_for_provider) > 1 or len(next(iter(requests_for_provider.values()))) > 1)
+        return tqdm(total=len(self.__pending), position=0, maxinterval=1, file=sys.stdout) if show_status else None
+
+    def __requests_for_provider(self) -> dict:
         # Group requests optimally
         requests_by_provider = {}
         for (key, instrument) in self.__pending.keys():
@@ -254,14 +443,18 @@ class PricingContext(ContextBaseWithDefault):
 
                 requests = []
 
-                # Restrict to 1,000 instruments and 1 date in a batch, until server side changes are made
+                # Restrict to 1,000 instruments and 1 date in a batch, until server side changes are made.
+                # Fewer instruments are sent together if the latency observed for them would exceed the target
 
                 for (params, scenario, dates_markets, risk_measures), instruments in grouped_requests.items():
+                    dates_per_request = 1 if self._group_by_date else self._max_concurrent
+                    positions_per_request = RequestBatcher.positions_per_request(
+                        instruments, risk_measures, min(dates_per_request, len(dates_markets)), self._max_concurrent)
+
                     for insts_chunk in [tuple(filter(None, i)) for i in
-                                        zip_longest(*[iter(instruments)] * self._max_concurrent)]:
+                                        zip_longest(*[iter(instruments)] * positions_per_request)]:
                         for dates_chunk in [tuple(filter(None, i)) for i in
-                                            zip_longest(*[iter(dates_markets)] * (
-                                                    1 if self._group_by_date else self._max_concurrent))]:
+                                            zip_longest(*[iter(dates_markets)] * dates_per_request)]:
                             requests.append(RiskRequest(
                                 tuple(RiskPosition(instrument=i, quantity=i.instrument_quantity,
                                                    instrument_name=i.name) for i in insts_chunk),
@@ -278,12 +471,38 @@ class PricingContext(ContextBaseWithDefault):
 
                 requests_for_provider[provider] = requests
 
-            show_status = self.__show_progress and \
-                (len(requests_for_provider) > 1 or len(next(iter(requests_for_provider.values()))) > 1)
+        return requests_for_provider
+
+    def __calc(self):
+        def run_requests(requests_: list, provider_, create_event_loop: bool):
+            if create_event_loop:
+                asyncio.set_event_loop(asyncio.new_event_loop())
+
+            results = queue.Queue()
+            done = False
+
+            try:
+                with session:
+                    provider_.run(requests_, results, self._max_concurrent, progress_bar, timeout=self.__timeout)
+            except Exception as e:
+                provider_.enqueue(results, ((k, e) for k in self.__pending.keys()))
+
+            while self.__pending and not done:
+                done, chunk_results = provider_.drain_queue(results)
+                self.__set_results(chunk_results)
+
+            if not self.__is_async:
+                # In async mode we can't tell if we've completed, we could be re-used
+                while self.__pending:
+                    (risk_key_, _), future = self.__pending.popitem()
+                    future.set_result(ErrorValue(risk_key_, 'No result returned'))
+
+        requests_for_provider = self.__requests_for_provider()
+        if requests_for_provider:
+            session = GsSession.current
             request_pool = ThreadPoolExecutor(len(requests_for_provider)) \
                 if len(requests_for_provider) > 1 or self.__is_async else None
-            progress_bar = tqdm(total=len(self.__pending), position=0, maxinterval=1,
-                                file=sys.stdout) if show_status else None
+            progress_bar = self.__progress_bar(requests_for_provider)
             completion_futures = []
 
             for provider, requests in requests_for_provider.items():
@@ -388,6 +607,10 @@ class PricingContext(ContextBaseWithDefault):
             if cached_result is not None:
                 future.set_result(cached_result)
             else:
+                shared_future = SharedCalculations.share(risk_key, instrument, future)
+                if shared_future is not future:
+                    return shared_future
+
                 pending[(risk_key, instrument)] = future
 
         return future
@@ -24,10 +24,11 @@ from gs_quant.api.gs.risk_models import GsFactorRiskModelApi, GsRiskModelApi
 from gs_quant.base import EnumBase
 from gs_quant.errors import MqValueError, MqRequestError
 from gs_quant.markets.factor import Factor
-from gs_quant.models.risk_model_utils import build_asset_data_map, build_factor_data_map, \
-    build_pfp_data_dataframe, get_isc_dataframe, get_covariance_matrix_dataframe, get_closest_date_index, \
-    batch_and_upload_partial_data, risk_model_data_to_json, get_universe_size, batch_and_upload_coverage_data, \
-    upload_model_data, validate_factors_exist
+from gs_quant.models.risk_model_utils import build_asset_data_map, build_asset_data_frame, build_factor_data_map, \
+    build_factor_exposure_cube, FactorExposureCube, build_pfp_data_dataframe, get_isc_dataframe, \
+    get_covariance_matrix_dataframe, get_closest_date_index, get_dates_per_request, split_date_range, \
+    get_data_by_date_windows, batch_and_upload_coverage_data, get_model_data, upload_model_data, \
+    validate_factors_exist, RiskModelUploader
 from gs_quant.target.risk_models import RiskModel as RiskModelBuilder, RiskModelEventType, RiskModelData, \
     RiskModelCalendar, RiskModelDataAssetsRequest as DataAssetsRequest, RiskModelDataMeasure as Measure, \
     RiskModelCoverage as CoverageType, RiskModelUniverseIdentifier as UniverseIdentifier, Entitlements, \
@@ -521,15 +522,32 @@ class MarqueeRiskModel(RiskModel):
             limit_factors=False
         ).get('results')
         universe = pydash.get(results, '0.assetData.universe', [])
-        factor_exposure = build_asset_data_map(results, universe, 'factorExposure')
         if format == ReturnFormat.DATA_FRAME:
-            factor_exposure = pd.DataFrame.from_dict(
-                {(i, j): factor_exposure[i][j]
-                 for i in factor_exposure.keys()
-                 for j in factor_exposure[i].keys()},
-                orient='index'
-            )
-        return factor_exposure
+            return build_factor_exposure_cube(results, universe).to_frame()
+        return build_asset_data_map(results, universe, 'factorExposure')
+
+    def get_universe_exposure_cube(self,
+                                   start_date: dt.date,
+                                   end_date: dt.date = None,
+                                   assets: DataAssetsRequest = DataAssetsRequest(
+                                       RiskModelUniverseIdentifierRequest.gsid, [])) -> FactorExposureCube:
+        """ Get universe factor exposure data for existing risk model as an array of dates x assets x factors
+
+        :param start_date: start date for data request
+        :param end_date: end date for data request
+        :param assets: DataAssetsRequest object with identifier and list of assets to retrieve for request
+
+        :return: factor exposure for assets requested, NaN where an asset is not in the universe of a date
+        """
+        results = self.get_data(
+            start_date=start_date,
+            end_date=end_date,
+            assets=assets,
+            measures=[Measure.Universe_Factor_Exposure, Measure.Asset_Universe],
+            limit_factors=False
+        ).get('results')
+        universe = pydash.get(results, '0.assetData.universe', [])
+        return build_factor_exposure_cube(results, universe)
 
     def get_specific_risk(self,
                           start_date: dt.date,
@@ -553,9 +571,10 @@ class MarqueeRiskModel(RiskModel):
             limit_factors=False
         ).get('results')
         universe = pydash.get(results, '0.assetData.universe', [])
-        specific_risk = build_asset_data_map(results, universe, 'specificRisk')
         if format == ReturnFormat.DATA_FRAME:
-            specific_risk = pd.DataFrame(specific_risk)
+            specific_risk = build_asset_data_frame(results, universe, 'specificRisk')
+        else:
+            specific_risk = build_asset_data_map(results, universe, 'specificRisk')
         return specific_risk
 
     def get_residual_variance(self,
@@ -581,9 +600,10 @@ class MarqueeRiskModel(RiskModel):
             limit_factors=False
         ).get('results')
         universe = pydash.get(results, '0.assetData.universe', [])
-        residual_variance = build_asset_data_map(results, universe, 'residualVariance')
         if format == ReturnFormat.DATA_FRAME:
-            residual_variance = pd.DataFrame(residual_variance)
+            residual_variance = build_asset_data_frame(results, universe, 'residualVariance')
+        else:
+            residual_variance = build_asset_data_map(results, universe, 'residualVariance')
         return residual_variance
 
     def get_data(self,
@@ -592,7 +612,9 @@ class MarqueeRiskModel(RiskModel):
                  end_date: dt.date = None,
                  assets: DataAssetsRequest = DataAssetsRequest(
                      RiskModelUniverseIdentifierRequest.gsid, []),
-                 limit_factors: bool = True) -> Dict:
+                 limit_factors: bool = True,
+                 max_dates_per_request: int = None,
+                 max_concurrent_requests: int = 4) -> Dict:
         """ Get data for multiple measures for existing risk model
 
         :param measures: list of measures for general risk model data request
@@ -601,47 +623,62 @@ class MarqueeRiskModel(RiskModel):
         :param assets: DataAssetsRequest object with identifier and list of assets to retrieve for request
         :param limit_factors: limit factors included in factorData and covariance matrix to only include factors
                 which the input universe has non-zero exposure to
+        :param max_dates_per_request: number of dates to request at once. Defaults to a number depending on the
+                number of assets and measures requested
+        :param max_concurrent_requests: number of requests to make at once when the dates are split
 
         :return: risk model data or MqRequestError if query is too large for the service
+
+        Long date ranges are split into several requests, made concurrently and retried when throttled or failed by
+            the service, and their results returned as those of a single request
         """
-        try:
-            return GsFactorRiskModelApi.get_risk_model_data(
-                model_id=self.id,
-                start_date=start_date,
-                end_date=end_date,
-                assets=assets,
-                measures=measures,
-                limit_factors=limit_factors
-            )
-        except MqRequestError as e:
-            if e.status > 499:
-                logging.warning(f"Potential timeout in request for model {self.id}. Consider adding a retry or"
-                                f" batching request if error persists")
-                raise MqRequestError(e.status, f"timeout while getting model data between {start_date} and {end_date} "
-                                               f" for {self.id}, consider batching request")
-            raise e
-
-    def upload_data(self, data: Union[RiskModelData, Dict], max_asset_batch_size: int = 20000):
+        universe = assets.universe if assets is not None else None
+        dates_per_request = max_dates_per_request or get_dates_per_request(measures, len(universe or ()))
+        windows = split_date_range(start_date, end_date or dt.date.today(), dates_per_request)
+        if len(windows) > 1 and end_date is None:
+            # split up to the last date of the model, as the service would
+            dates = self.get_dates()
+            windows = split_date_range(start_date, dates[-1], dates_per_request) if dates else []
+        if len(windows) <= 1:
+            windows = [(start_date, end_date)]
+
+        def fetch(window_start: dt.date, window_end: dt.date) -> Dict:
+            try:
+                if len(windows) > 1:
+                    # retried, so that one window failing once does not fail the whole range
+                    return get_model_data(self.id, start_date=window_start, end_date=window_end, assets=assets,
+                                          measures=measures, limit_factors=limit_factors)
+                return GsFactorRiskModelApi.get_risk_model_data(model_id=self.id, start_date=window_start,
+                                                                end_date=window_end, assets=assets, measures=measures,
+                                                                limit_factors=limit_factors)
+            except MqRequestError as e:
+                if e.status > 499:
+                    logging.warning(f"Potential timeout in request for model {self.id}. Consider requesting fewer"
+                                    f" dates at once with max_dates_per_request if error persists")
+                    raise MqRequestError(e.status, f"timeout while getting model data between {window_start} and "
+                                                   f"{window_end} for {self.id}, consider batching request")
+                raise e
+
+        return get_data_by_date_windows(fetch, windows, max_concurrent_requests)
+
+    def upload_data(self, data: Union[RiskModelData, Dict, List[Union[RiskModelData, Dict]]],
+                    max_asset_batch_size: int = 20000, max_in_flight: int = 4, checkpoint: str = None):
         """ Upload risk model data to existing risk model in Marquee
 
-        :param data: complete risk model data for uploading on given date
+        :param data: complete risk model data for uploading on given date, or a list of it for many dates
             includes: date, factorData, assetData, covarianceMatrix with optional inputs:
             issuerSpecificCovariance and factorPortfolios
         :param max_asset_batch_size: size of payload to batch with. Defaults to 20000 assets which works well for
             models that have factor ids ranging from 1- 3 characters in length. For models with longer factor ids,
             consider batching with a smaller max asset batch size
+        :param max_in_flight: maximum number of batches to upload at once
+        :param checkpoint: path of a file in which to record the batches uploaded. Batches recorded in it are skipped,
+            so that an upload which failed can be continued by running it again with the same checkpoint
 
         If upload universe is over max_asset_batch_size, will batch data in chunks of max_asset_batch_size assets
         """
-
-        data = risk_model_data_to_json(data) if type(data) == RiskModelData else data
-        target_universe_size = get_universe_size(data)
-        logging.info(f'Target universe size for upload: {target_universe_size}')
-        if target_universe_size > max_asset_batch_size:
-            logging.info('Batching uploads due to universe size')
-            batch_and_upload_partial_data(self.id, data, max_asset_batch_size)
-        else:
-            upload_model_data(self.id, data)
+        data = data if isinstance(data, list) else [data]
+        RiskModelUploader(self.id, max_asset_batch_size, max_in_flight, checkpoint).upload(data)
 
     def upload_partial_data(self, data: Union[RiskModelData, dict], target_universe_size: float = None):
         """ Upload partial risk model data to existing risk model in Marquee
@@ -804,9 +841,10 @@ class FactorRiskModel(MarqueeRiskModel):
             limit_factors=False
         ).get('results')
         universe = pydash.get(results, '0.assetData.universe', [])
-        total_risk = build_asset_data_map(results, universe, 'totalRisk')
         if format == ReturnFormat.DATA_FRAME:
-            total_risk = pd.DataFrame(total_risk)
+            total_risk = build_asset_data_frame(results, universe, 'totalRisk')
+        else:
+            total_risk = build_asset_data_map(results, universe, 'totalRisk')
         return total_risk
 
     def get_historical_beta(self,
@@ -831,9 +869,10 @@ class FactorRiskModel(MarqueeRiskModel):
             limit_factors=False
         ).get('results')
         universe = pydash.get(results, '0.assetData.universe', [])
-        historical_beta = build_asset_data_map(results, universe, 'historicalBeta')
         if format == ReturnFormat.DATA_FRAME:
-            historical_beta = pd.DataFrame(historical_beta)
+            historical_beta = build_asset_data_frame(results, universe, 'historicalBeta')
+        else:
+            historical_beta = build_asset_data_map(results, universe, 'historicalBeta')
         return historical_beta
 
     def get_universe_factor_exposure(self,
@@ -1070,9 +1109,10 @@ class MacroRiskModel(MarqueeRiskModel):
             limit_factors=False
         ).get('results')
         universe = pydash.get(results, '0.assetData.universe', [])
-        r_squared = build_asset_data_map(results, universe, 'rSquared')
         if format == ReturnFormat.DATA_FRAME:
-            r_squared = pd.DataFrame(r_squared)
+            r_squared = build_asset_data_frame(results, universe, 'rSquared')
+        else:
+            r_squared = build_asset_data_map(results, universe, 'rSquared')
         return r_squared
 
     def get_fair_value_gap(self,
@@ -1104,9 +1144,10 @@ class MacroRiskModel(MarqueeRiskModel):
         universe = pydash.get(results, '0.assetData.universe', [])
         measure = 'fairValueGapStandardDeviation' if fair_value_gap_unit == Unit.STANDARD_DEVIATION else\
             'fairValueGapPercent'
-        fair_value_gap = build_asset_data_map(results, universe, measure)
         if format == ReturnFormat.DATA_FRAME:
-            fair_value_gap = pd.DataFrame(fair_value_gap)
+            fair_value_gap = build_asset_data_frame(results, universe, measure)
+        else:
+            fair_value_gap = build_asset_data_map(results, universe, measure)
         return fair_value_gap
 
     def get_factor_standard_deviation(self,
@@ -14,52 +14,154 @@ specific language governing permissions and limitations
 under the License.
 """
 import datetime as dt
+import json
 import logging
 import math
+import os
+import threading
+import time
+from functools import partial
 from time import sleep
-from typing import List, Dict
+from typing import Callable, Iterable, List, Dict, NamedTuple, Set, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 from gs_quant.api.gs.data import GsDataApi
 from gs_quant.api.gs.risk_models import GsFactorRiskModelApi
+from gs_quant.api.utils import ThreadPoolManager
 from gs_quant.errors import MqRequestError, MqValueError
-from gs_quant.target.risk_models import RiskModelData
+from gs_quant.target.risk_models import RiskModelData, RiskModelDataMeasure as Measure
+
+# the approximate number of values returned by a single risk model data request
+MAX_VALUES_PER_REQUEST = 5000000
+
+# used in estimating the size of a request when the universe is the whole model
+ESTIMATED_UNIVERSE_SIZE = 10000
+ESTIMATED_FACTOR_COUNT = 100
+
+_FACTOR_MEASURES = (Measure.Factor_Id, Measure.Factor_Name, Measure.Factor_Category_Id, Measure.Factor_Category,
+                    Measure.Factor_Return, Measure.Factor_Standard_Deviation, Measure.Factor_Z_Score)
+_ASSET_FACTOR_MEASURES = (Measure.Universe_Factor_Exposure, Measure.Factor_Portfolios)
+
+
+class FactorExposureCube(NamedTuple):
+    """
+    Factor exposures as an array of dates x assets x factors, NaN where an asset is not in the universe of a date
+    """
+    dates: List[str]
+    assets: List[str]
+    factors: List[str]
+    values: np.ndarray
+    positions: np.ndarray
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        The exposures as a frame of factors indexed by asset and date, for the dates each asset is in the universe
+        """
+        asset_idx, date_idx = np.nonzero(self.positions.T >= 0)
+        index = pd.MultiIndex.from_arrays([np.asarray(self.assets, dtype=object)[asset_idx],
+                                           np.asarray(self.dates, dtype=object)[date_idx]])
+        return pd.DataFrame(self.values[date_idx, asset_idx], index=index, columns=self.factors)
+
+
+def _universe_positions(results: List, universe: List) -> np.ndarray:
+    # the position of each asset of the universe in the universe of each date, -1 where absent
+    positions = np.full((len(results), len(universe)), -1, dtype=np.int64)
+    target = pd.Index(universe)
+    for d, row in enumerate(results):
+        row_universe = pd.Index(row.get('assetData').get('universe'))
+        if row_universe.is_unique:
+            positions[d] = row_universe.get_indexer(target)
+        else:
+            # the first position of each asset, as list.index
+            first = {}
+            for p, asset in enumerate(row_universe):
+                first.setdefault(asset, p)
+            positions[d] = [first.get(asset, -1) for asset in universe]
+    return positions
+
+
+def _asset_values(values: List) -> np.ndarray:
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        return np.asarray(values, dtype=object)
+
+
+def build_asset_data_frame(results: List, universe: List, measure: str) -> pd.DataFrame:
+    """
+    Asset data of a measure as a frame of assets indexed by date, NaN where an asset is not in the universe of a date
+    """
+    universe = list(dict.fromkeys(universe))
+    positions = _universe_positions(results, universe)
+    values = np.full(positions.shape, np.nan)
+    for d, row in enumerate(results):
+        found = positions[d] >= 0
+        if found.any():
+            row_values = _asset_values(row.get('assetData').get(measure))
+            if row_values.dtype == object and values.dtype != object:
+                values = values.astype(object)
+            values[d, found] = row_values[positions[d, found]]
+
+    present = (positions >= 0).any(axis=1)
+    dates = [row.get('date') for row in results]
+    return pd.DataFrame(values[present], index=pd.Index(dates, dtype=object)[present], columns=universe)
+
+
+def build_factor_exposure_cube(results: List, universe: List) -> FactorExposureCube:
+    """
+    Factor exposures of a universe of assets as an array of dates x assets x factors
+    """
+    universe = list(dict.fromkeys(universe))
+    positions = _universe_positions(results, universe)
+    frames = []
+    factors = pd.Index([])
+    for d, row in enumerate(results):
+        found = positions[d] >= 0
+        # only the exposures of the assets requested, so that factors none of them is exposed to are left out
+        exposures = row.get('assetData').get('factorExposure') if found.any() else []
+        frame = pd.DataFrame.from_records([exposures[i] for i in positions[d, found]]) if found.any() else \
+            pd.DataFrame()
+        factors = factors.append(frame.columns.difference(factors, sort=False))
+        frames.append(frame)
+
+    values = np.full(positions.shape + (len(factors),), np.nan)
+    for d, frame in enumerate(frames):
+        if len(frame):
+            values[d, positions[d] >= 0] = frame.reindex(columns=factors).to_numpy(dtype=float)
+
+    return FactorExposureCube([row.get('date') for row in results], universe, list(factors), values, positions)
 
 
 def build_asset_data_map(results: List, universe: List, measure: str) -> dict:
     if not results:
         return {}
-    data_map = {}
-    for asset in universe:
-        date_list = {}
-        for row in results:
-            if asset in row.get('assetData').get('universe'):
-                i = row.get('assetData').get('universe').index(asset)
-                date_list[row.get('date')] = row.get('assetData').get(measure)[i]
-        data_map[asset] = date_list
+    positions = _universe_positions(results, universe)
+    data_map = {asset: {} for asset in universe}
+    for d, row in enumerate(results):
+        date = row.get('date')
+        row_values = row.get('assetData').get(measure)
+        for j in np.flatnonzero(positions[d] >= 0):
+            data_map[universe[j]][date] = row_values[positions[d, j]]
     return data_map
 
 
 def build_factor_data_map(results: List, identifier: str, measure: str, factors: List[str] = []) -> dict:
     if not results:
         return {}
-    factor_data = set()
+    factors = set(factors)
+    factor_names = {}
+    factor_dates = {}
     for row in results:
-        factor_data |= set([factor.get('factorId') for factor in row.get('factorData')])
-        if factors:
-            factor_data &= set(factors)
-    data_map = {}
-    for factor in factor_data:
-        date_list = {}
-        factor_name = factor
-        for row in results:
-            for data in row.get('factorData'):
-                if data.get('factorId') == factor:
-                    factor_name = factor if identifier == 'factorId' else data.get(identifier)
-                    date_list[row.get('date')] = data.get(measure)
-        data_map[factor_name] = date_list
-    return data_map
+        date = row.get('date')
+        for data in row.get('factorData'):
+            factor_id = data.get('factorId')
+            if factors and factor_id not in factors:
+                continue
+            factor_names[factor_id] = factor_id if identifier == 'factorId' else data.get(identifier)
+            factor_dates.setdefault(factor_id, {})[date] = data.get(measure)
+    return {factor_names[factor_id]: dates for factor_id, dates in factor_dates.items()}
 
 
 def validate_factors_exist(factors_to_validate: List[str], risk_model_factors: List[Dict],
@@ -139,48 +241,108 @@ def get_closest_date_index(date: dt.date, dates: List[str], direction: str) -> i
     return -1
 
 
+def get_dates_per_request(measures: List[Measure], universe_size: int = None,
+                          factor_count: int = ESTIMATED_FACTOR_COUNT) -> int:
+    """ The number of dates of risk model data to request at once, so that each response holds about
+    MAX_VALUES_PER_REQUEST values """
+    universe_size = universe_size or ESTIMATED_UNIVERSE_SIZE
+    values_per_date = 0
+    for measure in measures:
+        if measure == Measure.Covariance_Matrix:
+            values_per_date += factor_count * factor_count
+        elif measure in _ASSET_FACTOR_MEASURES:
+            values_per_date += universe_size * factor_count
+        elif measure in _FACTOR_MEASURES:
+            values_per_date += factor_count
+        else:
+            values_per_date += universe_size
+    return max(1, MAX_VALUES_PER_REQUEST // max(1, values_per_date))
+
+
+def split_date_range(start_date: dt.date, end_date: dt.date, dates_per_request: int) -> List[Tuple[dt.date, dt.date]]:
+    """ Split a range of dates into consecutive windows of about dates_per_request business days """
+    days = max(1, math.ceil(dates_per_request * 7 / 5))
+    windows = []
+    while start_date <= end_date:
+        window_end = end_date if (end_date - start_date).days < days else start_date + dt.timedelta(days=days - 1)
+        windows.append((start_date, window_end))
+        start_date = window_end + dt.timedelta(days=1)
+    return windows
+
+
+def _merge_risk_model_data(merged: dict, data: dict):
+    for key, value in data.items():
+        if key == 'results':
+            merged.setdefault(key, []).extend(value)
+        elif key == 'totalResults':
+            merged[key] = merged.get(key, 0) + value
+        elif isinstance(value, list):
+            existing = merged.setdefault(key, [])
+            existing.extend(v for v in value if v not in existing)
+        else:
+            merged.setdefault(key, value)
+
+
+def _run_concurrently(tasks: Iterable[Callable], max_concurrent: int, on_result: Callable[[int, object], None] = None):
+    # run tasks on the shared pool, at most max_concurrent at once, passing the index and result of each to
+    # on_result one at a time. No more tasks are started once one has failed
+    lock = threading.Lock()
+    failed = threading.Event()
+    remaining = iter(enumerate(tasks))
+
+    def run_tasks():
+        while not failed.is_set():
+            with lock:
+                i, task = next(remaining, (None, None))
+            if task is None:
+                return
+            try:
+                result = task()
+            except Exception:
+                failed.set()
+                raise
+            if on_result is not None:
+                with lock:
+                    on_result(i, result)
+
+    ThreadPoolManager.run_async([run_tasks] * max(1, max_concurrent))
+
+
+def get_data_by_date_windows(fetch: Callable[[dt.date, dt.date], dict], windows: List[Tuple[dt.date, dt.date]],
+                             max_concurrent_requests: int = 4) -> dict:
+    """ Fetch risk model data for each window of dates, at most max_concurrent_requests at once, merging the
+    responses in date order as they arrive """
+    if len(windows) == 1:
+        return fetch(*windows[0])
+
+    merged = {}
+    received = {}
+    next_to_merge = 0
+
+    def merge(i: int, data: dict):
+        # merge the responses received in date order, so that they can be released
+        nonlocal next_to_merge
+        received[i] = data
+        while next_to_merge in received:
+            _merge_risk_model_data(merged, received.pop(next_to_merge))
+            next_to_merge += 1
+
+    _run_concurrently([partial(fetch, *w) for w in windows], min(max_concurrent_requests, len(windows)), merge)
+    return merged
+
+
 def divide_request(data, n):
     for i in range(0, len(data), n):
         yield data[i:i + n]
 
 
-def batch_and_upload_partial_data(model_id: str, data: dict, max_asset_size):
+def batch_and_upload_partial_data(model_id: str, data: dict, max_asset_size, max_in_flight: int = 4):
     """ Takes in total risk model data for one day and batches requests according to
-    asset data size, returns a list of messages from resulting post calls"""
-    date = data.get('date')
-    errors = []
-    if data.get('factorData'):
-        factor_data = {
-            'date': date,
-            'factorData': data.get('factorData')}
-        if data.get('covarianceMatrix'):
-            factor_data['covarianceMatrix'] = data.get('covarianceMatrix')
-        logging.info('Uploading factor data')
-        _repeat_try_catch_request(GsFactorRiskModelApi.upload_risk_model_data, model_id=model_id,
-                                  model_data=factor_data, partial_upload=True)
-
-    if data.get('assetData'):
-        asset_data_list, target_size = _batch_input_data({'assetData': data.get('assetData')}, max_asset_size)
-        for i in range(len(asset_data_list)):
-            _repeat_try_catch_request(GsFactorRiskModelApi.upload_risk_model_data, model_id=model_id,
-                                      model_data={'assetData': asset_data_list[i], 'date': date}, partial_upload=True,
-                                      target_universe_size=target_size)
-
-    if 'issuerSpecificCovariance' in data.keys() or 'factorPortfolios' in data.keys():
-        for optional_input_key in ['issuerSpecificCovariance', 'factorPortfolios']:
-            if data.get(optional_input_key):
-                optional_data = data.get(optional_input_key)
-                optional_data_list, target_size = _batch_input_data({optional_input_key: optional_data}, max_asset_size)
-                logging.info(f'{optional_input_key} being uploaded for {date}...')
-                for i in range(len(optional_data_list)):
-                    _repeat_try_catch_request(GsFactorRiskModelApi.upload_risk_model_data, model_id=model_id,
-                                              model_data={optional_input_key: optional_data_list[i], 'date': date},
-                                              partial_upload=True, target_universe_size=target_size)
-    if errors:
-        raise errors.pop()
+    asset data size, uploading factor data first and then the batches concurrently"""
+    RiskModelUploader(model_id, max_asset_size, max_in_flight).upload([data])
 
 
-def batch_and_upload_coverage_data(date: dt.date, gsid_list: list, model_id: str):
+def batch_and_upload_coverage_data(date: dt.date, gsid_list: list, model_id: str, max_in_flight: int = 4):
     update_time = dt.datetime.today().strftime("%Y-%m-%dT%H:%M:%SZ")
     request_array = [{'date': date.strftime('%Y-%m-%d'),
                       'gsid': gsid,
@@ -189,8 +351,152 @@ def batch_and_upload_coverage_data(date: dt.date, gsid_list: list, model_id: str
     logging.info(f"Uploading {len(request_array)} gsids to asset coverage dataset")
     list_of_requests = list(divide_request(request_array, 1000))
     logging.info(f"Uploading in {len(list_of_requests)} batches of 1000 gsids")
-    [_repeat_try_catch_request(GsDataApi.upload_data, data=data, dataset_id="RISK_MODEL_ASSET_COVERAGE") for data in
-     list_of_requests]
+    _run_concurrently([partial(_repeat_try_catch_request, GsDataApi.upload_data, data=data,
+                               dataset_id="RISK_MODEL_ASSET_COVERAGE") for data in list_of_requests],
+                      max_in_flight)
+
+
+class _UploadBatch(NamedTuple):
+    date: str
+    name: str
+    assets: int
+    build: Callable[[], dict]
+    upload_kwargs: dict
+    # batches of asset data follow the factor data of their date
+    after_factor_data: bool = False
+
+
+class RiskModelUploader:
+    """
+    Uploads risk model data for many dates, sending batches of it concurrently
+
+    Data for a date is uploaded whole if its universe is at most max_asset_batch_size assets. Otherwise its factor data
+    is uploaded first, then its asset data, issuer specific covariance and factor portfolios in batches of at most
+    max_asset_batch_size assets. Each batch is built by the thread sending it, with at most max_in_flight sent at once.
+
+    Given a checkpoint file, the batches uploaded are recorded in it and skipped by later uploads, so that an upload
+    which failed can be run again to continue where it stopped
+
+    **Examples**
+
+    >>> from gs_quant.models.risk_model_utils import RiskModelUploader
+    >>>
+    >>> uploader = RiskModelUploader('MODEL_ID', max_in_flight=8, checkpoint='model_id_upload.checkpoint')
+    >>> uploader.upload(data_by_date)
+    """
+
+    def __init__(self, model_id: str, max_asset_batch_size: int = 20000, max_in_flight: int = 4,
+                 checkpoint: str = None, log_interval: float = 30):
+        """
+        :param model_id: the risk model
+        :param max_asset_batch_size: the maximum number of assets in a request
+        :param max_in_flight: the maximum number of requests sent at once
+        :param checkpoint: path of a file recording the batches uploaded
+        :param log_interval: the number of seconds between logs of progress
+        """
+        if max_asset_batch_size < 1 or max_in_flight < 1:
+            raise MqValueError('max_asset_batch_size and max_in_flight must be positive')
+
+        self.__model_id = model_id
+        self.__max_asset_batch_size = max_asset_batch_size
+        self.__max_in_flight = max_in_flight
+        self.__checkpoint = checkpoint
+        self.__log_interval = log_interval
+        self.__uploaded = self.__read_checkpoint()
+
+    def upload(self, data: List[Union[RiskModelData, dict]]):
+        """
+        Upload risk model data
+
+        :param data: complete risk model data for each date
+        """
+        data = [risk_model_data_to_json(d) if isinstance(d, RiskModelData) else d for d in data]
+        batches = [b for d in data for b in self.__batches(d)]
+        self.__send([b for b in batches if not b.after_factor_data])
+        self.__send([b for b in batches if b.after_factor_data])
+
+    def __batches(self, data: dict) -> List[_UploadBatch]:
+        date = str(data.get('date'))
+        target_universe_size = get_universe_size(data)
+        if target_universe_size <= self.__max_asset_batch_size:
+            return [_UploadBatch(date, 'all', target_universe_size, lambda: data, {})]
+
+        batches = []
+        if data.get('factorData'):
+            factor_data = {key: data.get(key) for key in ('date', 'factorData', 'covarianceMatrix') if data.get(key)}
+            batches.append(_UploadBatch(date, 'factorData', 0, lambda: factor_data, {'partial_upload': True}))
+        for data_key in ('assetData', 'issuerSpecificCovariance', 'factorPortfolios'):
+            if not data.get(data_key):
+                continue
+            input_data = data.get(data_key)
+            universe_size = get_universe_size({data_key: input_data})
+            split_num = max(1, math.ceil(universe_size / self.__max_asset_batch_size))
+            split_idx = math.ceil(universe_size / split_num)
+            for i in range(split_num):
+                build = partial(_batch_input_payload, data.get('date'), data_key, input_data, i, split_idx, split_num,
+                                universe_size)
+                batches.append(_UploadBatch(date, f'{data_key} {i + 1}/{split_num}',
+                                            min(split_idx, universe_size - i * split_idx), build,
+                                            {'partial_upload': True, 'target_universe_size': universe_size}, True))
+        return batches
+
+    def __send(self, batches: List[_UploadBatch]):
+        skipped = [b for b in batches if (b.date, b.name) in self.__uploaded]
+        if skipped:
+            logging.info(f'Skipping {len(skipped)} batches uploaded to model {self.__model_id} before')
+        batches = [b for b in batches if (b.date, b.name) not in self.__uploaded]
+        if not batches:
+            return
+
+        start = last_log = time.monotonic()
+        uploaded = assets = 0
+
+        def upload(batch: _UploadBatch) -> _UploadBatch:
+            _repeat_try_catch_request(GsFactorRiskModelApi.upload_risk_model_data, model_id=self.__model_id,
+                                      model_data=batch.build(), **batch.upload_kwargs)
+            return batch
+
+        def on_uploaded(i: int, batch: _UploadBatch):
+            nonlocal uploaded, assets, last_log
+            self.__record(batch)
+            uploaded += 1
+            assets += batch.assets
+            now = time.monotonic()
+            if now - last_log >= self.__log_interval or uploaded == len(batches):
+                last_log = now
+                logging.info(f'Uploaded {uploaded} of {len(batches)} batches to model {self.__model_id}, '
+                             f'{uploaded / max(now - start, 1e-9):.1f} batches/s, '
+                             f'{assets / max(now - start, 1e-9):.0f} assets/s')
+
+        _run_concurrently([partial(upload, b) for b in batches], min(self.__max_in_flight, len(batches)),
+                          on_uploaded)
+
+    def __read_checkpoint(self) -> Set[Tuple[str, str]]:
+        uploaded = set()
+        if not self.__checkpoint or not os.path.exists(self.__checkpoint):
+            return uploaded
+        with open(self.__checkpoint) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # a line cut short by the failure of an earlier upload
+                    continue
+                if entry.get('modelId') == self.__model_id:
+                    uploaded.add((entry.get('date'), entry.get('batch')))
+        return uploaded
+
+    def __record(self, batch: _UploadBatch):
+        self.__uploaded.add((batch.date, batch.name))
+        if self.__checkpoint:
+            with open(self.__checkpoint, 'a') as f:
+                f.write(json.dumps({'modelId': self.__model_id, 'date': batch.date, 'batch': batch.name}) + '\n')
+
+
+def get_model_data(model_id: str, **kwargs) -> dict:
+    """ Get risk model data, retrying only requests throttled or failed by the service """
+    return _repeat_try_catch_request(GsFactorRiskModelApi.get_risk_model_data, number_retries=3, verbose=False,
+                                     retry_unknown_errors=False, model_id=model_id, **kwargs)
 
 
 def upload_model_data(model_id: str, data: dict, **kwargs):
@@ -232,19 +538,25 @@ def _batch_input_data(input_data: dict, max_asset_size: int):
     split_idx = math.ceil(target_universe_size / split_num)
     batched_data_list = []
     for i in range(split_num):
-        if data_key == 'assetData':
-            data_batched = _batch_asset_input(input_data.get('assetData'), i, split_idx, split_num,
-                                              target_universe_size)
-        elif data_key == 'factorPortfolios':
-            data_batched = _batch_pfp_input(input_data.get('factorPortfolios'), i, split_idx,
-                                            split_num, target_universe_size)
-        else:
-            data_batched = _batch_isc_input(input_data.get('issuerSpecificCovariance'), i, split_idx, split_num,
-                                            target_universe_size)
+        data_batched = _batch_input(data_key, input_data.get(data_key), i, split_idx, split_num, target_universe_size)
         batched_data_list.append(data_batched)
     return batched_data_list, target_universe_size
 
 
+def _batch_input(data_key: str, input_data: dict, i: int, split_idx: int, split_num: int,
+                 target_universe_size: int) -> dict:
+    if data_key == 'assetData':
+        return _batch_asset_input(input_data, i, split_idx, split_num, target_universe_size)
+    elif data_key == 'factorPortfolios':
+        return _batch_pfp_input(input_data, i, split_idx, split_num, target_universe_size)
+    return _batch_isc_input(input_data, i, split_idx, split_num, target_universe_size)
+
+
+def _batch_input_payload(date: str, data_key: str, input_data: dict, i: int, split_idx: int, split_num: int,
+                         target_universe_size: int) -> dict:
+    return {data_key: _batch_input(data_key, input_data, i, split_idx, split_num, target_universe_size), 'date': date}
+
+
 def _batch_asset_input(input_data: dict, i: int, split_idx: int, split_num: int, target_universe_size: int) -> dict:
     end_idx = (i + 1) * split_idx if split_num != i + 1 else target_universe_size + 1
     asset_data_subset = {'universe': input_data.get('universe')[i * split_idx:end_idx],
@@ -281,13 +593,16 @@ def _batch_isc_input(input_data: dict, i: int, split_idx: int, split_num: int, t
             'covariance': input_data.get('covariance')[i * split_idx:end_idx]}
 
 
-def _repeat_try_catch_request(input_function, number_retries: int = 5, **kwargs):
+def _repeat_try_catch_request(input_function, number_retries: int = 5, verbose: bool = True,
+                              retry_unknown_errors: bool = True, **kwargs):
     t = 2.0
     errors = []
+    result = None
     for i in range(number_retries):
         try:
             result = input_function(**kwargs)
-            logging.info(result)
+            if verbose:
+                logging.info(result)
             errors.clear()
             break
         except MqRequestError as e:
@@ -303,7 +618,9 @@ def _repeat_try_catch_request(input_function, number_retries: int = 5, **kwargs)
                 logging.warning(f'Maximum number of retries: {number_retries} triggered')
         except Exception as unknown_exception:
             errors.append(unknown_exception)
-            if i < number_retries - 1:
+            if not retry_unknown_errors:
+                raise unknown_exception
+            elif i < number_retries - 1:
                 sleep_time = math.pow(2.2, t)
                 t += 1
                 logging.warning(f'Unknown exception caught: {unknown_exception}, retrying in {int(sleep_time)}')
@@ -312,3 +629,4 @@ def _repeat_try_catch_request(input_function, number_retries: int = 5, **kwargs)
                 logging.warning(f'Maximum number of retries: {number_retries} triggered')
     if errors:
         raise errors.pop()
+    return result
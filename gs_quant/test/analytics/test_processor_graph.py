@@ -0,0 +1,99 @@
+"""
+Copyright 2021 Goldman Sachs.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+import asyncio
+from collections import defaultdict
+
+import pandas as pd
+import pytest
+
+from gs_quant.analytics.core.processor_graph import ProcessorGraph
+from gs_quant.analytics.datagrid import DataGrid, DataColumn, DataRow
+from gs_quant.analytics.datagrid.data_cell import DataCell
+from gs_quant.analytics.processors import AdditionProcessor, AppendProcessor, LastProcessor
+from gs_quant.data import DataCoordinate, DataMeasure, DataFrequency
+from gs_quant.test.utils.datagrid_test_utils import get_test_entity
+
+CLOSE = DataCoordinate(measure=DataMeasure.CLOSE_PRICE, frequency=DataFrequency.DAILY)
+TRADE_PRICE = DataCoordinate(measure=DataMeasure.TRADE_PRICE, frequency=DataFrequency.REAL_TIME)
+
+
+def build_cell(processor, column_index: int = 0):
+    cell = DataCell('Column', processor, get_test_entity('MA4B66MW5E27U8P32SB'), [], column_index, 0)
+    queries = []
+    cell.build_cell_graph(queries, defaultdict(set))
+    return cell, queries
+
+
+def calculate(queries) -> ProcessorGraph:
+    graph = ProcessorGraph(queries, {})
+    asyncio.get_event_loop().run_until_complete(graph.calculate())
+    return graph
+
+
+def test_processors_calculated_once(mocker):
+    append = mocker.spy(AppendProcessor, 'process')
+    addition = mocker.spy(AdditionProcessor, 'process')
+    cell, queries = build_cell(AdditionProcessor(AppendProcessor(CLOSE, TRADE_PRICE),
+                                                 LastProcessor(AppendProcessor(CLOSE, CLOSE))))
+    assert len(queries) == 4
+    for i, query_info in enumerate(queries):
+        query_info.data = pd.Series([float(i)], index=[pd.Timestamp(2021, 1, 4)])
+
+    graph = calculate(queries)
+    assert append.call_count == 2
+    assert addition.call_count == 1
+    assert cell.value.success
+    # (0, 1) appended, plus the last of (2, 3) appended
+    assert cell.value.data == 4.0
+    assert sorted(t.processor.__class__.__name__ for t in graph.timings) == \
+        ['AdditionProcessor', 'AppendProcessor', 'AppendProcessor', 'LastProcessor']
+    assert all(t.seconds >= 0 for t in graph.timings)
+
+
+def test_failures_put_on_cell(mocker):
+    addition = mocker.spy(AdditionProcessor, 'process')
+    cell, queries = build_cell(AdditionProcessor(AppendProcessor(CLOSE, TRADE_PRICE), CLOSE))
+    queries[0].data = pd.Series(dtype=float)
+    queries[2].data = pd.Series([1.0], index=[pd.Timestamp(2021, 1, 4)])
+
+    calculate(queries)
+    # the append has no data, so its error is left on the cell and the addition is not calculated
+    assert not cell.value.success
+    assert cell.value.data.startswith('No data found for Coordinate')
+    assert addition.call_count == 0
+
+
+def test_datagrid_processor_timings(mocker):
+    entity = get_test_entity('MA4B66MW5E27U8P32SB')
+    columns = [DataColumn(name='Last', processor=LastProcessor(CLOSE)),
+               DataColumn(name='Append', processor=AppendProcessor(CLOSE, TRADE_PRICE))]
+    datagrid = DataGrid(name='Testing', rows=[DataRow(entity)], columns=columns)
+    datagrid.initialize()
+    for query_info in datagrid._data_queries:
+        query_info.data = pd.Series([1.0], index=[pd.Timestamp(2021, 1, 4)])
+    mocker.patch('gs_quant.analytics.datagrid.datagrid.aggregate_queries', return_value={})
+
+    datagrid._fetch_queries()
+    timings = datagrid.get_processor_timings()
+    assert list(timings.columns) == ['row', 'column', 'processor', 'seconds']
+    assert sorted(zip(timings['column'], timings['processor'])) == [('Append', 'AppendProcessor'),
+                                                                    ('Last', 'LastProcessor')]
+    assert list(timings['seconds']) == sorted(timings['seconds'], reverse=True)
+    assert [cell.value.data for cell in datagrid.results[0]] == [1.0, 1.0]
+
+
+if __name__ == '__main__':
+    pytest.main(args=[__file__])
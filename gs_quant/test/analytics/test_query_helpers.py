@@ -0,0 +1,75 @@
+"""
+Copyright 2021 Goldman Sachs.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from gs_quant.analytics.core.query_helpers import build_query_string, fetch_queries, index_by_dimensions
+from gs_quant.session import GsSession
+from gs_quant.test.api.test_risk import set_session
+
+DATES = ['2021-01-04', '2021-01-05']
+
+
+def mock_post(url, payload):
+    where = payload['where']
+    return {'data': [{'date': d, 'assetId': a, 'tenor': t, 'impliedVolatility': float(i)}
+                     for i, a in enumerate(sorted(where['assetId'])) for t in sorted(where.get('tenor', ['1m']))
+                     for d in DATES]}
+
+
+def build_query(asset_ids, tenors=None) -> dict:
+    parameters = {'assetId': set(asset_ids)}
+    if tenors:
+        parameters['tenor'] = set(tenors)
+    return {'datasetId': 'EDRVOL_PERCENT_STANDARD', 'parameters': parameters, 'queries': {},
+            'range': {'startDate': date(2021, 1, 4)}, 'realTime': False, 'measures': {'impliedVolatility'}}
+
+
+def test_fetch_queries(mocker):
+    set_session()
+    post = mocker.patch.object(GsSession.current, '_post', side_effect=mock_post)
+    assets = [f'MA{i:03}' for i in range(10)]
+
+    frames = fetch_queries([build_query(assets[:1]), build_query(assets, ['1m', '3m'])], max_where_values=4)
+    assert sorted(len(c[1]['payload']['where']['assetId']) for c in post.call_args_list) == [1, 2, 4, 4]
+    assert sorted(len(c[1]['payload']['where'].get('tenor', ())) for c in post.call_args_list) == [0, 2, 2, 2]
+
+    assert len(frames[0]) == len(DATES)
+    assert len(frames[1]) == len(assets) * 2 * len(DATES)
+    assert sorted(frames[1].assetId.unique()) == assets
+    assert isinstance(frames[1].index, pd.DatetimeIndex)
+
+    # failed requests give empty frames
+    post.side_effect = RuntimeError('unavailable')
+    assert fetch_queries([build_query(assets)], max_where_values=4)[0].empty
+
+
+def test_index_by_dimensions():
+    df = pd.DataFrame({'assetId': ['A', 'A', 'B', 'B', 'A'], 'tenor': ['1m', '3m', '1m', '1m', '1m'],
+                       'strike': [1.0, 2.0, 1.0, 1.0, 1.0], 'value': range(5)})
+
+    for dimensions in ((('assetId', 'A'),), (('assetId', 'B'), ('tenor', '1m')), (('tenor', '1m'), ('strike', 1))):
+        positions = index_by_dimensions(df, tuple(d for d, _ in dimensions))[tuple(v for _, v in dimensions)]
+        pd.testing.assert_frame_equal(df.iloc[positions], df.query(build_query_string(dimensions)))
+
+    assert ('B', '3m') not in index_by_dimensions(df, ('assetId', 'tenor'))
+    assert list(index_by_dimensions(df, ())[()]) == list(range(5))
+
+
+if __name__ == '__main__':
+    pytest.main(args=[__file__])
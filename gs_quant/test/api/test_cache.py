@@ -21,7 +21,8 @@ import pandas as pd
 
 from gs_quant.api.gs.risk import GsRiskApi
 from gs_quant.instrument import IRSwap, IRSwaption
-from gs_quant.markets import HistoricalPricingContext, PricingCache, PricingContext
+from gs_quant.markets import CloseMarket, HistoricalPricingContext, PricingCache, PricingContext
+from gs_quant.markets.cache import MemoryCacheStore
 import gs_quant.risk as risk
 from gs_quant.session import Environment, GsSession
 
@@ -217,3 +218,83 @@ def test_multiple_measures(mocker):
         for risk_measure in (risk.Price, risk.IRDelta, risk.IRVega):
             val = PricingCache.get(pc._PricingContext__risk_key(risk_measure, ir_swaption.provider), ir_swaption)
             assert val is None
+
+
+@mock.patch.object(GsRiskApi, '_exec')
+def test_cache_rebuilt_instrument_and_persistence(mocker, tmp_path):
+    set_session()
+    path = str(tmp_path / 'pricing_cache.db')
+    PricingCache.configure(path=path)
+
+    try:
+        mocker.return_value = [[[[{'$type': 'Risk', 'val': 0.07}]]]]
+        with PricingContext(pricing_date=dt.date(2019, 10, 7), use_cache=True) as pc:
+            price = IRSwap('Pay', '10y', 'DKK').price()
+            price_key = pc._PricingContext__risk_key(risk.Price, GsRiskApi)
+
+        # An equal instrument built afresh shares the cached result
+        assert PricingCache.get(price_key, IRSwap('Pay', '10y', 'DKK')) == price.result()
+        assert PricingCache.stats()['hits'] == 1
+
+        # Results survive a new in-memory tier, as in a new session
+        PricingCache.configure(path=path)
+        mocker.return_value = None
+        with PricingContext(pricing_date=dt.date(2019, 10, 7), use_cache=True):
+            cached_price = IRSwap('Pay', '10y', 'DKK').price()
+        assert cached_price.result() == price.result()
+        assert cached_price.result().risk_key == price_key
+        assert PricingCache.stats() == {'hits': 1, 'misses': 0, 'evictions': 0, 'expirations': 0, 'entries': 1,
+                                        'size': PricingCache.stats()['size']}
+
+        PricingCache.drop(IRSwap('Pay', '10y', 'DKK'))
+        assert PricingCache.get(price_key, IRSwap('Pay', '10y', 'DKK')) is None
+    finally:
+        PricingCache.configure()
+
+
+def test_cache_eviction_and_expiry():
+    set_session()
+    PricingCache.configure(max_entries=2, ttl=0)
+
+    try:
+        swaps = [IRSwap('Pay', f'{i}y', 'DKK') for i in range(1, 4)]
+        old_key = PricingContext(pricing_date=dt.date(2019, 10, 7))._PricingContext__risk_key(risk.Price, GsRiskApi)
+        for i, swap in enumerate(swaps):
+            PricingCache.put(old_key, swap, risk.FloatWithInfo(old_key, i))
+
+        # The least recently used result is evicted
+        assert PricingCache.get(old_key, swaps[0]) is None
+        assert PricingCache.get(old_key, swaps[2]) == 2
+        assert PricingCache.stats()['evictions'] == 1
+
+        # Results on the latest close expire after the time-to-live
+        today_key = old_key._replace(market=CloseMarket())
+        PricingCache.put(today_key, swaps[0], risk.FloatWithInfo(today_key, 1))
+        assert PricingCache.get(today_key, swaps[0]) is None
+        assert PricingCache.stats()['expirations'] == 1
+
+        PricingCache.clear()
+        assert PricingCache.stats()['entries'] == 0
+    finally:
+        PricingCache.configure()
+
+
+def test_cache_series_and_frame_results():
+    set_session()
+
+    swap = IRSwap('Pay', '10y', 'DKK')
+    key = PricingContext(pricing_date=dt.date(2019, 10, 7))._PricingContext__risk_key(risk.Cashflows, GsRiskApi)
+    fixings = risk.SeriesWithInfo(pd.Series([0.01, 0.02], index=[dt.date(2019, 10, 7), dt.date(2020, 4, 7)]),
+                                  risk_key=key)
+    cashflows = risk.DataFrameWithInfo(pd.DataFrame({'payment_amount': [1.0, 2.0]}), risk_key=key)
+
+    # Results are sized for the memory store, whether series or frames
+    PricingCache.put(key, swap, fixings)
+    pd.testing.assert_series_equal(pd.Series(PricingCache.get(key, swap)), pd.Series(fixings))
+    PricingCache.put(key, swap, cashflows)
+    pd.testing.assert_frame_equal(pd.DataFrame(PricingCache.get(key, swap)), pd.DataFrame(cashflows))
+
+    store = MemoryCacheStore()
+    store.put(('series',), fixings, None)
+    store.put(('frame',), cashflows, None)
+    assert store.size >= fixings.memory_usage(deep=True) + cashflows.memory_usage(deep=True).sum()
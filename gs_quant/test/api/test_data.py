@@ -14,7 +14,7 @@ specific language governing permissions and limitations
 under the License.
 """
 import datetime as dt
-
+import time
 import pandas as pd
 import pytest
 from pandas.testing import assert_frame_equal, assert_series_equal
@@ -359,6 +359,23 @@ def test_auto_scroll_on_pages(mocker):
     assert len(response) == 5
 
 
+def test_concurrent_pages_in_order(mocker):
+    def page(number):
+        return {"totalPages": 4, "data": [{"date": "2012-01-25", "page": number}]}
+
+    def post(path, payload, **kwargs):
+        time.sleep(0.01 * (4 - payload.page))  # later pages complete first
+        return page(payload.page)
+
+    mocker.patch.object(ContextMeta, 'current', return_value=GsSession(Environment.QA))
+    mocker.patch.object(ContextMeta.current, '_post', side_effect=post)
+
+    query = DataQuery(start_date=dt.date(2017, 1, 15), end_date=dt.date(2017, 1, 18))
+    response = GsDataApi.get_results("test", page(0), query)
+    assert [row['page'] for row in response] == [0, 1, 2, 3]
+    assert query.page is None
+
+
 def test_get_dataset_fields(mocker):
     mock_response = {
         "totalResults": 2,
@@ -14,13 +14,18 @@ specific language governing permissions and limitations
 under the License.
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from unittest import mock
 
 import datetime as dt
+import json
 import pandas as pd
+from requests.exceptions import Timeout
 
 from gs_quant.datetime.time import to_zulu_string
 import gs_quant.risk as risk
+from gs_quant.api.batching import RequestBatcher
 from gs_quant.api.gs.risk import GsRiskApi
 from gs_quant.base import Priceable
 from gs_quant.common import AssetClass
@@ -176,6 +181,271 @@ def test_async_calc(mocker):
     assert prices == tuple(0.01 * i for i in range(len(priceables)))
 
 
+@mock.patch.object(GsRiskApi, '_exec')
+def test_native_async_calc(mocker):
+    set_session()
+
+    mocker.return_value = [[[[{'$type': 'Risk', 'val': 0.01 * idx}] for idx in range(len(priceables))]]]
+
+    async def calc():
+        async with PricingContext():
+            dollar_price_f = [p.dollar_price() for p in priceables]
+
+        return tuple(f.result() for f in dollar_price_f)
+
+    assert asyncio.run(calc()) == tuple(0.01 * i for i in range(len(priceables)))
+    assert mocker.call_count == 1
+
+    mocker.side_effect = RuntimeError('Calc failed')
+
+    async def calc_error():
+        pricing_context = PricingContext()
+        with pricing_context:
+            price_f = priceables[4].price()
+            await pricing_context.calc_async()
+
+            # Nothing is left pending, so exiting the context does not dispatch again
+            assert price_f.done()
+
+        return price_f.result()
+
+    assert isinstance(asyncio.run(calc_error()), risk.ErrorValue)
+    assert mocker.call_count == 2
+
+
+def test_batch_results_subscription(mocker):
+    set_session()
+
+    class MockWebsocket:
+        connects = 0
+
+        def __init__(self):
+            self.__messages = asyncio.Queue()
+
+        async def __aenter__(self):
+            MockWebsocket.connects += 1
+            return self
+
+        async def __aexit__(self, exc_type, exc_val, exc_tb):
+            pass
+
+        async def close(self):
+            pass
+
+        async def send(self, report_ids: str):
+            for report_id in json.loads(report_ids):
+                value = float(report_id.split('_')[1])
+                self.__messages.put_nowait(f'{report_id};R{json.dumps([[[{"$type": "Risk", "val": value}]]])}')
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            return await self.__messages.get()
+
+    report_ids = iter(range(1000))
+    mocker.patch.object(GsRiskApi, 'USE_MSGPACK', False)
+    mocker.patch.object(GsRiskApi, '_exec',
+                        side_effect=lambda requests: [{'reportId': f'report_{next(report_ids)}'} for _ in requests])
+    mocker.patch.object(GsSession.current.__class__, '_connect_websocket',
+                        side_effect=lambda *args, **kwargs: MockWebsocket())
+
+    session = GsSession.current
+    subscription = GsRiskApi.results_subscription()
+    try:
+        for context in range(2):
+            with PricingContext(is_batch=True):
+                swap_f = priceables[4].price()
+                swaption_f = priceables[6].dollar_price()
+
+            assert {swap_f.result(), swaption_f.result()} == {2. * context, 2. * context + 1}
+
+        def calc(priceable):
+            with session, PricingContext(is_batch=True):
+                return priceable.price()
+
+        # Concurrent contexts share the socket
+        with ThreadPoolExecutor(4) as pool:
+            prices = [f.result() for f in pool.map(calc, priceables[4:8])]
+        assert sorted(prices) == [4., 5., 6., 7.]
+
+        # One socket serves all contexts on the session
+        assert MockWebsocket.connects == 1
+        metrics = subscription.metrics()
+        assert metrics['connected']
+        assert metrics['in_flight'] == 0
+        assert metrics['results'] == 8
+        assert metrics['max_latency'] >= metrics['mean_latency'] >= 0
+    finally:
+        subscription.close()
+
+
+def test_adaptive_batching(mocker):
+    set_session()
+
+    def calc(requests_):
+        if sum(len(r.positions) for r in requests_) > 2:
+            raise Timeout()
+
+        return [[[[{'$type': 'Risk', 'val': p.instrument.fixed_rate}] for p in r.positions]] for r in requests_]
+
+    exec_ = mocker.patch.object(GsRiskApi, '_exec', side_effect=calc)
+    swaps = [IRSwap('Pay', '10y', 'USD', fixed_rate=i / 100) for i in range(5)]
+
+    RequestBatcher.reset()
+    RequestBatcher.configure(target_duration=1)
+    try:
+        # Requests which time out are split and retried
+        with PricingContext():
+            price_f = [s.price() for s in swaps]
+
+        assert [f.result() for f in price_f] == [s.fixed_rate for s in swaps]
+        assert ('IRSwap', 'Price') in RequestBatcher.history()
+
+        # Requests are sized from the observed latency
+        request = exec_.call_args[0][0][0].clone(positions=exec_.call_args[0][0][0].positions[:1])
+        RequestBatcher.reset()
+        RequestBatcher.record((request,), 0.4)
+        exec_.reset_mock()
+
+        with PricingContext():
+            price_f = [s.price() for s in swaps]
+
+        assert [f.result() for f in price_f] == [s.fixed_rate for s in swaps]
+        assert sorted(len(c[0][0][0].positions) for c in exec_.call_args_list) == [1, 2, 2]
+
+        # The history is kept for each session
+        assert RequestBatcher.positions_per_request(swaps, (risk.Price,), 1, 1000) < 1000
+        with GsSession.get(Environment.QA, 'client_id', 'secret'):
+            assert RequestBatcher.history() == {}
+            assert RequestBatcher.positions_per_request(swaps, (risk.Price,), 1, 1000) == 1000
+    finally:
+        RequestBatcher.configure()
+        RequestBatcher.reset()
+
+
+def test_adaptive_batching_split_by_measure(mocker):
+    set_session()
+
+    def calc(requests_):
+        if any(len(r.measures) > 1 for r in requests_):
+            raise Timeout()
+
+        return [[[[{'$type': 'Risk', 'val': p.instrument.fixed_rate}] for p in r.positions] for _ in r.measures]
+                for r in requests_]
+
+    mocker.patch.object(GsRiskApi, '_exec', side_effect=calc)
+    swaps = [IRSwap('Pay', '10y', 'USD', fixed_rate=i / 100) for i in range(4)]
+    measures = (risk.Price, risk.DollarPrice, risk.IRDelta, risk.IRVega)
+
+    def price():
+        # all the measures of the first swap in one request, and the price of the others in another
+        return [swaps[0].calc(m) for m in measures] + [s.price() for s in swaps[1:]]
+
+    async def price_async():
+        async with PricingContext():
+            futures = price()
+
+        return [f.result() for f in futures]
+
+    expected = [swaps[0].fixed_rate] * len(measures) + [s.fixed_rate for s in swaps[1:]]
+
+    # each request is sent on its own, and the first times out until split by measure
+    RequestBatcher.reset()
+    RequestBatcher.configure(target_duration=1)
+    request = risk.RiskRequest(
+        positions=(RiskPosition(instrument=swaps[0], quantity=1),),
+        measures=measures,
+        pricing_and_market_data_as_of=(PricingDateAndMarketDataAsOf(pricing_date=dt.date(2021, 1, 4)),),
+        parameters=RiskRequestParameters(raw_results=True),
+        wait_for_results=True)
+    RequestBatcher.record((request,), 0.4 * len(measures))
+    try:
+        with PricingContext():
+            futures = price()
+
+        assert [f.result() for f in futures] == expected
+        assert asyncio.run(price_async()) == expected
+    finally:
+        RequestBatcher.configure()
+        RequestBatcher.reset()
+
+
+def test_adaptive_batching_merge(mocker):
+    set_session()
+
+    def calc(requests_):
+        return [[[[{'$type': 'Risk', 'val': p.instrument.fixed_rate}] for p in r.positions]] for r in requests_]
+
+    exec_ = mocker.patch.object(GsRiskApi, '_exec', side_effect=calc)
+    swaps = [IRSwap('Pay', '10y', 'USD', fixed_rate=i / 100) for i in range(5)]
+    request = risk.RiskRequest(
+        positions=(RiskPosition(instrument=swaps[0], quantity=1),),
+        measures=(risk.Price,),
+        pricing_and_market_data_as_of=(PricingDateAndMarketDataAsOf(pricing_date=dt.date(2021, 1, 4)),),
+        parameters=RiskRequestParameters(raw_results=True),
+        wait_for_results=True)
+    requests_ = [request.clone(positions=(RiskPosition(instrument=s, quantity=1),)) for s in swaps]
+
+    async def price_async():
+        async with PricingContext():
+            futures = [s.price() for s in swaps]
+
+        return [f.result() for f in futures]
+
+    RequestBatcher.reset()
+    RequestBatcher.configure(target_duration=1)
+    try:
+        # Without history, requests are sent as they are
+        assert RequestBatcher.merge(requests_, 1000) == requests_
+
+        # Requests sized while latency was high are merged once it is low
+        RequestBatcher.record((request,), 0.1)
+        mocker.patch.object(RequestBatcher, 'positions_per_request', return_value=1)
+        assert asyncio.run(price_async()) == [s.fixed_rate for s in swaps]
+        assert [len(r.positions) for c in exec_.call_args_list for r in c[0][0]] == [5]
+
+        # up to the maximum positions per request and the target duration
+        assert [len(r.positions) for r in RequestBatcher.merge(requests_, 2)] == [2, 2, 1]
+        RequestBatcher.reset()
+        RequestBatcher.record((request,), 0.4)
+        assert [len(r.positions) for r in RequestBatcher.merge(requests_, 1000)] == [2, 2, 1]
+
+        # only requests for the same measures, dates and parameters are merged
+        delta = request.clone(measures=(risk.IRDelta,))
+        RequestBatcher.record((delta,), 0.1)
+        assert [len(r.positions) for r in RequestBatcher.merge(requests_[:2] + [delta], 1000)] == [2, 1]
+    finally:
+        RequestBatcher.configure()
+        RequestBatcher.reset()
+
+
+@mock.patch.object(GsRiskApi, '_exec')
+def test_native_async_calc_concurrent_tasks(mocker):
+    set_session()
+
+    def price_positions(requests):
+        return [[[[{'$type': 'Risk', 'val': float(p.instrument.notional_amount)}] for p in r.positions]]
+                for r in requests]
+
+    mocker.side_effect = price_positions
+
+    async def calc(notional: float, delay: float):
+        async with PricingContext():
+            await asyncio.sleep(delay)
+            price_f = IRSwap('Pay', '10y', 'USD', notional_amount=notional).price()
+            await asyncio.sleep(delay)
+
+        return price_f.result()
+
+    async def calc_all():
+        return await asyncio.gather(*(calc(i + 1, 0.01 * (3 - i)) for i in range(3)))
+
+    # each task prices in its own context, without seeing the contexts of the others
+    assert asyncio.run(calc_all()) == [1.0, 2.0, 3.0]
+    assert mocker.call_count == 3
+
+
 @mock.patch.object(GsRiskApi, '_exec')
 def test_disjoint_priceables_measures(mocker):
     set_session()
@@ -14,12 +14,16 @@ specific language governing permissions and limitations
 under the License.
 """
 
+import threading
+import time
+from concurrent.futures import TimeoutError
 from functools import partial
 
 import pytest
 
 from gs_quant.api.utils import ThreadPoolManager
 from gs_quant.session import GsSession
+from gs_quant.test.api.test_risk import set_session
 
 
 class NullContextManager(object):
@@ -48,5 +52,92 @@ def test_thread_manager():
     assert results[2] == 10
 
 
+@pytest.fixture
+def thread_pool():
+    GsSession.current = NullContextManager()
+    ThreadPoolManager.reset_stats()
+    yield
+    ThreadPoolManager.configure()
+    ThreadPoolManager.reset_stats()
+
+
+def failing_function(number: int):
+    time.sleep(0.01)
+    raise ValueError(number)
+
+
+def test_thread_manager_stats(thread_pool):
+    ThreadPoolManager.configure(max_workers=2)
+    assert ThreadPoolManager.run_async([partial(dummy_function, i) for i in range(5)]) == list(range(5))
+    assert ThreadPoolManager.run_async([partial(dummy_function, 1)], labels='one') == [1]
+    with pytest.raises(ValueError):
+        ThreadPoolManager.run_async([partial(failing_function, 1)], cancel_on_error=False)
+
+    stats = ThreadPoolManager.stats()
+    assert stats['max_workers'] == 2
+    assert stats['queued'] == stats['running'] == 0
+    assert sorted(stats['tasks']) == ['dummy_function', 'failing_function', 'one']
+    dummy = stats['tasks']['dummy_function']
+    assert (dummy['count'], dummy['failed']) == (5, 0)
+    assert sum(dummy['run_time']['buckets'].values()) == sum(dummy['queue_wait']['buckets'].values()) == 5
+    failing = stats['tasks']['failing_function']
+    assert (failing['count'], failing['failed']) == (1, 1)
+    assert failing['run_time']['max'] >= 0.01
+    assert failing['run_time']['buckets'][0.001] == 0
+
+
+def test_thread_manager_cancels_on_error(thread_pool):
+    ThreadPoolManager.configure(max_workers=1)
+    ran = []
+
+    def slow_function(number: int):
+        time.sleep(0.05)
+        ran.append(number)
+
+    # the task following the failure may have started, but the rest are cancelled
+    with pytest.raises(ValueError):
+        ThreadPoolManager.run_async([partial(failing_function, 0)] + [partial(slow_function, i) for i in range(1, 5)])
+    time.sleep(0.2)
+    assert ran in ([], [1])
+    assert ThreadPoolManager.stats()['queued'] == 0
+
+    ran.clear()
+    with pytest.raises(TimeoutError):
+        ThreadPoolManager.run_async([partial(time.sleep, 0.2), partial(slow_function, 1)], timeout=0.05)
+    time.sleep(0.3)
+    assert ran == []
+
+
+def test_thread_manager_queue(thread_pool, monkeypatch):
+    monkeypatch.setenv('GSQ_THREAD_POOL_MAX_WORKERS', '2')
+    monkeypatch.setenv('GSQ_THREAD_POOL_MAX_QUEUE', '1')
+    ThreadPoolManager.configure()
+    assert ThreadPoolManager.stats()['max_queue'] == 1
+
+    # at most 2 running and 1 queued, so the fourth task is submitted once one has finished
+    peak = []
+    lock = threading.Lock()
+
+    def task(number: int):
+        with lock:
+            peak.append(ThreadPoolManager.stats()['running'] + ThreadPoolManager.stats()['queued'])
+        time.sleep(0.02)
+        return number
+
+    assert ThreadPoolManager.run_async([partial(task, i) for i in range(6)]) == list(range(6))
+    assert max(peak) <= 3
+
+    # tasks of the pool may run tasks without waiting for the queue
+    set_session()
+
+    def nested(number: int):
+        return sum(ThreadPoolManager.run_async([partial(dummy_function, number)] * 3))
+
+    assert ThreadPoolManager.run_async([partial(nested, i) for i in range(3)]) == [0, 3, 6]
+
+    with pytest.raises(ValueError):
+        ThreadPoolManager.configure(max_workers=0)
+
+
 if __name__ == '__main__':
     pytest.main(args=[__file__])
@@ -158,6 +158,17 @@ def test_backtest_predefined():
     assert holdings[end][underlying] == 1
     assert perf[end] == 100.5
 
+    # the same holdings as date x instrument frames, and orders by date
+    holdings_frame = backtest.historical_holdings_frame
+    assert list(holdings_frame.index) == [mid, end]
+    assert list(holdings_frame.columns) == [cash_asset, underlying]
+    assert holdings_frame.loc[end, underlying] == 1
+    assert (backtest.historical_weights_frame.sum(axis=1) == 1).all()
+    assert backtest.historical_weights[end][underlying] == 2 / 100.5
+    assert backtest.holdings[underlying] == 1
+    assert len(backtest.get_orders_for_date(mid)) == 1
+    assert backtest.get_orders_for_date(end).empty
+
     # Test TWAP orders with no ON positions
     twap_entry_mid = 16
     twap_exit_mid = 25
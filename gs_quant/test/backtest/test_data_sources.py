@@ -0,0 +1,109 @@
+"""
+Copyright 2021 Goldman Sachs.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+import pytz
+from pandas.testing import assert_series_equal
+
+from gs_quant.backtests.data_sources import DataManager, DataSource, GenericDataSource, MissingDataStrategy
+from gs_quant.data import DataFrequency
+
+
+def test_generic_data_source_missing_data():
+    data = pd.Series({dt.date(2021, 12, 6): 1.0, dt.date(2021, 12, 10): 5.0, dt.date(2021, 12, 8): np.nan})
+    original = data.copy()
+
+    source = GenericDataSource(data)
+    assert source.get_data(dt.date(2021, 12, 6)) == 1.0
+    with pytest.raises(KeyError):
+        source.get_data(dt.date(2021, 12, 7))
+    with pytest.raises(KeyError):
+        source.get_data([dt.date(2021, 12, 6), dt.date(2021, 12, 7)])
+
+    source = GenericDataSource(data, MissingDataStrategy.fill_forward)
+    assert np.isnan(source.get_data(dt.date(2021, 12, 5)))
+    assert source.get_data([dt.date(2021, 12, 7), dt.date(2021, 12, 8), dt.date(2021, 12, 11)]) == [1.0, 1.0, 5.0]
+
+    source = GenericDataSource(data, MissingDataStrategy.interpolate)
+    assert np.isnan(source.get_data(dt.date(2021, 12, 5)))
+    assert source.get_data([dt.date(2021, 12, 9), dt.date(2021, 12, 7), dt.date(2021, 12, 8)]) == [4.0, 2.0, 3.0]
+    assert source.get_data(dt.date(2021, 12, 20)) == 5.0
+
+    # lookups never modify the data set
+    assert_series_equal(data, original)
+
+
+def test_generic_data_source_intraday():
+    times = pd.date_range('2021-12-06 09:00', periods=6, freq='30min', tz=pytz.utc)
+    data = pd.Series(np.arange(6, dtype=float), index=times)
+    source = GenericDataSource(data, MissingDataStrategy.fill_forward)
+
+    assert source.get_data(dt.datetime(2021, 12, 6, 10, 15)) == 2.0
+    assert source.get_data(dt.datetime(2021, 12, 6, 10, 15, tzinfo=pytz.utc)) == 2.0
+    assert source.get_data(pytz.timezone('America/New_York').localize(dt.datetime(2021, 12, 6, 5, 30))) == 3.0
+
+    assert_series_equal(source.get_data_range(dt.datetime(2021, 12, 6, 9, 30), dt.datetime(2021, 12, 6, 10, 30)),
+                        data.iloc[2:4])
+    assert_series_equal(source.get_data_range(dt.datetime(2021, 12, 6, 10, 45), 2), data.iloc[2:4])
+    assert_series_equal(source.get_data_range(dt.datetime(2021, 12, 6, 8), 2), data.iloc[:0])
+
+
+class ConstantDataSource(DataSource):
+    def get_data(self, state):
+        return 7.0
+
+    def get_data_range(self, start, end):
+        return pd.Series([7.0, 7.0])
+
+
+def test_data_manager_for_keys():
+    data = pd.Series({dt.date(2021, 12, 6): 1.0, dt.date(2021, 12, 10): 5.0, dt.date(2021, 12, 8): np.nan})
+    data_mgr = DataManager()
+    for strategy in MissingDataStrategy:
+        data_mgr.add_data_source(GenericDataSource(data, strategy), DataFrequency.DAILY, strategy)
+    data_mgr.add_data_source(data * 10, DataFrequency.DAILY, 'other')
+    data_mgr.add_data_source(ConstantDataSource(), DataFrequency.DAILY, 'constant')
+
+    keys = [(MissingDataStrategy.fill_forward,), ('constant',), (MissingDataStrategy.interpolate,)]
+    for day in (5, 6, 7, 9, 11):
+        state = dt.date(2021, 12, day)
+        expected = [data_mgr.get_data(state, *k) for k in keys]
+        np.testing.assert_array_equal(data_mgr.get_data_for_keys(state, keys), expected)
+
+    keys.append(('other',))
+    assert data_mgr.get_data_for_keys(dt.date(2021, 12, 10), keys) == [5.0, 7.0, 5.0, 50.0]
+    with pytest.raises(KeyError):
+        data_mgr.get_data_for_keys(dt.date(2021, 12, 9), keys)
+
+    # ranges exclude the start, as get_data_range
+    ranges = data_mgr.get_data_range_for_keys(dt.date(2021, 12, 6), dt.date(2021, 12, 10), keys)
+    np.testing.assert_array_equal(ranges[0], [np.nan, 5.0])
+    np.testing.assert_array_equal(ranges[1], [7.0, 7.0])
+    np.testing.assert_array_equal(ranges[3], [np.nan, 50.0])
+
+    # sources added later are seen
+    times = pd.date_range('2021-12-06 09:00', periods=4, freq='H', tz=pytz.utc)
+    data_mgr.add_data_source(pd.Series(np.arange(4.0), index=times), DataFrequency.REAL_TIME, 'intraday')
+    data_mgr.add_data_source(data * 100, DataFrequency.DAILY, 'other')
+    assert data_mgr.get_data_for_keys(dt.datetime(2021, 12, 6, 10), [('intraday',)]) == [1.0]
+    assert data_mgr.get_data_for_keys(dt.date(2021, 12, 10), [('other',)]) == [500.0]
+    np.testing.assert_array_equal(data_mgr.get_data_range_for_keys(dt.datetime(2021, 12, 6, 9),
+                                                                   dt.datetime(2021, 12, 6, 11), [('intraday',)])[0],
+                                  [1.0, 2.0])
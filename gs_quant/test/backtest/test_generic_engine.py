@@ -15,11 +15,17 @@ under the License.
 """
 
 from datetime import date
+from unittest import mock
 import pandas as pd
 import pytest
+import gs_quant.backtests.generic_engine as generic_engine
+from gs_quant.api.gs.risk import GsRiskApi
 from gs_quant.instrument import FXOption, FXForward, IRSwaption, IRSwap
 from gs_quant.backtests.triggers import *
-from gs_quant.backtests.actions import AddTradeAction, HedgeAction, ExitTradeAction
+from gs_quant.backtests.action_handler import ActionHandler
+from gs_quant.backtests.actions import Action, AddTradeAction, HedgeAction, ExitTradeAction
+from gs_quant.backtests.backtest_objects import CashPayment
+from gs_quant.backtests.backtest_utils import CalcType
 from gs_quant.backtests.data_sources import GenericDataSource
 from gs_quant.backtests.strategy import Strategy
 from gs_quant.backtests.generic_engine import GenericEngine
@@ -27,6 +33,7 @@ from gs_quant.test.utils.test_utils import MockCalc
 from gs_quant.risk import Price, FXDelta
 from gs_quant.markets import PricingContext
 from gs_quant.common import Currency, PayReceive
+from gs_quant.session import Environment, GsSession
 
 
 @pytest.mark.skip(reason="requires mocking of data extraction for calendar information")
@@ -243,3 +250,66 @@ def test_exit_action_bytradename(mocker):
         assert trade_ledger['Action1_swap2_2021-12-06']['Status'] == 'open'
         assert trade_ledger['Action1_swap2_2021-12-07']['Status'] == 'open'
         assert trade_ledger['Action1_swap2_2021-12-10']['Status'] == 'open'
+
+
+def set_session():
+    from gs_quant.session import OAuth2Session
+    OAuth2Session.init = mock.MagicMock(return_value=None)
+    GsSession.use(Environment.QA, 'client_id', 'secret')
+
+
+class AddUnresolvedTradeAction(Action):
+    def __init__(self, priceable):
+        super().__init__()
+        self.priceable = priceable
+
+
+class AddUnresolvedTradeActionImpl(ActionHandler):
+    def apply_action(self, state, backtest, trigger_info=None):
+        trade = self.action.priceable.clone(name=f'Action_{self.action.priceable.name}_{state}')
+        backtest.cash_payments[state].append(CashPayment(trade, effective_date=state, direction=-1))
+        for s in backtest.states:
+            if s >= state:
+                backtest.portfolio_dict[s].append(trade)
+        return backtest
+
+
+class PathDependentDateTrigger(Trigger):
+    def __init__(self, dates, actions):
+        super().__init__(None, actions)
+        self._calc_type = CalcType.path_dependent
+        self.dates = dates
+
+    def has_triggered(self, state, backtest=None):
+        return TriggerInfo(state in self.dates)
+
+
+def mock_exec(requests):
+    value = {'$type': 'Risk', 'val': 1.0, 'unit': {'USD': 1}}
+    return [[[[value] * len(r.pricing_and_market_data_as_of) for _ in r.positions] for _ in r.measures]
+            for r in requests]
+
+
+def test_path_dependent_pricing_lookahead(mocker):
+    set_session()
+
+    states = [date(2021, 12, 6), date(2021, 12, 7), date(2021, 12, 8), date(2021, 12, 9), date(2021, 12, 10)]
+
+    # exit all trades and add a new one on the first and fourth states
+    swap = IRSwap(PayReceive.Pay, '10y', Currency.USD, notional_amount=1e5, name='swap')
+    trigger = PathDependentDateTrigger((states[0], states[3]), [ExitTradeAction(), AddUnresolvedTradeAction(swap)])
+    strategy = Strategy(None, trigger)
+
+    mocker.patch.object(GsRiskApi, '_exec', side_effect=mock_exec)
+    mocker.patch.object(generic_engine, 'PricingContext',
+                        side_effect=lambda *args, is_batch=False, **kwargs: PricingContext(*args, **kwargs))
+
+    engine = GenericEngine(action_impl_map={AddUnresolvedTradeAction: AddUnresolvedTradeActionImpl})
+    backtest = engine.run_backtest(strategy, states=states, end=states[-1], show_progress=False)
+
+    # Trades are priced ahead when added, so only the triggered states need a call
+    assert backtest.calc_calls_saved == 3
+    for state in states:
+        expected = f'Action_swap_{states[0] if state < states[3] else states[3]}'
+        assert [t.name for t in backtest.results[state].portfolio] == [expected]
+        assert backtest.results[state][Price][expected] == 1.0
@@ -0,0 +1,128 @@
+"""
+Copyright 2021 Goldman Sachs.
+Licensed under the Apache License, Version 2.0 (the 'License');
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+import datetime as dt
+from unittest import mock
+
+import pandas as pd
+
+import gs_quant.backtests.generic_engine as generic_engine
+from gs_quant.api.gs.risk import GsRiskApi
+from gs_quant.backtests.actions import ExitTradeAction
+from gs_quant.backtests.backtest_objects import PredefinedAssetBacktest
+from gs_quant.backtests.core import ValuationFixingType
+from gs_quant.backtests.data_sources import DataManager
+from gs_quant.backtests.generic_engine import GenericEngine
+from gs_quant.backtests.predefined_asset_engine import PredefinedAssetEngine
+from gs_quant.backtests.strategy import Strategy
+from gs_quant.backtests.sweep import BacktestSweep
+from gs_quant.backtests.triggers import OrdersGeneratorTrigger
+from gs_quant.backtests.order import OrderMarketOnClose
+from gs_quant.common import Currency, PayReceive
+from gs_quant.data.core import DataFrequency
+from gs_quant.instrument import IRSwap, Security
+from gs_quant.markets import PricingContext
+from gs_quant.session import GsSession
+from gs_quant.test.backtest.test_generic_engine import AddUnresolvedTradeAction, AddUnresolvedTradeActionImpl, \
+    PathDependentDateTrigger, mock_exec, set_session
+
+STATES = [dt.date(2021, 12, 6), dt.date(2021, 12, 7), dt.date(2021, 12, 8), dt.date(2021, 12, 9),
+          dt.date(2021, 12, 10)]
+
+
+class BuyOnDateTrigger(OrdersGeneratorTrigger):
+    def __init__(self, date: dt.date, quantity: float):
+        super().__init__()
+        self.date = date
+        self.quantity = quantity
+
+    def generate_orders(self, time: dt.datetime, backtest: PredefinedAssetBacktest = None) -> list:
+        if time.date() != self.date:
+            return []
+
+        return [OrderMarketOnClose(instrument=Security(ric='TestRic'), quantity=self.quantity, generation_time=time,
+                                   execution_date=self.date, source='Test')]
+
+    def get_trigger_times(self) -> list:
+        return [dt.time(10, 0, 0)]
+
+
+def build_predefined_strategy(trade_date: dt.date, quantity: float) -> Strategy:
+    return Strategy(None, BuyOnDateTrigger(trade_date, quantity))
+
+
+def build_swap_strategy(tenor: str, roll_date: dt.date) -> Strategy:
+    swap = IRSwap(PayReceive.Pay, tenor, Currency.USD, notional_amount=1e5, name='swap')
+    trigger = PathDependentDateTrigger((STATES[0], roll_date), [ExitTradeAction(), AddUnresolvedTradeAction(swap)])
+    return Strategy(None, trigger)
+
+
+def test_sweep_predefined():
+    start = dt.date(2021, 1, 4)
+    mid = dt.date(2021, 1, 5)
+    end = dt.date(2021, 1, 6)
+
+    data_mgr = DataManager()
+    data_mgr.add_data_source(pd.Series({start: 1, mid: 1.5, end: 2}), DataFrequency.DAILY, Security(ric='TestRic'),
+                             ValuationFixingType.PRICE)
+    engine = PredefinedAssetEngine(data_mgr=data_mgr)
+    sweep = BacktestSweep(build_predefined_strategy, {'trade_date': [mid, end], 'quantity': [1, 2]}, engine)
+    assert sweep.variants == [{'trade_date': mid, 'quantity': 1}, {'trade_date': mid, 'quantity': 2},
+                              {'trade_date': end, 'quantity': 1}, {'trade_date': end, 'quantity': 2}]
+
+    # the worker processes are forked, so inherit these mocks
+    with mock.patch('gs_quant.backtests.predefined_asset_engine.is_business_day', return_value=True), \
+            mock.patch('gs_quant.backtests.predefined_asset_engine.business_day_offset',
+                       side_effect=lambda d, offset, **kwargs: d + dt.timedelta(days=offset)):
+        results = sweep.run(start=start, end=end, max_workers=2)
+        in_turn = sweep.run(start=start, end=end, max_workers=1)
+
+    pd.testing.assert_frame_equal(results, in_turn)
+    assert list(results.columns) == ['trade_date', 'quantity', 'date', 'measure', 'value']
+    assert (results.measure == 'Performance').all()
+
+    final = results[results.date == end].set_index(['trade_date', 'quantity']).value
+    assert final[mid, 1] == 100 - 1.5 + 2
+    assert final[mid, 2] == 100 - 2 * 1.5 + 2 * 2
+    assert final[end, 1] == final[end, 2] == 100
+
+
+def test_sweep_generic_shares_calculations(mocker):
+    set_session()
+    calc = mocker.patch.object(GsRiskApi, '_exec', side_effect=mock_exec)
+    mocker.patch.object(generic_engine, 'PricingContext',
+                        side_effect=lambda *args, is_batch=False, **kwargs: PricingContext(*args, **kwargs))
+
+    engine = GenericEngine(action_impl_map={AddUnresolvedTradeAction: AddUnresolvedTradeActionImpl})
+    sweep = BacktestSweep(build_swap_strategy, {'tenor': ['5y', '10y'], 'roll_date': STATES[1:4]}, engine)
+    results = sweep.run(states=STATES, end=STATES[-1], show_progress=False, max_workers=3)
+
+    # every variant holds a swap of the same contents on each date, which is priced once for the whole sweep
+    priced = [(p.instrument.termination_date, d.pricing_date) for (requests,), _ in calc.call_args_list
+              for r in requests for p in r.positions for d in r.pricing_and_market_data_as_of]
+    assert sorted(priced) == sorted((tenor, d) for tenor in ('5y', '10y') for d in STATES)
+    assert list(results.columns) == ['tenor', 'roll_date', 'date', 'measure', 'value']
+
+    prices = results[results.measure == 'Price'].set_index(['tenor', 'roll_date', 'date']).value
+    assert len(prices) == 2 * 3 * len(STATES)
+    assert (prices == 1.0).all()
+
+    # the caller's session is entered for each variant only, leaving the caller's contexts as they were
+    with GsSession.current:
+        path = GsSession.path
+        in_turn = sweep.run(states=STATES, end=STATES[-1], show_progress=False, max_workers=1)
+        assert GsSession.path == path
+    pd.testing.assert_frame_equal(results, in_turn)
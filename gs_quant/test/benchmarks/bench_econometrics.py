@@ -0,0 +1,105 @@
+"""
+Copyright 2021 Goldman Sachs.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+Benchmarks for gs_quant.timeseries.econometrics. These are not collected by pytest; run them with
+
+  python -m gs_quant.test.benchmarks.bench_econometrics
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from gs_quant.datetime.date import DayCountConvention, day_count_fraction
+from gs_quant.timeseries.datetime import align
+from gs_quant.timeseries.econometrics import _get_annualization_factor, excess_returns, excess_returns_pure
+from gs_quant.timeseries.helper import Interpolate
+
+
+# the pure-Python implementations replaced, kept for comparison
+
+def _legacy_excess_returns_pure(price_series: pd.Series, spot_curve: pd.Series) -> pd.Series:
+    curve, bench_curve = align(price_series, spot_curve, Interpolate.INTERSECT)
+
+    e_returns = [curve.iloc[0]]
+    for i in range(1, len(curve)):
+        multiplier = 1 + curve.iloc[i] / curve.iloc[i - 1] - bench_curve.iloc[i] / bench_curve.iloc[i - 1]
+        e_returns.append(e_returns[-1] * multiplier)
+    return pd.Series(e_returns, index=curve.index)
+
+
+def _legacy_excess_returns(price_series: pd.Series, rate: float,
+                           day_count_convention=DayCountConvention.ACTUAL_360) -> pd.Series:
+    er = [price_series.iloc[0]]
+    for j in range(1, len(price_series)):
+        fraction = day_count_fraction(price_series.index[j - 1], price_series.index[j], day_count_convention)
+        er.append(er[-1] + price_series.iloc[j] - price_series.iloc[j - 1] * (1 + rate * fraction))
+    return pd.Series(er, index=price_series.index)
+
+
+def _legacy_annualization_distances(x: pd.Series) -> list:
+    prev_idx = x.index[0]
+    distances = []
+    for idx, value in x.iloc[1:].items():
+        distances.append((idx - prev_idx).days)
+        prev_idx = idx
+    return distances
+
+
+def _series(years: int, count: int) -> list:
+    index = pd.bdate_range('2000-01-03', periods=years * 261)
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.0002, 0.01, size=(count, len(index)))
+    return [pd.Series(100 * np.exp(np.cumsum(r)), index=index) for r in returns]
+
+
+def _timed(fn, series: list, *args) -> float:
+    start = time.perf_counter()
+    for x in series:
+        fn(x, *args)
+    return time.perf_counter() - start
+
+
+def bench_excess_returns(years: int = 20, count: int = 1_000, legacy_count: int = 10):
+    series = _series(years, count)
+    benchmark = series[0] * 0.5 + 50
+    legacy = series[:legacy_count]
+
+    cases = (
+        ('excess_returns (rate)', excess_returns, _legacy_excess_returns, (0.02,)),
+        ('excess_returns_pure', excess_returns_pure, _legacy_excess_returns_pure, (benchmark,)),
+        ('_get_annualization_factor', _get_annualization_factor, _legacy_annualization_distances, ()),
+    )
+
+    print(f'{years} years of daily data, {count} series (legacy timed on {legacy_count}, scaled)')
+    print(f'{"function":>26} {"elapsed (s)":>12} {"legacy (s)":>12} {"speedup":>9}')
+    for name, fn, legacy_fn, args in cases:
+        elapsed = _timed(fn, series, *args)
+        legacy_elapsed = _timed(legacy_fn, legacy, *args) * count / legacy_count if legacy_count else None
+        if legacy_elapsed is None:
+            print(f'{name:>26} {elapsed:>12.4f} {"-":>12} {"-":>9}')
+        else:
+            print(f'{name:>26} {elapsed:>12.4f} {legacy_elapsed:>12.4f} {legacy_elapsed / elapsed:>8.0f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--years', type=int, default=20, help='years of daily data in each series')
+    parser.add_argument('--count', type=int, default=1_000, help='number of series')
+    parser.add_argument('--legacy-count', type=int, default=10,
+                        help='number of series to time with the legacy implementations (0 to skip)')
+    args = parser.parse_args()
+    bench_excess_returns(args.years, args.count, args.legacy_count)
@@ -0,0 +1,93 @@
+"""
+Copyright 2021 Goldman Sachs.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+Benchmarks for gs_quant.datetime.relative_date. These are not collected by pytest; run them with
+
+  python -m gs_quant.test.benchmarks.bench_relative_date
+"""
+import argparse
+import datetime as dt
+import time
+
+from gs_quant.datetime.relative_date import RelativeDate, RelativeDateSchedule, apply_rule_to_dates
+
+
+# the per-period implementation replaced, kept for comparison
+
+def _legacy_schedule(rule: str, base_date: dt.date, end_date: dt.date, holiday_calendar: list) -> list:
+    i = 1
+    schedule = [base_date]
+    while True:
+        result = RelativeDate(f'{int(rule[:-1]) * i}{rule[-1]}', base_date).apply_rule(
+            holiday_calendar=holiday_calendar)
+        if result > end_date:
+            break
+        i += 1
+        schedule.append(result)
+
+    return schedule
+
+
+def bench_schedule(years: int = 30, legacy: bool = True):
+    end_date = dt.date(2024, 12, 31)
+    base_date = end_date.replace(year=end_date.year - years)
+    holidays = [dt.date(y, m, d) for y in range(base_date.year, end_date.year + 1) for m, d in ((1, 1), (12, 25))]
+
+    print(f'{years} years of schedule, {len(holidays)} holidays')
+    print(f'{"rule":>6} {"dates":>7} {"elapsed (s)":>12} {"legacy (s)":>12} {"speedup":>9}')
+    for rule in ('1b', '1d', '1w', '1m'):
+        start = time.perf_counter()
+        schedule = RelativeDateSchedule(rule, base_date, end_date).apply_rule(holiday_calendar=holidays)
+        elapsed = time.perf_counter() - start
+
+        if legacy:
+            start = time.perf_counter()
+            _legacy_schedule(rule, base_date, end_date, holidays)
+            legacy_elapsed = time.perf_counter() - start
+            print(f'{rule:>6} {len(schedule):>7} {elapsed:>12.4f} {legacy_elapsed:>12.4f} '
+                  f'{legacy_elapsed / elapsed:>8.0f}x')
+        else:
+            print(f'{rule:>6} {len(schedule):>7} {elapsed:>12.4f} {"-":>12} {"-":>9}')
+
+
+def bench_apply_rule_to_dates(count: int = 10_000, legacy: bool = True):
+    dates = [dt.date(1990, 1, 1) + dt.timedelta(days=i) for i in range(count)]
+    holidays = [dt.date(y, m, d) for y in range(1990, 2031) for m, d in ((1, 1), (12, 25))]
+
+    print(f'{count} base dates, {len(holidays)} holidays')
+    print(f'{"rule":>12} {"elapsed (s)":>12} {"legacy (s)":>12} {"speedup":>9}')
+    for rule in ('-1b', '1m', 'J+14d+0u+4u'):
+        start = time.perf_counter()
+        apply_rule_to_dates(rule, dates, holiday_calendar=holidays)
+        elapsed = time.perf_counter() - start
+
+        if legacy:
+            start = time.perf_counter()
+            [RelativeDate(rule, d).apply_rule(holiday_calendar=holidays) for d in dates]
+            legacy_elapsed = time.perf_counter() - start
+            print(f'{rule:>12} {elapsed:>12.4f} {legacy_elapsed:>12.4f} {legacy_elapsed / elapsed:>8.0f}x')
+        else:
+            print(f'{rule:>12} {elapsed:>12.4f} {"-":>12} {"-":>9}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--years', type=int, default=30, help='length of the schedule in years')
+    parser.add_argument('--dates', type=int, default=10_000, help='number of base dates to apply rules to')
+    parser.add_argument('--no-legacy', action='store_true', help='skip timing the legacy implementation')
+    args = parser.parse_args()
+    bench_schedule(args.years, not args.no_legacy)
+    print()
+    bench_apply_rule_to_dates(args.dates, not args.no_legacy)
@@ -0,0 +1,103 @@
+"""
+Copyright 2021 Goldman Sachs.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+Benchmarks for gs_quant.timeseries.statistics. These are not collected by pytest; run them with
+
+  python -m gs_quant.test.benchmarks.bench_statistics
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.stats import percentileofscore
+
+from gs_quant.timeseries.helper import Window
+from gs_quant.timeseries.statistics import percentiles, rolling_std
+
+
+def _legacy_rolling_std(x: pd.Series, offset: pd.DateOffset) -> pd.Series:
+    # the pure-Python implementation rolling_std replaced, kept for comparison
+    size = len(x)
+    index = x.index
+    results = np.empty(size, dtype=np.double)
+    results[0] = np.nan
+    values = np.array(x.values, dtype=np.double)
+
+    start = 0
+    for i in range(1, size):
+        for j in range(start, i + 1):
+            if pd.Timestamp(index[j]) > index[i] - offset:
+                start = j
+                break
+        results[i] = np.std(values[start:i + 1], ddof=1)
+    return pd.Series(results, index=index, dtype=np.double)
+
+
+def _legacy_percentiles(x: pd.Series, w: int) -> pd.Series:
+    # the per-point implementation percentiles replaced, kept for comparison
+    return pd.Series([percentileofscore(x[:idx][-w:], val, kind='mean') for idx, val in x.items()], index=x.index)
+
+
+def _series(size: int) -> pd.Series:
+    index = pd.date_range('1900-01-01', periods=size, freq='H')
+    return pd.Series(np.random.default_rng(0).normal(size=size), index=index)
+
+
+def _timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def bench_rolling_std(sizes=(10_000, 100_000, 1_000_000), legacy_limit: int = 100_000):
+    offset = pd.DateOffset(days=1)
+    print(f'{"points":>10} {"rolling_std (s)":>16} {"legacy (s)":>12} {"speedup":>9}')
+    for size in sizes:
+        x = _series(size)
+        elapsed = _timed(rolling_std, x, offset)
+        if size <= legacy_limit:
+            legacy = _timed(_legacy_rolling_std, x, offset)
+            print(f'{size:>10} {elapsed:>16.4f} {legacy:>12.4f} {legacy / elapsed:>8.0f}x')
+        else:
+            print(f'{size:>10} {elapsed:>16.4f} {"-":>12} {"-":>9}')
+
+
+def bench_percentiles(points: int = 1_000_000, legacy_points: int = 2_000):
+    x = _series(points)
+    print(f'{points} points (legacy timed on {legacy_points}, scaled)')
+    print(f'{"window":>8} {"percentiles (s)":>16} {"legacy (s)":>12} {"speedup":>9}')
+    for window in (252, '30d', None):
+        elapsed = _timed(percentiles, x, None, Window(window, 0))
+        if legacy_points and isinstance(window, int):
+            legacy = _timed(_legacy_percentiles, x[:legacy_points], window) * points / legacy_points
+            print(f'{window!s:>8} {elapsed:>16.4f} {legacy:>12.4f} {legacy / elapsed:>8.0f}x')
+        else:
+            print(f'{window!s:>8} {elapsed:>16.4f} {"-":>12} {"-":>9}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--only', choices=('rolling_std', 'percentiles'), help='run a single benchmark')
+    parser.add_argument('--legacy-limit', type=int, default=100_000,
+                        help='largest series to time with the legacy rolling_std')
+    parser.add_argument('--points', type=int, default=1_000_000, help='length of the series for percentiles')
+    parser.add_argument('--legacy-points', type=int, default=2_000,
+                        help='length of the series timed with the legacy percentiles, scaled (0 to skip)')
+    args = parser.parse_args()
+    if args.only != 'percentiles':
+        bench_rolling_std(legacy_limit=args.legacy_limit)
+    if args.only != 'rolling_std':
+        bench_percentiles(args.points, args.legacy_points)
@@ -166,6 +166,23 @@ def test_query_data_types(mocker):
     assert data.equals(GsDataApi.construct_dataframe_with_types(str(Dataset.TR.TREOD), test_data))
 
 
+def test_query_data_chunked(mocker):
+    pages = [test_data[:2], test_data[2:4], test_data[4:]]
+    mocker.patch.object(GsDataApi, 'execute_query',
+                        side_effect=lambda dataset_id, query: {'totalPages': 3, 'data': pages[query.page or 0]})
+    mocker.patch("gs_quant.api.gs.data.GsDataApi.get_types", return_value=test_types)
+    mocker.patch.object(GsSession.__class__, 'current', return_value=GsSession(Environment.QA))
+    dataset = Dataset(Dataset.TR.TREOD)
+
+    chunks = dataset.get_data(dt.date(2019, 1, 2), dt.date(2019, 1, 9), assetId='MA4B66MW5E27U8P32SB', chunked=True)
+    expected = [GsDataApi.construct_dataframe_with_types(str(Dataset.TR.TREOD), page) for page in pages]
+    for chunk, page in zip(chunks, expected):
+        assert chunk.equals(page)
+
+    data = pd.concat(dataset.iter_data(dt.date(2019, 1, 2), dt.date(2019, 1, 9), assetId='MA4B66MW5E27U8P32SB'))
+    assert data.equals(GsDataApi.construct_dataframe_with_types(str(Dataset.TR.TREOD), test_data))
+
+
 def test_last_data(mocker):
     mocker.patch("gs_quant.api.gs.data.GsDataApi.last_data", return_value=[test_data[-1]])
     mocker.patch("gs_quant.api.gs.data.GsDataApi.get_types", return_value=test_types)
@@ -63,3 +63,15 @@ def test_day_count_fraction():
     # Feb 29 is within range, so should use 366
     assert day_count_fraction(start, end, DayCountConvention.ACTUAL_365L, PaymentFrequency.ANNUALLY) == \
         approx(2.087431693989)
+
+
+def test_consecutive_day_count_fractions():
+    dates = [dt.date(2015, 11, 12), dt.date(2016, 2, 28), dt.date(2016, 3, 1), dt.date(2017, 12, 15),
+             dt.date(2017, 12, 15)]
+
+    for convention in DayCountConvention:
+        for frequency in (PaymentFrequency.MONTHLY, PaymentFrequency.ANNUALLY):
+            expected = [day_count_fraction(start, end, convention, frequency) for start, end in zip(dates, dates[1:])]
+            assert list(consecutive_day_count_fractions(dates, convention, frequency)) == approx(expected)
+
+    assert len(consecutive_day_count_fractions(dates[:1])) == 0
@@ -15,15 +15,32 @@ under the License.
 """
 
 from gs_quant.datetime import GsCalendar
+from gs_quant.datetime.gscalendar import HolidayStore
+from gs_quant.datetime.relative_date import RelativeDate
 from gs_quant.common import PricingLocation
 from gs_quant.test.api.test_risk import set_session
 from gs_quant.data import Dataset
 
 from unittest import mock
+import numpy as np
 import pandas as pd
+import pytest
 import datetime
 
 
+@pytest.fixture(autouse=True)
+def holiday_store():
+    HolidayStore.configure()
+    yield
+    HolidayStore.configure()
+
+
+def mock_holidays(start, end, exchange=(), currency=()):
+    holidays = {'NYC': ['1999-09-06'], 'LDN': ['1999-08-30'], 'USD': ['1999-09-06', '1999-11-25'], 'GBP': []}
+    dates = [d for code in (*exchange, *currency) for d in holidays[code]]
+    return pd.DataFrame(index=pd.to_datetime(dates), data={'holiday': 'Holiday'})
+
+
 # Test GsCalendar initiated with single PricingLocation
 @mock.patch.object(Dataset, 'get_data')
 def test_gs_calendar_single(mocker):
@@ -44,3 +61,41 @@ def test_gs_calendar_tuple(mocker):
     locs = (PricingLocation.NYC, PricingLocation.LDN)
     days = GsCalendar(locs).holidays
     assert days
+
+
+# GsCalendar and relative date rules share one store, which fetches each calendar once
+def test_holiday_store_shared():
+    with mock.patch.object(Dataset, 'get_data', side_effect=mock_holidays) as get_data:
+        calendar = GsCalendar((PricingLocation.NYC, 'LDN'))
+        assert calendar.holidays == {np.datetime64('1999-09-06'), np.datetime64('1999-08-30')}
+        assert calendar.business_day_calendar() is GsCalendar.get(('LDN', PricingLocation.NYC)).business_day_calendar()
+        assert calendar.business_day_calendar('1111110') is not calendar.business_day_calendar()
+
+        rdate = RelativeDate('1b', base_date=datetime.date(1999, 9, 3))
+        assert rdate.apply_rule(exchanges=['nyc']) == datetime.date(1999, 9, 7)
+        assert rdate.apply_rule(currencies=['USD', 'GBP']) == datetime.date(1999, 9, 7)
+        assert rdate.apply_rule(currencies=['GBP']) == datetime.date(1999, 9, 6)
+        assert get_data.call_count == 4
+
+        assert list(HolidayStore.holidays(exchanges=['NYC'], currencies=['USD'])) == \
+            [np.datetime64('1999-09-06'), np.datetime64('1999-11-25')]
+        assert get_data.call_count == 4
+
+
+def test_holiday_store_saved(tmp_path):
+    HolidayStore.configure(path=str(tmp_path))
+    with mock.patch.object(Dataset, 'get_data', side_effect=mock_holidays) as get_data:
+        assert list(HolidayStore.holidays(exchanges=['NYC'])) == [np.datetime64('1999-09-06')]
+        assert get_data.call_count == 1
+    assert [f.name for f in tmp_path.iterdir()] == ['HOLIDAY_NYC.npy']
+
+    # another process, or a later session, loads the saved calendar
+    HolidayStore.clear()
+    with mock.patch.object(Dataset, 'get_data', side_effect=RuntimeError('unavailable')):
+        assert list(HolidayStore.holidays(exchanges=['NYC'])) == [np.datetime64('1999-09-06')]
+
+    # stale calendars are fetched again
+    HolidayStore.configure(path=str(tmp_path), max_age=0)
+    with mock.patch.object(Dataset, 'get_data', side_effect=mock_holidays) as get_data:
+        HolidayStore.holidays(exchanges=['NYC'])
+        assert get_data.call_count == 1
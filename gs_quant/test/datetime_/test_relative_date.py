@@ -18,7 +18,9 @@ from datetime import date as dt
 from unittest.mock import Mock
 
 import pytest
-from gs_quant.datetime.relative_date import RelativeDate
+import pandas as pd
+from gs_quant.datetime.gscalendar import HolidayStore
+from gs_quant.datetime.relative_date import RelativeDate, RelativeDateSchedule, apply_rule_to_dates, _compile_rule
 from testfixtures import Replacer
 
 holiday_calendar = [dt(2021, 1, 18)]
@@ -217,6 +219,9 @@ def test_chaining():
     assert date == dt(2021, 1, 22)
 
 
+holiday_data_types = {'date': 'date', 'currency': 'string', 'description': 'string'}
+
+
 def mock_holiday_data(*args, **kwargs):
     dq = args[1]
     ccies = dq.as_dict()['where']['currency']
@@ -230,6 +235,7 @@ def mock_holiday_data(*args, **kwargs):
 def test_currency_holiday_calendars():
     replace = Replacer()
     replace('gs_quant.api.gs.data.GsDataApi.query_data', Mock(side_effect=mock_holiday_data))
+    replace('gs_quant.api.gs.data.GsDataApi.get_types', Mock(return_value=holiday_data_types))
     rdate = RelativeDate('-1b', base_date=dt(2022, 4, 12))
     assert dt(2022, 4, 11) == rdate.apply_rule(currencies=[])
     assert dt(2022, 4, 11) == rdate.apply_rule(currencies=['GBP'])
@@ -238,5 +244,74 @@ def test_currency_holiday_calendars():
     replace.restore()
 
 
+# schedules are built for all periods at once, but must match applying the rule for each period in turn
+@pytest.mark.parametrize('rule', ['1b', '2b', '1d', '3d', '1g', '1k', '1m', '2m', '1u', '1v', '1w', '1y'])
+def test_schedule_matches_relative_dates(rule):
+    base_date = dt(2020, 1, 31)
+    end_date = dt(2024, 3, 1)
+    holidays = holiday_calendar + [dt(2020, 2, 17), dt(2020, 12, 25), dt(2022, 2, 28), dt(2023, 7, 4)]
+    expected = [base_date]
+    i = 1
+    while True:
+        rdate = RelativeDate(f'{int(rule[:-1]) * i}{rule[-1]}', base_date)
+        date = rdate.apply_rule(holiday_calendar=holidays, week_mask='1111110')
+        if date > end_date:
+            break
+        expected.append(date)
+        i += 1
+
+    schedule = RelativeDateSchedule(rule, base_date, end_date)
+    assert schedule.apply_rule(holiday_calendar=holidays, week_mask='1111110') == expected
+
+
+def test_schedule_edges():
+    assert RelativeDateSchedule('1d', dt(2021, 1, 19)).apply_rule() == [dt(2021, 1, 19)]
+    assert RelativeDateSchedule('1b', dt(2021, 1, 19), dt(2021, 1, 19)).apply_rule() == [dt(2021, 1, 19)]
+    assert RelativeDateSchedule('1b', dt(2021, 1, 19), dt(2021, 1, 1)).apply_rule() == [dt(2021, 1, 19)]
+    assert RelativeDateSchedule('1e', dt(2021, 1, 19), dt(2021, 1, 30)).apply_rule() == [dt(2021, 1, 19)]
+    assert RelativeDateSchedule('1b', dt(2021, 1, 15), dt(2021, 1, 20)).apply_rule(
+        holiday_calendar=holiday_calendar) == [dt(2021, 1, 15), dt(2021, 1, 19), dt(2021, 1, 20)]
+
+
+def test_schedule_fetches_holidays_once():
+    replace = Replacer()
+    query_data = Mock(side_effect=mock_holiday_data)
+    replace('gs_quant.api.gs.data.GsDataApi.query_data', query_data)
+    replace('gs_quant.api.gs.data.GsDataApi.get_types', Mock(return_value=holiday_data_types))
+    HolidayStore.clear()
+    schedule = RelativeDateSchedule('1b', dt(2022, 4, 7), dt(2022, 4, 13)).apply_rule(currencies=['EUR'])
+    assert schedule == [dt(2022, 4, 7), dt(2022, 4, 8), dt(2022, 4, 11), dt(2022, 4, 12), dt(2022, 4, 13)]
+    schedule = RelativeDateSchedule('1b', dt(2022, 4, 7), dt(2022, 4, 13)).apply_rule(currencies=['EUR', 'USD'])
+    assert schedule == [dt(2022, 4, 7), dt(2022, 4, 8), dt(2022, 4, 12), dt(2022, 4, 13)]
+    assert query_data.call_count == 2
+    replace.restore()
+
+
+def test_compiled_rules_are_cached():
+    assert _compile_rule('J+14d+0u+4u') is _compile_rule('J+14d+0u+4u')
+    steps = _compile_rule('-1y+1d')
+    assert [(step.rule_class.__name__, step.number) for step in steps] == [('yRule', -1), ('dRule', 1)]
+    with pytest.raises(NotImplementedError):
+        RelativeDate('1q', base_date=dt(2021, 1, 19)).apply_rule()
+
+
+# applying a rule to many dates at once must match applying it to each in turn
+@pytest.mark.parametrize('rule', ['A', '-1b', '1b', '0b', '3d', 'e', '2F', '1g', '-2G', 'J', '1k', '1m', '-1m', '2M',
+                                  'N', '1r', '1u', '-1v', '1w', '-1x', '1y', 'J+14d+0u+4u', '1y-1d', '3m+e+0b'])
+def test_apply_rule_to_dates(rule):
+    base_dates = pd.date_range('2020-01-25', '2020-03-10').date.tolist() + [dt(2020, 12, 31), dt(2021, 1, 19)]
+    holidays = holiday_calendar + [dt(2020, 2, 17), dt(2020, 2, 28), dt(2020, 12, 25), dt(2021, 1, 1)]
+    expected = [RelativeDate(rule, base_date=d).apply_rule(holiday_calendar=holidays, week_mask='1111110')
+                for d in base_dates]
+    assert apply_rule_to_dates(rule, base_dates, holiday_calendar=holidays, week_mask='1111110') == expected
+
+
+def test_apply_rule_to_dates_inputs():
+    assert apply_rule_to_dates('-1b', []) == []
+    assert apply_rule_to_dates('-1b', pd.DatetimeIndex(['2021-01-19 09:00'], tz='America/New_York'),
+                               holiday_calendar=holiday_calendar) == [dt(2021, 1, 15)]
+    assert apply_rule_to_dates('1d', pd.to_datetime(['2021-01-19 23:00']).values) == [dt(2021, 1, 20)]
+
+
 if __name__ == "__main__":
     pytest.main(args=["test_relative_date.py"])
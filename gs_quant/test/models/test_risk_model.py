@@ -13,10 +13,16 @@ KIND, either express or implied.  See the License for the
 specific language governing permissions and limitations
 under the License.
 """
+import numpy as np
+import pandas as pd
 import pytest
 from unittest import mock
 
+from gs_quant.api.gs.data import GsDataApi
+from gs_quant.api.gs.risk_models import GsFactorRiskModelApi, GsRiskModelApi
+from gs_quant.errors import MqRequestError
 from gs_quant.models.risk_model import FactorRiskModel, MacroRiskModel, ReturnFormat, Unit
+from gs_quant.models.risk_model_utils import get_dates_per_request
 from gs_quant.session import *
 from gs_quant.target.risk_models import RiskModel as Risk_Model, RiskModelCoverage, RiskModelTerm,\
     RiskModelUniverseIdentifier, RiskModelType, RiskModelDataAssetsRequest as DataAssetsRequest, \
@@ -439,5 +445,248 @@ def test_get_factor_z_score(mocker):
     assert response == factor_z_score_response
 
 
+def test_get_universe_exposure(mocker):
+    model = mock_risk_model(mocker)
+    universe = ['904026', '232128', '24985']
+    results = {
+        'results': [
+            {
+                'date': '2022-04-04',
+                'assetData': {
+                    'universe': ['232128', '904026'],
+                    'factorExposure': [{'1': 0.3}, {'1': 0.1, '2': 0.2}]
+                }
+            },
+            {
+                'date': '2022-04-05',
+                'assetData': {
+                    'universe': ['24985', '904026', '232128'],
+                    # only 24985, outside the universe of the first date, is exposed to factor 3
+                    'factorExposure': [{'1': 1.5, '3': 2.5}, {'1': 1.1, '2': 1.2}, {'1': 1.3, '2': 1.4}]
+                }
+            }
+        ],
+        'totalResults': 2
+    }
+    mocker.patch.object(GsSession.current, '_post', return_value=results)
+
+    cube = model.get_universe_exposure_cube(start_date=dt.date(2022, 4, 4),
+                                            end_date=dt.date(2022, 4, 5),
+                                            assets=DataAssetsRequest(UniverseIdentifier.gsid, universe))
+    assert cube.dates == ['2022-04-04', '2022-04-05']
+    assert cube.assets == ['232128', '904026']
+    assert cube.factors == ['1', '2']
+    np.testing.assert_array_equal(cube.values, [[[0.3, np.nan], [0.1, 0.2]], [[1.3, 1.4], [1.1, 1.2]]])
+
+    response = model.get_universe_exposure(start_date=dt.date(2022, 4, 4),
+                                           end_date=dt.date(2022, 4, 5),
+                                           assets=DataAssetsRequest(UniverseIdentifier.gsid, universe),
+                                           format=ReturnFormat.DATA_FRAME)
+    expected = pd.DataFrame([[0.3, np.nan], [1.3, 1.4], [0.1, 0.2], [1.1, 1.2]],
+                            index=pd.MultiIndex.from_tuples([('232128', '2022-04-04'), ('232128', '2022-04-05'),
+                                                             ('904026', '2022-04-04'), ('904026', '2022-04-05')]),
+                            columns=['1', '2'])
+    pd.testing.assert_frame_equal(response, expected)
+
+    response = model.get_universe_exposure(start_date=dt.date(2022, 4, 4),
+                                           end_date=dt.date(2022, 4, 5),
+                                           assets=DataAssetsRequest(UniverseIdentifier.gsid, universe),
+                                           format=ReturnFormat.JSON)
+    assert response == {
+        '232128': {'2022-04-04': {'1': 0.3}, '2022-04-05': {'1': 1.3, '2': 1.4}},
+        '904026': {'2022-04-04': {'1': 0.1, '2': 0.2}, '2022-04-05': {'1': 1.1, '2': 1.2}}
+    }
+
+
+def test_get_specific_risk(mocker):
+    model = mock_risk_model(mocker)
+    results = {
+        'results': [
+            {
+                'date': '2022-04-04',
+                'assetData': {'universe': ['904026', '232128'], 'specificRisk': [1.0, 2.0]}
+            },
+            {
+                'date': '2022-04-05',
+                'assetData': {'universe': ['232128', '24985'], 'specificRisk': [2.5, 3.5]}
+            }
+        ],
+        'totalResults': 2
+    }
+    mocker.patch.object(GsSession.current, '_post', return_value=results)
+
+    response = model.get_specific_risk(start_date=dt.date(2022, 4, 4),
+                                       end_date=dt.date(2022, 4, 5),
+                                       format=ReturnFormat.DATA_FRAME)
+    expected = pd.DataFrame({'904026': [1.0, np.nan], '232128': [2.0, 2.5]},
+                            index=pd.Index(['2022-04-04', '2022-04-05'], dtype=object))
+    pd.testing.assert_frame_equal(response, expected)
+
+    response = model.get_specific_risk(start_date=dt.date(2022, 4, 4),
+                                       end_date=dt.date(2022, 4, 5),
+                                       format=ReturnFormat.JSON)
+    assert response == {'904026': {'2022-04-04': 1.0}, '232128': {'2022-04-04': 2.0, '2022-04-05': 2.5}}
+
+
+def mock_risk_model_data(model_id, start_date, end_date, **kwargs):
+    dates = pd.bdate_range(start_date, end_date).strftime('%Y-%m-%d')
+    return {
+        'missingDates': [d for d in dates if d.endswith('-05')],
+        'results': [{'date': d, 'assetData': {'universe': ['904026'], 'specificRisk': [float(d[-2:])]}}
+                    for d in dates if not d.endswith('-05')],
+        'totalResults': len([d for d in dates if not d.endswith('-05')])
+    }
+
+
+def test_get_data_by_date_windows(mocker):
+    model = mock_risk_model(mocker)
+    get_data = mocker.patch.object(GsFactorRiskModelApi, 'get_risk_model_data', side_effect=mock_risk_model_data)
+    measures = [Measure.Specific_Risk, Measure.Asset_Universe]
+    assets = DataAssetsRequest(UniverseIdentifier.gsid, ['904026'])
+
+    response = model.get_data(measures, dt.date(2022, 1, 3), dt.date(2022, 1, 31), assets=assets,
+                              max_dates_per_request=5)
+    windows = sorted((c[1]['start_date'], c[1]['end_date']) for c in get_data.call_args_list)
+    assert windows == [(dt.date(2022, 1, 3), dt.date(2022, 1, 9)), (dt.date(2022, 1, 10), dt.date(2022, 1, 16)),
+                       (dt.date(2022, 1, 17), dt.date(2022, 1, 23)), (dt.date(2022, 1, 24), dt.date(2022, 1, 30)),
+                       (dt.date(2022, 1, 31), dt.date(2022, 1, 31))]
+    assert response == mock_risk_model_data('model_id', dt.date(2022, 1, 3), dt.date(2022, 1, 31))
+
+    # short ranges are requested at once, up to the last date of the model by default
+    get_data.reset_mock()
+    model.get_data(measures, dt.date(2022, 1, 3), dt.date(2022, 1, 31), assets=assets)
+    get_data.assert_called_once_with(model_id='model_id', start_date=dt.date(2022, 1, 3),
+                                     end_date=dt.date(2022, 1, 31), assets=assets, measures=measures,
+                                     limit_factors=True)
+
+    get_data.reset_mock()
+    mocker.patch.object(GsRiskModelApi, 'get_risk_model_dates', return_value=['2022-01-03', '2022-01-14'])
+    response = model.get_data(measures, dt.date(2022, 1, 3), assets=assets, max_dates_per_request=5)
+    assert get_data.call_count == 2
+    assert response == mock_risk_model_data('model_id', dt.date(2022, 1, 3), dt.date(2022, 1, 14))
+
+
+def test_get_data_by_date_windows_retried(mocker):
+    model = mock_risk_model(mocker)
+    sleep = mocker.patch('gs_quant.models.risk_model_utils.sleep')
+    failures = {dt.date(2022, 1, 10): 1, dt.date(2022, 1, 17): 3}
+
+    def flaky_risk_model_data(model_id, start_date, end_date, **kwargs):
+        if failures.get(start_date):
+            failures[start_date] -= 1
+            raise MqRequestError(504, 'gateway timeout')
+        return mock_risk_model_data(model_id, start_date, end_date)
+
+    mocker.patch.object(GsFactorRiskModelApi, 'get_risk_model_data', side_effect=flaky_risk_model_data)
+    response = model.get_data([Measure.Specific_Risk], dt.date(2022, 1, 3), dt.date(2022, 1, 16),
+                              max_dates_per_request=5)
+    assert response == mock_risk_model_data('model_id', dt.date(2022, 1, 3), dt.date(2022, 1, 16))
+    assert sleep.call_count == 1
+
+    with pytest.raises(MqRequestError) as e:
+        model.get_data([Measure.Specific_Risk], dt.date(2022, 1, 3), dt.date(2022, 1, 23), max_dates_per_request=5,
+                       max_concurrent_requests=1)
+    assert e.value.status == 504
+    assert '2022-01-17 and 2022-01-23' in e.value.message
+
+
+def test_get_data_single_window_not_retried(mocker):
+    model = mock_risk_model(mocker)
+    sleep = mocker.patch('gs_quant.models.risk_model_utils.sleep')
+    get_data = mocker.patch.object(GsFactorRiskModelApi, 'get_risk_model_data',
+                                   side_effect=MqRequestError(503, 'service unavailable'))
+    with pytest.raises(MqRequestError) as e:
+        model.get_data([Measure.Specific_Risk], dt.date(2022, 1, 3), dt.date(2022, 1, 7), max_dates_per_request=5)
+    assert e.value.status == 503
+    assert get_data.call_count == 1
+    assert sleep.call_count == 0
+
+    # split windows retry only errors of the service
+    get_data.reset_mock(side_effect=True)
+    get_data.side_effect = ValueError('bad response')
+    with pytest.raises(ValueError):
+        model.get_data([Measure.Specific_Risk], dt.date(2022, 1, 3), dt.date(2022, 1, 16), max_dates_per_request=5,
+                       max_concurrent_requests=1)
+    assert get_data.call_count == 1
+    assert sleep.call_count == 0
+
+
+def test_get_dates_per_request():
+    assert get_dates_per_request([Measure.Universe_Factor_Exposure, Measure.Asset_Universe]) == 4
+    assert get_dates_per_request([Measure.Specific_Risk, Measure.Asset_Universe], 1) == 2500000
+    assert get_dates_per_request([Measure.Covariance_Matrix, Measure.Factor_Name], factor_count=1000) == 4
+
+
+def mock_upload_data(date: str) -> dict:
+    universe = ['904026', '232128', '24985']
+    return {
+        'date': date,
+        'factorData': [{'factorId': '1', 'factorName': 'Factor1', 'factorCategory': 'Style',
+                        'factorCategoryId': 'RI', 'factorReturn': 0.1}],
+        'covarianceMatrix': [[0.2]],
+        'assetData': {'universe': universe, 'specificRisk': [1.0, 2.0, 3.0],
+                      'factorExposure': [{'1': 0.1}, {'1': 0.2}, {'1': 0.3}]}
+    }
+
+
+def uploaded_batches(upload: mock.Mock) -> list:
+    return [(c[1]['model_data']['date'], 'factorData' if 'factorData' in c[1]['model_data'] else
+             tuple(c[1]['model_data']['assetData']['universe'])) for c in upload.call_args_list]
+
+
+def test_upload_data_in_batches(mocker):
+    model = mock_risk_model(mocker)
+    upload = mocker.patch.object(GsFactorRiskModelApi, 'upload_risk_model_data', return_value='Success')
+    dates = ['2022-04-04', '2022-04-05']
+
+    model.upload_data([mock_upload_data(d) for d in dates], max_asset_batch_size=2)
+    batches = uploaded_batches(upload)
+    assert sorted(batches[:2]) == [(d, 'factorData') for d in dates]
+    assert sorted(batches[2:]) == [(d, u) for d in dates for u in (('24985',), ('904026', '232128'))]
+    for c in upload.call_args_list[2:]:
+        assert c[1]['partial_upload'] and c[1]['target_universe_size'] == 3
+    assert upload.call_args_list[0][1]['model_data'].keys() == {'date', 'factorData', 'covarianceMatrix'}
+
+    # small universes are uploaded whole
+    upload.reset_mock()
+    model.upload_data(mock_upload_data(dates[0]))
+    upload.assert_called_once_with(model_id='model_id', model_data=mock_upload_data(dates[0]))
+
+
+def test_upload_data_resumed(mocker, tmp_path):
+    model = mock_risk_model(mocker)
+    checkpoint = str(tmp_path / 'upload.checkpoint')
+    dates = ['2022-04-04', '2022-04-05']
+
+    def failing_upload(model_id, model_data, **kwargs):
+        if model_data['date'] == dates[1] and '24985' in model_data.get('assetData', {}).get('universe', ()):
+            raise MqRequestError(400, 'invalid data')
+        return 'Success'
+
+    upload = mocker.patch.object(GsFactorRiskModelApi, 'upload_risk_model_data', side_effect=failing_upload)
+    with pytest.raises(MqRequestError):
+        model.upload_data([mock_upload_data(d) for d in dates], max_asset_batch_size=2, max_in_flight=1,
+                          checkpoint=checkpoint)
+    assert uploaded_batches(upload)[-1] == (dates[1], ('24985',))
+
+    upload = mocker.patch.object(GsFactorRiskModelApi, 'upload_risk_model_data', return_value='Success')
+    model.upload_data([mock_upload_data(d) for d in dates], max_asset_batch_size=2, checkpoint=checkpoint)
+    assert uploaded_batches(upload) == [(dates[1], ('24985',))]
+
+    upload.reset_mock()
+    model.upload_data([mock_upload_data(d) for d in dates], max_asset_batch_size=2, checkpoint=checkpoint)
+    upload.assert_not_called()
+
+
+def test_upload_asset_coverage_data(mocker):
+    model = mock_risk_model(mocker)
+    mocker.patch.object(model, 'get_asset_universe', return_value={dt.date(2022, 4, 5): [str(i) for i in range(2500)]})
+    upload = mocker.patch.object(GsDataApi, 'upload_data', return_value={})
+
+    model.upload_asset_coverage_data(dt.date(2022, 4, 5))
+    assert sorted(len(c[1]['data']) for c in upload.call_args_list) == [500, 1000, 1000]
+    assert {r['gsid'] for c in upload.call_args_list for r in c[1]['data']} == {str(i) for i in range(2500)}
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
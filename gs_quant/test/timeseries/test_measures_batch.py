@@ -0,0 +1,111 @@
+"""
+Copyright 2021 Goldman Sachs.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+import datetime as dt
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+import gs_quant.timeseries.measures as tm
+from gs_quant.api.gs.data import GsDataApi, MarketDataResponseFrame
+from gs_quant.data import DataContext
+from gs_quant.errors import MqValueError
+from gs_quant.test.api.test_risk import set_session
+from gs_quant.timeseries.measures_batch import MarketDataBatch
+
+DATES = pd.date_range('2021-01-04', '2021-01-06')
+
+
+def mock_market_data(query, request_id=None):
+    asset_ids = query['queries'][0]['entityIds']
+    if 'MA_MISSING' in asset_ids:
+        raise MqValueError('no data for MA_MISSING')
+
+    df = MarketDataResponseFrame({'assetId': [a for a in asset_ids for _ in DATES],
+                                  'optionPremium': [float(a[3:]) for a in asset_ids for _ in DATES]},
+                                 index=DATES.append([DATES] * (len(asset_ids) - 1)))
+    df.dataset_ids = ('CDS_OPTIONS',)
+    return df
+
+
+def mock_asset(marquee_id: str) -> mock.Mock:
+    return mock.Mock(get_marquee_id=mock.Mock(return_value=marquee_id))
+
+
+def test_measure_over_assets():
+    set_session()
+    assets = [mock_asset(f'MA_{i}') for i in range(12)]
+    with mock.patch.object(GsDataApi, 'get_market_data', side_effect=mock_market_data) as get_data, \
+            DataContext(DATES[0], DATES[-1]):
+        results = tm.option_premium_credit.over(assets, '3m', tm.CdsVolReference.FORWARD, 0)
+        singles = [tm.option_premium_credit(a, '3m', tm.CdsVolReference.FORWARD, 0) for a in assets[:2]]
+
+    # combined into queries of at most 5 assets
+    assert sorted(len(c[0][0]['queries'][0]['entityIds']) for c in get_data.call_args_list[:3]) == [2, 5, 5]
+    assert get_data.call_count == 3 + 2
+    assert list(results) == assets
+    for i, asset in enumerate(assets):
+        series = results[asset]
+        assert list(series.index) == list(DATES)
+        assert (series == i).all()
+        assert series.dataset_ids == ('CDS_OPTIONS',)
+    for asset, single in zip(assets, singles):
+        pd.testing.assert_series_equal(results[asset], single, check_freq=False)
+
+
+def test_measure_over_failures():
+    set_session()
+    assets = [mock_asset('MA_1'), mock_asset('MA_MISSING'), mock_asset('MA_2')]
+
+    def option_premium_or_error(asset):
+        try:
+            return tm.option_premium_credit(asset, '3m', tm.CdsVolReference.FORWARD, 0)
+        except MqValueError as e:
+            return e
+
+    with mock.patch.object(GsDataApi, 'get_market_data', side_effect=mock_market_data) as get_data, \
+            DataContext(dt.date(2021, 1, 4), dt.date(2021, 1, 6)):
+        results = MarketDataBatch(chunk_size=5).evaluate(option_premium_or_error, assets)
+        assert results[0].tolist() == [1.0] * 3
+        assert isinstance(results[1], MqValueError)
+        assert results[2].tolist() == [2.0] * 3
+
+        # the combined query failed, so each was sent separately
+        assert [c[0][0]['queries'][0]['entityIds'] for c in get_data.call_args_list] == \
+            [['MA_1', 'MA_MISSING', 'MA_2'], ['MA_1'], ['MA_MISSING'], ['MA_2']]
+
+        # errors are returned in place of results, or raised once all have completed
+        results = MarketDataBatch(chunk_size=5).evaluate(
+            lambda asset: tm.option_premium_credit(asset, '3m', tm.CdsVolReference.FORWARD, 0), assets)
+        assert isinstance(results[1], MqValueError)
+        assert results[2].tolist() == [2.0] * 3
+        with pytest.raises(MqValueError):
+            MarketDataBatch(chunk_size=5).evaluate(
+                lambda asset: tm.option_premium_credit(asset, '3m', tm.CdsVolReference.FORWARD, 0), assets,
+                errors='raise')
+
+        # assets in error are left out of the results
+        results = tm.option_premium_credit.over(assets, '3m', tm.CdsVolReference.FORWARD, 0)
+        assert list(results) == [assets[0], assets[2]]
+        assert results[assets[2]].tolist() == [2.0] * 3
+        with pytest.raises(MqValueError):
+            tm.option_premium_credit.over(assets, '3m', tm.CdsVolReference.FORWARD, 0, errors='raise')
+
+    with pytest.raises(ValueError):
+        MarketDataBatch(chunk_size=0)
+    with pytest.raises(ValueError):
+        MarketDataBatch().evaluate(len, [], errors='ignore')
@@ -0,0 +1,181 @@
+"""
+Copyright 2021 Goldman Sachs.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+import datetime as dt
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+from gs_quant.api.gs.data import GsDataApi, MarketDataResponseFrame, QueryType
+from gs_quant.data import DataContext
+from gs_quant.timeseries.measures import _market_data_timed
+from gs_quant.timeseries.measures_cache import MarketDataCache
+
+
+@pytest.fixture(autouse=True)
+def market_data_cache():
+    MarketDataCache.configure()
+    MarketDataCache.reset_stats()
+    yield
+    MarketDataCache.configure()
+
+
+def mock_market_data(query, request_id=None):
+    inner = query['queries'][0]
+    dates = pd.date_range(inner['startDate'], inner['endDate'])
+    df = MarketDataResponseFrame({'impliedVolatility': dates.day.astype(float), 'tenor': '1m'}, index=dates)
+    df.dataset_ids = ('EDRVOL_PERCENT_STANDARD',)
+    return df
+
+
+def build_query(start: dt.date, end: dt.date, tenor: str = '1m') -> dict:
+    with DataContext(start, end):
+        return GsDataApi.build_market_data_query(['MA4B66MW5E27U8P32SB'], QueryType.IMPLIED_VOLATILITY,
+                                                 where={'tenor': tenor})
+
+
+def fetched_windows(get_data: mock.Mock) -> list:
+    return [(c[0][0]['queries'][0]['startDate'], c[0][0]['queries'][0]['endDate']) for c in get_data.call_args_list]
+
+
+def test_identical_queries_coalesced():
+    release = threading.Event()
+
+    def slow_market_data(query, request_id=None):
+        release.wait(5)
+        return mock_market_data(query)
+
+    query = build_query(dt.date(2021, 1, 1), dt.date(2021, 1, 10))
+    with mock.patch.object(GsDataApi, 'get_market_data', side_effect=slow_market_data) as get_data, \
+            ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(_market_data_timed, query) for _ in range(4)]
+        while MarketDataCache.stats()['coalesced'] < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert get_data.call_count == 1
+    assert MarketDataCache.stats() == {'hits': 0, 'fetches': 1, 'coalesced': 3}
+    for result in results:
+        pd.testing.assert_frame_equal(result, results[0])
+        assert result.dataset_ids == ('EDRVOL_PERCENT_STANDARD',)
+    assert len({id(r) for r in results}) == 4
+
+    # results are not kept unless configured
+    with mock.patch.object(GsDataApi, 'get_market_data', side_effect=mock_market_data) as get_data:
+        _market_data_timed(query)
+    assert get_data.call_count == 1
+
+
+def test_coalesced_errors():
+    release = threading.Event()
+
+    def failing_market_data(query, request_id=None):
+        release.wait(5)
+        raise RuntimeError('unavailable')
+
+    query = build_query(dt.date(2021, 1, 1), dt.date(2021, 1, 10))
+    with mock.patch.object(GsDataApi, 'get_market_data', side_effect=failing_market_data), \
+            ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(_market_data_timed, query) for _ in range(2)]
+        while MarketDataCache.stats()['coalesced'] < 1:
+            threading.Event().wait(0.01)
+        release.set()
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result()
+
+
+@pytest.mark.parametrize('ttl', [0, 300])
+def test_concurrent_windows_fetched_separately(ttl):
+    MarketDataCache.configure(ttl=ttl)
+    both_in_flight = threading.Barrier(2)
+
+    def concurrent_market_data(query, request_id=None):
+        both_in_flight.wait(5)
+        return mock_market_data(query)
+
+    january = build_query(dt.date(2021, 1, 1), dt.date(2021, 1, 31))
+    june = build_query(dt.date(2021, 6, 1), dt.date(2021, 6, 30))
+    with mock.patch.object(GsDataApi, 'get_market_data', side_effect=concurrent_market_data) as get_data, \
+            ThreadPoolExecutor(max_workers=2) as executor:
+        results = [f.result() for f in [executor.submit(_market_data_timed, q) for q in (january, june)]]
+
+    assert sorted(fetched_windows(get_data)) == [(dt.date(2021, 1, 1), dt.date(2021, 1, 31)),
+                                                 (dt.date(2021, 6, 1), dt.date(2021, 6, 30))]
+    assert MarketDataCache.stats()['coalesced'] == 0
+    for query, result in zip((january, june), results):
+        pd.testing.assert_frame_equal(result, mock_market_data(query))
+
+
+def test_windows_merged():
+    MarketDataCache.configure(ttl=60)
+    with mock.patch.object(GsDataApi, 'get_market_data', side_effect=mock_market_data) as get_data:
+        first = _market_data_timed(build_query(dt.date(2021, 1, 5), dt.date(2021, 1, 10)), 'request')
+        assert fetched_windows(get_data) == [(dt.date(2021, 1, 5), dt.date(2021, 1, 10))]
+        assert get_data.call_args[0][1] == 'request'
+        assert list(first.impliedVolatility) == [5, 6, 7, 8, 9, 10]
+
+        # within the window cached
+        inner = _market_data_timed(build_query(dt.date(2021, 1, 6), dt.date(2021, 1, 8)))
+        assert get_data.call_count == 1
+        assert list(inner.impliedVolatility) == [6, 7, 8]
+        assert inner.dataset_ids == ('EDRVOL_PERCENT_STANDARD',)
+
+        # extending the window fetches only the dates missing
+        extended = _market_data_timed(build_query(dt.date(2021, 1, 1), dt.date(2021, 1, 20)))
+        assert fetched_windows(get_data)[1:] == [(dt.date(2021, 1, 1), dt.date(2021, 1, 4)),
+                                                 (dt.date(2021, 1, 11), dt.date(2021, 1, 20))]
+        pd.testing.assert_frame_equal(extended, mock_market_data(build_query(dt.date(2021, 1, 1),
+                                                                             dt.date(2021, 1, 20))))
+        assert extended.dataset_ids == ('EDRVOL_PERCENT_STANDARD',)
+
+        # callers may modify their results
+        extended['impliedVolatility'] = 0
+        assert list(_market_data_timed(build_query(dt.date(2021, 1, 1), dt.date(2021, 1, 2))).impliedVolatility) == \
+            [1, 2]
+
+        # other queries and disjoint windows are fetched in full
+        _market_data_timed(build_query(dt.date(2021, 1, 1), dt.date(2021, 1, 20), tenor='2m'))
+        _market_data_timed(build_query(dt.date(2021, 3, 1), dt.date(2021, 3, 5)))
+        assert fetched_windows(get_data)[3:] == [(dt.date(2021, 1, 1), dt.date(2021, 1, 20)),
+                                                 (dt.date(2021, 3, 1), dt.date(2021, 3, 5))]
+        assert MarketDataCache.stats() == {'hits': 2, 'fetches': 5, 'coalesced': 0}
+
+
+def test_results_expire():
+    MarketDataCache.configure(ttl=60, max_size=1)
+    query = build_query(dt.date(2021, 1, 1), dt.date(2021, 1, 10))
+    with mock.patch.object(GsDataApi, 'get_market_data', side_effect=mock_market_data) as get_data, \
+            mock.patch('gs_quant.timeseries.measures_cache.time.time', return_value=1000):
+        _market_data_timed(query)
+        _market_data_timed(query)
+        assert get_data.call_count == 1
+
+        with mock.patch('gs_quant.timeseries.measures_cache.time.time', return_value=1061):
+            _market_data_timed(query)
+        assert get_data.call_count == 2
+
+        # the least recently used query is discarded
+        _market_data_timed(build_query(dt.date(2021, 1, 1), dt.date(2021, 1, 10), tenor='2m'))
+        _market_data_timed(query)
+        assert get_data.call_count == 4
+
+    with pytest.raises(ValueError):
+        MarketDataCache.configure(ttl=-1)
@@ -331,6 +331,22 @@ def test_std():
 
     assert std(pd.Series(dtype=float)).empty
 
+    # large level relative to the dispersion, with a gap in the data
+    dates = pd.bdate_range('2019-01-01', periods=100)
+    x = pd.Series(1e6 + np.random.default_rng(0).normal(size=100) * 0.01, index=dates)
+    x[50] = np.nan
+    offset = pd.DateOffset(months=1)
+    values = [x.loc[(x.index > idx - offset) & (x.index <= idx)].std(skipna=False) for idx in dates]
+    assert_series_equal(std(x, Window('1m', 0)), pd.Series(values, index=dates), obj="std window 1m")
+
+    # long trending series, against the standard deviation of each window
+    size = 200_000
+    rng = np.random.default_rng(0)
+    x = pd.Series(1e4 + np.arange(size) * 0.5 + rng.normal(size=size),
+                  index=pd.date_range('2000-01-01', periods=size, freq='H'))
+    exact = np.lib.stride_tricks.sliding_window_view(x.values, 24).std(axis=1, ddof=1)
+    np.testing.assert_allclose(std(x, Window('1d', 0)).values[23:], exact, rtol=1e-10)
+
 
 def test_exponential_std():
     def exp_std_calc(ts, alpha=0.75):
@@ -531,6 +547,35 @@ def test_percentiles():
         percentiles(x, pd.Series(dtype=float), Window(6, 1))
 
 
+def test_percentiles_matches_percentileofscore():
+    from scipy.stats import percentileofscore
+
+    dates = pd.bdate_range('2019-01-01', periods=40)
+    x = pd.Series(np.random.default_rng(0).integers(0, 6, len(dates)).astype(float), index=dates)
+    y = pd.Series(np.random.default_rng(1).integers(0, 12, len(dates)) / 2, index=dates)
+
+    for w in (1, 5, 40):
+        expected = pd.Series([percentileofscore(x[:d][-w:], v, kind='mean') for d, v in y.items()], index=dates)
+        assert_series_equal(percentiles(x, y, Window(w, 0)), expected, check_freq=False, obj=f'window {w}')
+        # each value ranked within its own window
+        expected = pd.Series([percentileofscore(x[:d][-w:], v, kind='mean') for d, v in x.items()], index=dates)
+        assert_series_equal(percentiles(x, w=Window(w, 0)), expected, check_freq=False, obj=f'own window {w}')
+
+    expected = pd.Series([percentileofscore(x[d - pd.DateOffset(weeks=2) + pd.DateOffset(days=1):d], v, kind='mean')
+                          for d, v in y.items()], index=dates)
+    assert_series_equal(percentiles(x, y, Window('2w', 0)), expected, check_freq=False, obj='window 2w')
+    assert_series_equal(percentiles(x, w=Window('2w', 0)), percentiles(x, x.copy(), Window('2w', 0)),
+                        obj='own window 2w')
+
+    # NaNs count towards the window size but never rank below a score
+    x_nan = x.copy()
+    x_nan.iloc[::7] = np.nan
+    result = percentiles(x_nan, y, Window(5, 0))
+    assert result.iloc[0] == 0
+    assert result.iloc[7] == percentileofscore(x[3:8].where(x_nan[3:8].notna(), np.inf), y.iloc[7], kind='mean')
+    assert np.isnan(percentiles(x, y.where(y > 1), Window(5, 0))).sum() == (y <= 1).sum()
+
+
 def test_percentile():
     with pytest.raises(MqError):
         percentile(pd.Series(dtype=float), -1)
@@ -562,6 +607,31 @@ def test_percentile_str():
     assert_series_equal(actual, expected)
 
 
+def test_time_window_statistics():
+    dates = pd.bdate_range('2018-01-01', periods=300)
+    values = np.random.default_rng(0).normal(size=300)
+    values[::17] = np.nan
+    x = pd.Series(values, index=dates)
+    y = pd.Series(np.random.default_rng(1).normal(size=300), index=dates)
+    offset = pd.DateOffset(months=3)
+
+    def expected(fn):
+        values = [fn(x.loc[(x.index > idx - offset) & (x.index <= idx)]) for idx in x.index]
+        return pd.Series(values, index=dates, dtype=float)
+
+    assert_series_equal(min_(x, Window('3m', 0)), expected(pd.Series.min), check_names=False)
+    assert_series_equal(max_(x, Window('3m', 0)), expected(pd.Series.max), check_names=False)
+    assert_series_equal(mean(x, Window('3m', 0)), expected(pd.Series.mean), check_names=False)
+    assert_series_equal(median(x, Window('3m', 0)), expected(pd.Series.median), check_names=False)
+    assert_series_equal(sum_(x, Window('3m', 0)), expected(pd.Series.sum), check_names=False)
+    assert_series_equal(var(x, Window('3m', 0)), expected(pd.Series.var), check_names=False)
+    assert_series_equal(cov(x, y, Window('3m', 0)), expected(lambda s: s.cov(y)), check_names=False)
+
+    x = x.dropna()
+    quantiles = [x.loc[(x.index > idx - offset) & (x.index <= idx)].quantile(0.25) for idx in x.index]
+    assert_series_equal(percentile(x, 25, Window('3m', 0)), pd.Series(quantiles, index=x.index), check_names=False)
+
+
 def test_regression():
     x1 = pd.Series([0.0, 1.0, 4.0, 9.0, 16.0, 25.0, np.nan], index=pd.date_range('2019-1-1', periods=7), name='x1')
     x2 = pd.Series([0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0], index=pd.date_range('2019-1-1', periods=8))
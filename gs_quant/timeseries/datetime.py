@@ -21,7 +21,7 @@ import numpy as np
 
 from .helper import *
 from .helper import _create_enum
-from ..datetime.date import DayCountConvention, PaymentFrequency, day_count_fraction
+from ..datetime.date import DayCountConvention, PaymentFrequency, consecutive_day_count_fractions
 from ..datetime.date import date_range as _date_range
 from ..errors import MqValueError, MqTypeError
 
@@ -451,11 +451,8 @@ def day_count_fractions(
     if len(date_list) < 2:
         return pd.Series(dtype=float)
 
-    start_dates = date_list[0:-1]
-    end_dates = date_list[1:len(date_list)]
-
-    dcfs = map(lambda a, b: day_count_fraction(a, b, convention, frequency), start_dates, end_dates)
-    return pd.Series(data=[np.NaN] + list(dcfs), index=date_list[0:len(date_list)])
+    dcfs = consecutive_day_count_fractions(date_list, convention, frequency)
+    return pd.Series(data=np.concatenate(([np.NaN], dcfs)), index=date_list[0:len(date_list)])
 
 
 @plot_function
@@ -25,7 +25,7 @@ from statsmodels.tsa.arima_model import ARIMA
 from statsmodels.tools.eval_measures import mse
 from gs_quant.api.gs.data import GsDataApi
 from gs_quant.data import DataContext
-from gs_quant.datetime.date import DayCountConvention
+from gs_quant.datetime.date import DayCountConvention, consecutive_day_count_fractions
 from gs_quant.markets.securities import Asset
 from gs_quant.target.common import Currency
 from gs_quant.timeseries.datetime import align
@@ -58,21 +58,18 @@ class SharpeAssets(Enum):
 def excess_returns_pure(price_series: pd.Series, spot_curve: pd.Series) -> pd.Series:
     curve, bench_curve = align(price_series, spot_curve, Interpolate.INTERSECT)
 
-    e_returns = [curve.iloc[0]]
-    for i in range(1, len(curve)):
-        multiplier = 1 + curve.iloc[i] / curve.iloc[i - 1] - bench_curve.iloc[i] / bench_curve.iloc[i - 1]
-        e_returns.append(e_returns[-1] * multiplier)
-    return pd.Series(e_returns, index=curve.index)
+    values, bench_values = curve.values, bench_curve.values
+    multipliers = 1 + values[1:] / values[:-1] - bench_values[1:] / bench_values[:-1]
+    return pd.Series(np.cumprod(np.concatenate(([curve.iloc[0]], multipliers))), index=curve.index)
 
 
 def excess_returns(price_series: pd.Series, benchmark_or_rate: Union[Asset, Currency, float], *,
                    day_count_convention=DayCountConvention.ACTUAL_360) -> pd.Series:
     if isinstance(benchmark_or_rate, float):
-        er = [price_series.iloc[0]]
-        for j in range(1, len(price_series)):
-            fraction = day_count_fraction(price_series.index[j - 1], price_series.index[j], day_count_convention)
-            er.append(er[-1] + price_series.iloc[j] - price_series.iloc[j - 1] * (1 + benchmark_or_rate * fraction))
-        return pd.Series(er, index=price_series.index)
+        fractions = consecutive_day_count_fractions(price_series.index, day_count_convention)
+        values = price_series.values
+        changes = values[1:] - values[:-1] * (1 + benchmark_or_rate * fractions)
+        return pd.Series(np.cumsum(np.concatenate(([price_series.iloc[0]], changes))), index=price_series.index)
 
     if isinstance(benchmark_or_rate, Currency):
         try:
@@ -438,15 +435,9 @@ def change(x: pd.Series) -> pd.Series:
 
 
 def _get_annualization_factor(x):
-    prev_idx = x.index[0]
-    distances = []
-
-    for idx, value in x.iloc[1:].iteritems():
-        d = (idx - prev_idx).days
-        if d == 0:
-            raise MqValueError('multiple data points on same date')
-        distances.append(d)
-        prev_idx = idx
+    distances = numpy.diff(pd.DatetimeIndex(x.index).values) // numpy.timedelta64(1, 'D')
+    if (distances == 0).any():
+        raise MqValueError('multiple data points on same date')
 
     average_distance = numpy.average(distances)
     if average_distance < 2.1:
@@ -18,7 +18,7 @@ import inspect
 import logging
 import os
 from enum import Enum, IntEnum
-from functools import wraps
+from functools import partial, wraps
 from typing import Optional, Union, List, Iterable
 
 import pandas as pd
@@ -29,6 +29,7 @@ from gs_quant.datetime.relative_date import RelativeDate
 from gs_quant.entities.entity import EntityType
 from gs_quant.errors import MqValueError
 from gs_quant.timeseries.measure_registry import register_measure
+from gs_quant.timeseries.measures_batch import evaluate_over
 
 ENABLE_DISPLAY_NAME = 'GSQ_ENABLE_MEASURE_DISPLAY_NAME'
 USE_DISPLAY_NAME = os.environ.get(ENABLE_DISPLAY_NAME) == "1"
@@ -198,8 +199,10 @@ def plot_measure(asset_class: tuple, asset_type: Optional[tuple] = None,
 
             multi_measure = register_measure(fn)
             multi_measure.entity_type = EntityType.ASSET
+            multi_measure.over = partial(evaluate_over, multi_measure)
             return multi_measure
         else:
+            fn.over = partial(evaluate_over, fn)
             return fn
     return decorator
 
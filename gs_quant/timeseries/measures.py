@@ -39,6 +39,7 @@ from gs_quant.markets.securities import Asset, AssetIdentifier, SecurityMaster,
 from gs_quant.target.common import AssetClass, AssetType
 from gs_quant.timeseries import volatility, Window, Returns, sqrt, Basket, RelativeDate
 from gs_quant.timeseries.helper import log_return, plot_measure, _to_offset, check_forward_looking, get_df_with_retries
+from gs_quant.timeseries.measures_batch import MarketDataBatch
 from gs_quant.timeseries.measures_helper import EdrDataReference, VolReference, preprocess_implied_vol_strikes_eq
 
 GENERIC_DATE = Union[datetime.date, str]
@@ -515,8 +516,7 @@ def _range_from_pricing_date(exchange, pricing_date: Optional[GENERIC_DATE] = No
 
 
 def _market_data_timed(q, request_id=None):
-    args = [q, request_id] if request_id else [q]
-    return GsDataApi.get_market_data(*args)
+    return MarketDataBatch.get_market_data(q, request_id)
 
 
 def _extract_series_from_df(df: pd.DataFrame, query_type: QueryType, handle_missing_column=False):
@@ -0,0 +1,262 @@
+"""
+Copyright 2021 Goldman Sachs.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+import copy
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import pandas as pd
+
+from gs_quant.api.gs.data import MarketDataResponseFrame
+from gs_quant.api.utils import ThreadPoolManager
+from gs_quant.data import DataContext
+from gs_quant.session import GsSession
+from gs_quant.timeseries.measures_cache import MarketDataCache
+
+_logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class _Pending(NamedTuple):
+    query: dict
+    request_id: Optional[str]
+    future: Future
+
+
+class MarketDataBatch:
+    """
+    Combines the market data queries of measures evaluated for many assets at once
+
+    Measures are evaluated for each asset on a pool of threads. Their market data queries are held until every thread
+    is waiting for one, or for linger seconds, then queries differing only in their assets are sent together, with at
+    most chunk_size assets each. The results are split by asset id and returned to each thread
+    """
+
+    def __init__(self, chunk_size: int = 5, linger: float = 0.05):
+        """
+        :param chunk_size: the maximum number of assets in a market data query
+        :param linger: the number of seconds for which to hold queries while some threads are busy
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+
+        self.__chunk_size = chunk_size
+        self.__linger = linger
+        self.__condition = threading.Condition()
+        self.__remaining = 0
+        self.__max_workers = 1
+        self.__closed = False
+        self.__pending: List[_Pending] = []
+        self.__since = 0.
+
+    @staticmethod
+    def current() -> Optional['MarketDataBatch']:
+        return getattr(_local, 'batch', None)
+
+    @classmethod
+    def get_market_data(cls, query: dict, request_id: Optional[str] = None) -> pd.DataFrame:
+        """
+        Get the results of a market data query, combined with others if evaluated as part of a batch
+        """
+        batch = cls.current()
+        if batch is None:
+            return MarketDataCache.get_market_data(query, request_id)
+
+        future = Future()
+        with batch.__condition:
+            if not batch.__pending:
+                batch.__since = time.monotonic()
+            batch.__pending.append(_Pending(query, request_id, future))
+            batch.__condition.notify_all()
+
+        return future.result()
+
+    def evaluate(self, fn: Callable, items: Iterable, max_workers: Optional[int] = None,
+                 errors: str = 'return') -> list:
+        """
+        Call fn for each item, combining the market data queries of concurrent calls
+
+        :param fn: a function of one item
+        :param items: the items
+        :param max_workers: the maximum number of concurrent calls. Defaults to 10 x chunk_size
+        :param errors: 'return' to return the exception raised by a call in place of its result, 'raise' to raise the
+            first once all calls have completed
+        :return: the result of each call
+        """
+        if errors not in ('return', 'raise'):
+            raise ValueError(f'errors must be one of return, raise, not {errors}')
+
+        items = list(items)
+        if not items:
+            return []
+
+        session = GsSession.current if GsSession.current_is_set else None
+        data_context = DataContext.current
+        self.__remaining = len(items)
+        self.__max_workers = max_workers or 10 * self.__chunk_size
+        dispatcher = threading.Thread(target=self.__dispatch_all, args=(session,), daemon=True)
+        dispatcher.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.__max_workers) as executor:
+                futures = [executor.submit(self.__evaluate, session, data_context, fn, i) for i in items]
+                results = [f.exception() or f.result() for f in futures]
+                if errors == 'raise':
+                    error = next((r for r in results if isinstance(r, Exception)), None)
+                    if error is not None:
+                        raise error
+                return results
+        finally:
+            with self.__condition:
+                self.__closed = True
+                self.__condition.notify_all()
+            dispatcher.join()
+
+    def __evaluate(self, session: Optional[GsSession], data_context: DataContext, fn: Callable, item):
+        _local.batch = self
+        try:
+            with session if session is not None else nullcontext(), data_context:
+                return fn(item)
+        finally:
+            _local.batch = None
+            with self.__condition:
+                self.__remaining -= 1
+                self.__condition.notify_all()
+
+    def __ready(self) -> bool:
+        # every thread is waiting for a query, or the earliest has waited long enough
+        running = min(self.__remaining, self.__max_workers)
+        return len(self.__pending) >= running or time.monotonic() - self.__since >= self.__linger
+
+    def __dispatch_all(self, session: Optional[GsSession]):
+        with session if session is not None else nullcontext():
+            while True:
+                with self.__condition:
+                    while not (self.__pending and self.__ready()) and not (self.__closed and not self.__pending):
+                        self.__condition.wait(self.__linger if self.__pending else None)
+                    if not self.__pending:
+                        return
+
+                    pending, self.__pending = self.__pending, []
+
+                try:
+                    self.__dispatch(pending)
+                except Exception as e:
+                    for p in pending:
+                        if not p.future.done():
+                            p.future.set_exception(e)
+
+    def __dispatch(self, pending: List[_Pending]):
+        groups: Dict[str, List[_Pending]] = {}
+        for p in pending:
+            queries = p.query.get('queries', ()) if isinstance(p.query, dict) else ()
+            if len(queries) == 1 and queries[0].get('entityIds'):
+                inner = {k: v for k, v in queries[0].items() if k != 'entityIds'}
+                key = json.dumps([inner, p.request_id], sort_keys=True, default=str)
+            else:
+                key = str(id(p))
+            groups.setdefault(key, []).append(p)
+
+        chunks = []
+        for group in groups.values():
+            chunk, asset_ids = [], set()
+            for p in group:
+                ids = set(p.query['queries'][0]['entityIds']) if len(group) > 1 else set()
+                if chunk and len(asset_ids | ids) > self.__chunk_size:
+                    chunks.append(chunk)
+                    chunk, asset_ids = [], set()
+                chunk.append(p)
+                asset_ids |= ids
+            chunks.append(chunk)
+
+        _logger.debug(f'sending {len(pending)} market data queries as {len(chunks)}')
+        ThreadPoolManager.run_async([partial(self.__fetch, c) for c in chunks])
+
+    @classmethod
+    def __fetch(cls, chunk: List[_Pending]):
+        if len(chunk) == 1:
+            cls.__fetch_one(chunk[0])
+            return
+
+        query = copy.deepcopy(chunk[0].query)
+        query['queries'][0]['entityIds'] = list(dict.fromkeys(i for p in chunk
+                                                              for i in p.query['queries'][0]['entityIds']))
+        try:
+            df = MarketDataCache.get_market_data(query, chunk[0].request_id)
+        except Exception as e:
+            # send queries one by one so that only those in error fail
+            _logger.debug(f'combined market data query failed ({e}), sending separately')
+            df = None
+
+        if df is None or not (df.empty or 'assetId' in df.columns):
+            for p in chunk:
+                cls.__fetch_one(p)
+            return
+
+        dataset_ids = getattr(df, 'dataset_ids', ())
+        for p in chunk:
+            result = MarketDataResponseFrame() if df.empty else \
+                df[df['assetId'].isin(p.query['queries'][0]['entityIds'])].copy()
+            result.dataset_ids = dataset_ids
+            p.future.set_result(result)
+
+    @staticmethod
+    def __fetch_one(p: _Pending):
+        try:
+            p.future.set_result(MarketDataCache.get_market_data(p.query, p.request_id))
+        except Exception as e:
+            p.future.set_exception(e)
+
+
+def evaluate_over(measure: Callable, assets: Iterable, *args, chunk_size: int = 5, max_workers: Optional[int] = None,
+                  errors: str = 'ignore', **kwargs) -> Dict[object, pd.Series]:
+    """
+    Evaluate a measure for many assets, combining their market data queries
+
+    :param measure: the measure, e.g. implied_volatility
+    :param assets: the assets for which to evaluate the measure
+    :param args: positional arguments to the measure, after the asset
+    :param chunk_size: the maximum number of assets in a market data query
+    :param max_workers: the maximum number of assets for which to evaluate the measure at once
+    :param errors: 'ignore' to leave out, and log, assets for which the measure raises an error, e.g. as they have no
+        data, 'raise' to raise the first such error
+    :param kwargs: keyword arguments to the measure
+    :return: the measure for each asset
+
+    **Examples**
+
+    >>> from gs_quant.timeseries.measures import implied_volatility, VolReference
+    >>>
+    >>> vols = implied_volatility.over(assets, '1m', VolReference.DELTA_NEUTRAL)
+    """
+    if errors not in ('ignore', 'raise'):
+        raise ValueError(f'errors must be one of ignore, raise, not {errors}')
+
+    assets = list(assets)
+    results = MarketDataBatch(chunk_size).evaluate(lambda asset: measure(asset, *args, **kwargs), assets, max_workers,
+                                                   errors='return' if errors == 'ignore' else errors)
+    evaluated = {}
+    for asset, result in zip(assets, results):
+        if isinstance(result, Exception):
+            _logger.warning(f'could not evaluate {getattr(measure, "__name__", measure)} for {asset}: {result}')
+        else:
+            evaluated[asset] = result
+    return evaluated
@@ -0,0 +1,230 @@
+"""
+Copyright 2021 Goldman Sachs.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+import copy
+import datetime as dt
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import cachetools
+import pandas as pd
+
+from gs_quant.api.gs.data import GsDataApi, MarketDataResponseFrame
+from gs_quant.data.log import log_debug
+from gs_quant.session import GsSession
+
+_logger = logging.getLogger(__name__)
+
+_WINDOW_FIELDS = ('startDate', 'endDate', 'startTime', 'endTime')
+
+Window = Tuple[dt.date, dt.date]
+
+
+class _Entry(NamedTuple):
+    frame: pd.DataFrame
+    start: dt.date
+    end: dt.date
+    fetched: float
+
+
+class MarketDataCache:
+    """
+    Cache of the market data queries made by measures
+
+    Identical queries made concurrently, e.g. by the threads of a dashboard refresh, are always coalesced into a single
+    request. Once configured with a time to live, results of end of day queries are also kept, keyed on the query
+    without its date window. Later queries within the window cached are answered from it, and queries extending the
+    window fetch only the dates missing from it. Real time queries are never kept
+
+    **Examples**
+
+    >>> from gs_quant.timeseries.measures_cache import MarketDataCache
+    >>>
+    >>> MarketDataCache.configure(ttl=300)
+    >>> with DataContext(dt.date(2021, 1, 4), dt.date(2021, 6, 30)):
+    >>>     vol = implied_volatility(asset, '1m', VolReference.DELTA_NEUTRAL)
+    >>> with DataContext(dt.date(2021, 1, 4), dt.date(2021, 7, 30)):
+    >>>     vol = implied_volatility(asset, '1m', VolReference.DELTA_NEUTRAL)  # fetches July only
+    """
+
+    __ttl = 0
+    __entries = cachetools.LRUCache(256)
+    __in_flight: Dict[tuple, Future] = {}
+    __stats = {'hits': 0, 'fetches': 0, 'coalesced': 0}
+    __lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, ttl: float = 0, max_size: int = 256):
+        """
+        Configure the cache, discarding its contents
+
+        :param ttl: the number of seconds for which to keep query results. 0 keeps none
+        :param max_size: the maximum number of queries for which to keep results, least recently used first out
+        """
+        if ttl < 0:
+            raise ValueError('ttl must not be negative')
+        if max_size < 1:
+            raise ValueError('max_size must be positive')
+
+        with cls.__lock:
+            cls.__ttl = ttl
+            cls.__entries = cachetools.LRUCache(max_size)
+
+    @classmethod
+    def clear(cls):
+        with cls.__lock:
+            cls.__entries.clear()
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        """
+        The number of queries answered from the cache, of requests made and of queries which waited for an identical
+        request in flight
+        """
+        with cls.__lock:
+            return dict(cls.__stats)
+
+    @classmethod
+    def reset_stats(cls):
+        with cls.__lock:
+            cls.__stats = dict.fromkeys(cls.__stats, 0)
+
+    @classmethod
+    def get_market_data(cls, query: dict, request_id: Optional[str] = None) -> pd.DataFrame:
+        """
+        Get the results of a market data query, as GsDataApi.get_market_data
+
+        :param query: a market data query, e.g. built with GsDataApi.build_market_data_query
+        :param request_id: service request id, if any
+        :return: the query results
+        """
+        key, window = cls.__key(query)
+        if window is None or not cls.__ttl:
+            return cls.__fetch(query, request_id)
+
+        with cls.__lock:
+            entry = cls.__entries.get(key)
+        if entry is not None and time.time() - entry.fetched > cls.__ttl:
+            entry = None
+
+        start, end = window
+        if entry is not None and entry.start <= start and end <= entry.end:
+            with cls.__lock:
+                cls.__stats['hits'] += 1
+            log_debug(request_id, _logger, 'market data query answered from cache')
+            return cls.__slice(entry.frame, start, end)
+
+        one_day = dt.timedelta(days=1)
+        if entry is not None and start <= entry.end + one_day and end >= entry.start - one_day:
+            # fetch only the dates either side of those cached
+            parts = []
+            if start < entry.start:
+                parts.append(cls.__fetch_window(query, request_id, start, entry.start - one_day))
+            parts.append(entry.frame)
+            if end > entry.end:
+                parts.append(cls.__fetch_window(query, request_id, entry.end + one_day, end))
+            entry = _Entry(cls.__concat(parts), min(start, entry.start), max(end, entry.end), entry.fetched)
+        else:
+            entry = _Entry(cls.__fetch(query, request_id), start, end, time.time())
+
+        with cls.__lock:
+            cls.__entries[key] = entry
+
+        return cls.__slice(entry.frame, start, end)
+
+    @staticmethod
+    def __session() -> Optional[GsSession]:
+        return GsSession.current if GsSession.current_is_set else None
+
+    @classmethod
+    def __key(cls, query: dict) -> Tuple[tuple, Optional[Window]]:
+        """ The key of the cache entry for a query, without its date window, and the window """
+        session = cls.__session()
+        queries = query.get('queries', ()) if isinstance(query, dict) else ()
+        window = None
+        if len(queries) == 1 and 'startDate' in queries[0] and 'interval' not in queries[0]:
+            try:
+                window = tuple(pd.Timestamp(queries[0][f]).date() for f in ('startDate', 'endDate'))
+            except (KeyError, TypeError, ValueError):
+                window = None
+
+        if window is None:
+            return (session, json.dumps(query, sort_keys=True, default=str)), None
+
+        inner = {k: v for k, v in queries[0].items() if k not in _WINDOW_FIELDS}
+        return (session, json.dumps(inner, sort_keys=True, default=str)), window
+
+    @classmethod
+    def __fetch_window(cls, query: dict, request_id: Optional[str], start: dt.date, end: dt.date) -> pd.DataFrame:
+        query = copy.deepcopy(query)
+        query['queries'][0].update(startDate=start, endDate=end)
+        return cls.__fetch(query, request_id)
+
+    @classmethod
+    def __fetch(cls, query: dict, request_id: Optional[str]) -> pd.DataFrame:
+        # only requests for the whole query, window included, are coalesced
+        key = (cls.__session(), json.dumps(query, sort_keys=True, default=str))
+        with cls.__lock:
+            future = cls.__in_flight.get(key)
+            coalesced = future is not None
+            if coalesced:
+                cls.__stats['coalesced'] += 1
+            else:
+                future = cls.__in_flight[key] = Future()
+                cls.__stats['fetches'] += 1
+
+        if coalesced:
+            log_debug(request_id, _logger, 'waiting for identical market data query in flight')
+            return cls.__copy(future.result())
+
+        try:
+            args = [query, request_id] if request_id else [query]
+            future.set_result(GsDataApi.get_market_data(*args))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with cls.__lock:
+                cls.__in_flight.pop(key, None)
+
+        return future.result()
+
+    @staticmethod
+    def __copy(frame: pd.DataFrame) -> pd.DataFrame:
+        result = frame.copy()
+        result.dataset_ids = getattr(frame, 'dataset_ids', ())
+        return result
+
+    @staticmethod
+    def __concat(parts: list) -> pd.DataFrame:
+        dataset_ids = tuple(dict.fromkeys(i for p in parts for i in getattr(p, 'dataset_ids', ())))
+        non_empty = [p for p in parts if not p.empty]
+        result = pd.concat(non_empty) if non_empty else MarketDataResponseFrame()
+        result.dataset_ids = dataset_ids
+        return result
+
+    @staticmethod
+    def __slice(frame: pd.DataFrame, start: dt.date, end: dt.date) -> pd.DataFrame:
+        if frame.empty or not isinstance(frame.index, pd.DatetimeIndex):
+            result = frame.copy()
+        else:
+            index = frame.index if frame.index.tz is None else frame.index.tz_localize(None)
+            result = frame[(index >= pd.Timestamp(start)) & (index < pd.Timestamp(end + dt.timedelta(days=1)))].copy()
+
+        result.dataset_ids = getattr(frame, 'dataset_ids', ())
+        return result
@@ -16,9 +16,12 @@
 # a 1-line description. Type annotations should be provided for parameters.
 
 import datetime
+import inspect
+from typing import Tuple
+
 import numpy
 import scipy.stats.mstats as stats
-from scipy.stats import percentileofscore
+from pandas.api.indexers import BaseIndexer
 from statsmodels.regression.rolling import RollingOLS
 from .algebra import *
 import statsmodels.api as sm
@@ -36,19 +39,106 @@ try:
 except ImportError:
     def rolling_std(x: pd.Series, offset: pd.DateOffset) -> pd.Series:
         size = len(x)
-        index = x.index
-        results = np.empty(size, dtype=np.double)
-        results[0] = np.nan
-        values = np.array(x.values, dtype=np.double)  # put data into np arrays to save time on slicing later
+        values = np.array(x.values, dtype=np.double)
+        if size == 0:
+            return pd.Series(values, index=x.index, dtype=np.double)
+
+        # window i covers positions [starts[i], i]
+        starts, _ = _time_window_bounds(x.index, offset)
+        ends = np.arange(1, size + 1)
+        counts = ends - starts
+
+        # Running sums over the whole series grow with its length, and their differences lose the precision of the
+        # small deviations within each window. Instead, the series is cut into blocks at least as long as any window,
+        # so each window spans at most two, and the sums run from the start of each block, on values shifted by the
+        # first value of the block. Missing values, whose windows are NaN, are filled with their neighbours so as not to
+        # disturb the sums of the windows near them
+        nans = np.isnan(values)
+        filled = pd.Series(values).ffill().bfill().fillna(0.0).values
+        block_size = int(counts.max())
+        blocks = -(-size // block_size)
+        padded = np.zeros(blocks * block_size)
+        padded[:size] = filled
+        padded = padded.reshape(blocks, block_size)
+        deviations = padded - padded[:, :1]
+        zeros = np.zeros((blocks, 1))
+        sum_x = np.hstack((zeros, np.cumsum(deviations, axis=1)))
+        sum_x2 = np.hstack((zeros, np.cumsum(deviations * deviations, axis=1)))
+
+        # the sums over each window, shifted by its first value
+        first = filled[starts]
+        window_sum = np.zeros(size)
+        window_sum2 = np.zeros(size)
+        block = starts // block_size
+        split = np.minimum(ends, (block + 1) * block_size)
+        for piece_block, piece_start, piece_end in ((block, starts, split), (block + 1, split, ends)):
+            piece_block = np.minimum(piece_block, blocks - 1)
+            lo = np.clip(piece_start - piece_block * block_size, 0, block_size)
+            hi = np.clip(piece_end - piece_block * block_size, 0, block_size)
+            n = piece_end - piece_start
+            s1 = sum_x[piece_block, hi] - sum_x[piece_block, lo]
+            s2 = sum_x2[piece_block, hi] - sum_x2[piece_block, lo]
+            shift = padded[piece_block, 0] - first
+            window_sum += s1 + n * shift
+            window_sum2 += s2 + 2 * shift * s1 + n * shift * shift
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (window_sum2 - window_sum * window_sum / counts) / (counts - 1)
+        results = np.sqrt(np.maximum(variance, 0.0))
+        nan_count = np.concatenate(([0], np.cumsum(nans)))
+        results[counts < 2] = np.nan
+        results[nan_count[ends] > nan_count[starts]] = np.nan
+        return pd.Series(results, index=x.index, dtype=np.double)
+
+
+def _to_datetime_index(index: pd.Index) -> pd.DatetimeIndex:
+    if isinstance(index, pd.DatetimeIndex):
+        return index
+    if len(index) and not isinstance(index[0], (datetime.date, np.datetime64)):
+        raise TypeError(f'cannot use relative dates with index {index}')
+    return pd.DatetimeIndex(index)
+
+
+def _time_window_bounds(index: pd.Index, offset: pd.DateOffset,
+                        points: Optional[pd.Index] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Positional bounds [start, end) into a sorted index of the windows (t - offset, t] ending at each of the given points
+
+    :param index: sorted index of the observations
+    :param offset: window size
+    :param points: times at which windows end. Defaults to the index itself
+    :return: start and end positions of each window
+    """
+    index = _to_datetime_index(index)
+    points = index if points is None else _to_datetime_index(points)
+    starts = index.searchsorted(points - offset, side='right')
+    ends = index.searchsorted(points, side='right')
+    return starts.astype(np.int64), ends.astype(np.int64)
+
+
+class _TimeWindowIndexer(BaseIndexer):
+    """
+    Rolling window indexer for time-based windows, so that DateOffset windows run on the same rolling kernels as
+    integer windows. Bounds are computed once for the whole series with a single searchsorted pass.
+    """
 
-        start = 0
-        for i in range(1, size):
-            for j in range(start, i + 1):
-                if pd.Timestamp(index[j]) > index[i] - offset:
-                    start = j
-                    break
-            results[i] = np.std(values[start:i + 1], ddof=1)
-        return pd.Series(results, index=index, dtype=np.double)
+    def __init__(self, index: pd.Index, offset: pd.DateOffset):
+        starts, ends = _time_window_bounds(index, offset)
+        super().__init__(window_size=0, starts=starts, ends=ends)
+
+    def get_window_bounds(self, num_values: int = 0, min_periods: Optional[int] = None, center: Optional[bool] = None,
+                          closed: Optional[str] = None, step: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        return self.starts, self.ends
+
+
+# pandas checks custom indexers against the signature of its own BaseIndexer, which gained `step` in 1.5
+_TimeWindowIndexer.get_window_bounds.__signature__ = inspect.signature(BaseIndexer.get_window_bounds)
+
+
+def _rolling(x: Union[pd.Series, pd.DataFrame], w: Window):
+    if isinstance(w.w, pd.DateOffset):
+        return x.rolling(_TimeWindowIndexer(x.index, w.w), 0)
+    return x.rolling(w.w, 0)
 
 
 def _concat_series(series: List[pd.Series]):
@@ -125,11 +215,7 @@ def min_(x: Union[pd.Series, List[pd.Series]], w: Union[Window, int, str] = Wind
         x = _concat_series(x).min(axis=1)
     w = normalize_window(x, w)
     assert x.index.is_monotonic_increasing, "series index is monotonic increasing"
-    if isinstance(w.w, pd.DateOffset):
-        values = [x.loc[(x.index > idx - w.w) & (x.index <= idx)].min() for idx in x.index]
-        return apply_ramp(pd.Series(values, index=x.index, dtype=np.dtype(float)), w)
-    else:
-        return apply_ramp(x.rolling(w.w, 0).min(), w)
+    return apply_ramp(_rolling(x, w).min(), w)
 
 
 @plot_function
@@ -191,11 +277,7 @@ def max_(x: Union[pd.Series, List[pd.Series]], w: Union[Window, int, str] = Wind
         x = _concat_series(x).max(axis=1)
     w = normalize_window(x, w)
     assert x.index.is_monotonic_increasing, "series index is monotonic increasing"
-    if isinstance(w.w, pd.DateOffset):
-        values = [x.loc[(x.index > idx - w.w) & (x.index <= idx)].max() for idx in x.index]
-        return apply_ramp(pd.Series(values, index=x.index, dtype=np.dtype(float)), w)
-    else:
-        return apply_ramp(x.rolling(w.w, 0).max(), w)
+    return apply_ramp(_rolling(x, w).max(), w)
 
 
 @plot_function
@@ -286,10 +368,11 @@ def mean(x: Union[pd.Series, List[pd.Series]], w: Union[Window, int, str] = Wind
         x = pd.concat(x, axis=1)
     w = normalize_window(x, w)
     assert x.index.is_monotonic_increasing, "series index is monotonic increasing"
-    if isinstance(w.w, pd.DateOffset):
-        values = [np.nanmean(x.loc[(x.index > idx - w.w) & (x.index <= idx)]) for idx in x.index]
+    if isinstance(x, pd.DataFrame):
+        # mean of all available observations across the series in each window
+        values = _rolling(x, w).sum().sum(axis=1) / _rolling(x.notna().astype(float), w).sum().sum(axis=1)
     else:
-        values = [np.nanmean(x.iloc[max(idx - w.w + 1, 0): idx + 1]) for idx in range(0, len(x))]
+        values = _rolling(x, w).mean()
     return apply_ramp(pd.Series(values, index=x.index, dtype=np.dtype(float)), w)
 
 
@@ -330,11 +413,7 @@ def median(x: pd.Series, w: Union[Window, int, str] = Window(None, 0)) -> pd.Ser
     """
     w = normalize_window(x, w)
     assert x.index.is_monotonic_increasing, "series index is monotonic increasing"
-    if isinstance(w.w, pd.DateOffset):
-        values = [x.loc[(x.index > idx - w.w) & (x.index <= idx)].median() for idx in x.index]
-        return apply_ramp(pd.Series(values, index=x.index, dtype=np.dtype(float)), w)
-    else:
-        return apply_ramp(x.rolling(w.w, 0).median(), w)
+    return apply_ramp(_rolling(x, w).median(), w)
 
 
 @plot_function
@@ -369,11 +448,7 @@ def mode(x: pd.Series, w: Union[Window, int, str] = Window(None, 0)) -> pd.Serie
     """
     w = normalize_window(x, w)
     assert x.index.is_monotonic_increasing, "series index is monotonic increasing"
-    if isinstance(w.w, pd.DateOffset):
-        values = [stats.mode(x.loc[(x.index > idx - w.w) & (x.index <= idx)]).mode[0] for idx in x.index]
-        return apply_ramp(pd.Series(values, index=x.index, dtype=np.dtype(float)), w)
-    else:
-        return apply_ramp(x.rolling(w.w, 0).apply(lambda y: stats.mode(y).mode, raw=True), w)
+    return apply_ramp(_rolling(x, w).apply(lambda y: stats.mode(y).mode, raw=True), w)
 
 
 @plot_function
@@ -422,11 +497,7 @@ def sum_(x: Union[pd.Series, List[pd.Series]], w: Union[Window, int, str] = Wind
         x = pd.concat(x, axis=1).sum(axis=1)
     w = normalize_window(x, w)
     assert x.index.is_monotonic_increasing
-    if isinstance(w.w, pd.DateOffset):
-        values = [x.loc[(x.index > idx - w.w) & (x.index <= idx)].sum() for idx in x.index]
-        return apply_ramp(pd.Series(values, index=x.index, dtype=np.dtype(float)), w)
-    else:
-        return apply_ramp(x.rolling(w.w, 0).sum(), w)
+    return apply_ramp(_rolling(x, w).sum(), w)
 
 
 @plot_function
@@ -462,11 +533,7 @@ def product(x: pd.Series, w: Union[Window, int, str] = Window(None, 0)) -> pd.Se
     """
     w = normalize_window(x, w)
     assert x.index.is_monotonic_increasing
-    if isinstance(w.w, pd.DateOffset):
-        values = [x.loc[(x.index > idx - w.w) & (x.index <= idx)].agg(pd.Series.prod) for idx in x.index]
-        return apply_ramp(pd.Series(values, index=x.index, dtype=np.dtype(float)), w)
-    else:
-        return apply_ramp(x.rolling(w.w, 0).agg(pd.Series.prod), w)
+    return apply_ramp(_rolling(x, w).apply(np.nanprod, raw=True), w)
 
 
 @plot_function
@@ -601,11 +668,7 @@ def var(x: pd.Series, w: Union[Window, int, str] = Window(None, 0)) -> pd.Series
     """
     w = normalize_window(x, w)
     assert x.index.is_monotonic_increasing, "series index is monotonic increasing"
-    if isinstance(w.w, pd.DateOffset):
-        values = [x.loc[(x.index > idx - w.w) & (x.index <= idx)].var() for idx in x.index]
-        return apply_ramp(pd.Series(values, index=x.index, dtype=np.dtype(float)), w)
-    else:
-        return apply_ramp(x.rolling(w.w, 0).var(), w)
+    return apply_ramp(_rolling(x, w).var(), w)
 
 
 @plot_function
@@ -650,8 +713,8 @@ def cov(x: pd.Series, y: pd.Series, w: Union[Window, int, str] = Window(None, 0)
     w = normalize_window(x, w)
     assert x.index.is_monotonic_increasing, "series index is monotonic increasing"
     if isinstance(w.w, pd.DateOffset):
-        values = [x.loc[(x.index > idx - w.w) & (x.index <= idx)].cov(y) for idx in x.index]
-        return apply_ramp(pd.Series(values, index=x.index, dtype=np.dtype(float)), w)
+        # window bounds are positional in x, so y must share its index
+        return apply_ramp(_rolling(x, w).cov(y.reindex(x.index)), w)
     else:
         return apply_ramp(x.rolling(w.w, 0).cov(y), w)
 
@@ -663,6 +726,19 @@ def _zscore(x):
     return stats.zscore(x, ddof=1)[-1]
 
 
+def _rolling_zscore(x: pd.Series, offset: pd.DateOffset) -> pd.Series:
+    # vectorised equivalent of applying _zscore to each time-based window
+    indexer = _TimeWindowIndexer(x.index, offset)
+    rolling = x.rolling(indexer, 0)
+    last = x.values[indexer.ends - 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = (last - rolling.mean().values) / rolling.std().values
+    sizes = indexer.ends - indexer.starts
+    scores[rolling.count().values < sizes] = np.nan
+    scores[sizes == 1] = 0
+    return pd.Series(scores, index=x.index, dtype=np.dtype(float))
+
+
 @plot_function
 def zscores(x: pd.Series, w: Union[Window, int, str] = Window(None, 0)) -> pd.Series:
     """
@@ -716,8 +792,7 @@ def zscores(x: pd.Series, w: Union[Window, int, str] = Window(None, 0)) -> pd.Se
         return interpolate(zscore_series, x, Interpolate.NAN)
     if not isinstance(w.w, int):
         w = normalize_window(x, w)
-        values = [_zscore(x.loc[(x.index > idx - w.w) & (x.index <= idx)]) for idx in x.index]
-        return apply_ramp(pd.Series(values, index=x.index, dtype=np.dtype(float)), w)
+        return apply_ramp(_rolling_zscore(x, w.w), w)
     else:
         return apply_ramp(x.rolling(w.w, 0).apply(_zscore, raw=False), w)
 
@@ -835,6 +910,184 @@ def generate_series(length: int, direction: Direction = Direction.START_TODAY) -
     return pd.Series(data=levels, index=dates, dtype=np.dtype(float))
 
 
+def _overlapping_blocks(size: int, longest: int) -> Tuple[int, int, int]:
+    """
+    Stride, width and number of blocks covering values[0:size], so that every window of up to `longest` values lies in
+    the block at the last stride at or before its start: blocks are two strides wide, a power of two no shorter than the
+    longest window, overlapping the next by half. Short series are a single block
+    """
+    stride = 1 << (max(longest, 1) - 1).bit_length()
+    if 2 * stride >= size:
+        return size, size, 1
+    return stride, 2 * stride, -(-size // stride) - 1
+
+
+def _block_ranks(order: np.ndarray) -> np.ndarray:
+    """
+    Ranks of the values in each block from their order, ranks[b, order[b, k]] == k. They fit int16 for blocks of up to
+    2 ** 14 values, which leaves room for the partitions in _count_below
+    """
+    width = order.shape[1]
+    ranks = np.empty(order.shape, dtype=np.int16 if width <= 2 ** 14 else np.int32)
+    np.put_along_axis(ranks, order, np.arange(width, dtype=ranks.dtype)[None, :], axis=1)
+    return ranks
+
+
+def _tie_bounds(sorted_block_values: np.ndarray, dtype: np.dtype) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ranks at which each value's run of equal values starts, and after which it ends, in its sorted block
+    """
+    width = sorted_block_values.shape[1]
+    span = np.arange(width, dtype=dtype)
+    first = np.ones(sorted_block_values.shape, dtype=bool)
+    first[:, 1:] = sorted_block_values[:, 1:] != sorted_block_values[:, :-1]
+    last = np.ones(sorted_block_values.shape, dtype=bool)
+    last[:, :-1] = first[:, 1:]
+    starts = np.maximum.accumulate(span * first, axis=1)
+    ends = np.minimum.accumulate(np.where(last, span + 1, dtype.type(width))[:, ::-1], axis=1)[:, ::-1]
+    return starts, ends
+
+
+def _searched_thresholds(sorted_values: np.ndarray, scores: np.ndarray, sorted_block_ranks: np.ndarray,
+                         rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ranks of the first value not below and the first value above each score within its row of sorted global ranks, one
+    row per block
+    """
+    blocks, width = sorted_block_ranks.shape
+    # the keys of a row follow those of the rows before it, so that all rows are searched at once
+    key_stride = sorted_block_ranks[:, -1].max() + 1
+    keys = (np.arange(blocks)[:, None] * key_stride + sorted_block_ranks).ravel()
+
+    # searching in order, which keeps the searches local
+    score_order = np.argsort(scores)
+    needles = []
+    for side in ('left', 'right'):
+        global_rank = np.empty(len(scores), dtype=np.int64)
+        global_rank[score_order] = np.searchsorted(sorted_values, scores[score_order], side=side)
+        needles.append(rows * key_stride + global_rank)
+    needle_order = np.argsort(needles[0], kind='stable')
+
+    bounds = []
+    for side_needles in needles:
+        bound = np.empty(len(scores), dtype=np.int64)
+        bound[needle_order] = np.searchsorted(keys, side_needles[needle_order])
+        bounds.append(bound - rows * width)
+    return bounds[0], bounds[1]
+
+
+def _count_below(ranks: np.ndarray, rows: np.ndarray, lo: np.ndarray, hi: np.ndarray,
+                 thresholds: np.ndarray) -> np.ndarray:
+    """
+    Number of ranks[row, lo:hi] below each threshold, where each row of ranks is a permutation of its positions
+
+    Counts from a wavelet matrix, in O(log width) each. Level by level, from the highest bit of the ranks down, each row
+    is stably partitioned by that bit, ranks without it first, and the number of ranks with the bit before every
+    position is kept. Where a threshold has the bit, every rank in its range without it is below the threshold, and the
+    range follows the ranks with it to the next level; otherwise the range follows those without. Either way the number
+    of ranks with the bit before lo and hi places the range in the partitioned row
+    """
+    blocks, width = ranks.shape
+    dtype = ranks.dtype
+    index_type = np.int32 if blocks * (width + 1) < 2 ** 31 else np.int64
+    ones_starts = (rows * (width + 1)).astype(index_type)
+    row_starts = (np.arange(blocks, dtype=index_type) * width)[:, None]
+    span = np.arange(width, dtype=dtype)
+    ones = np.zeros((blocks, width + 1), dtype=dtype)
+    counts = np.zeros(len(thresholds), dtype=dtype)
+    lo, hi, thresholds = lo.astype(dtype), hi.astype(dtype), thresholds.astype(dtype)
+
+    for bit in reversed(range(width.bit_length())):
+        bits = (ranks >> bit) & 1
+        np.cumsum(bits, axis=1, out=ones[:, 1:])
+        # every row holds the same ranks, hence the same number without the bit
+        zeros = dtype.type(width - ones[0, -1])
+        lo_ones, hi_ones = ones.ravel()[ones_starts + lo], ones.ravel()[ones_starts + hi]
+        has_bit = (thresholds >> bit) & 1
+        # the range among the ranks without the bit, all below a threshold with it
+        lo -= lo_ones
+        hi -= hi_ones
+        counts += (hi - lo) * has_bit
+        # or among those with the bit, after all those without
+        lo += (lo_ones + zeros - lo) * has_bit
+        hi += (hi_ones + zeros - hi) * has_bit
+
+        if bit:
+            before = ones[:, :-1]
+            # ranks without the bit move back by the number with it before them, the others after all those without
+            destinations = span - before
+            destinations += (before + zeros - destinations) * bits
+            partitioned = np.empty_like(ranks)
+            partitioned.ravel()[(row_starts + destinations).ravel()] = ranks.ravel()
+            ranks = partitioned
+    return counts.astype(np.int64)
+
+
+def _window_percentiles(values: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                        scores: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Percentile rank of each score within the window values[start:end], as scipy.stats.percentileofscore(kind='mean').
+    NaNs in a window count towards its size but are never below or equal to a score. Empty windows and NaN scores give
+    NaN. Without scores, each value is ranked within its own window
+
+    Every window lies within one of a series of overlapping blocks (see _overlapping_blocks). A score's thresholds are
+    the ranks, within the block, of the first value not below it and the first value above it; the values below and
+    equal to it in the window are then counted from the ranks, in O((n + m) log w) for windows of up to w values
+    """
+    size = len(values)
+    positions = np.arange(size)
+    window_sizes = ends - starts
+    own = scores is None and bool(np.all((starts <= positions) & (positions < ends)))
+    if scores is None:
+        scores = values
+
+    stride, width, blocks = _overlapping_blocks(size, int(window_sizes.max(initial=0)))
+    cells = np.arange(blocks)[:, None] * stride + np.arange(width)
+    padding = (blocks - 1) * stride + width - size
+    if own:
+        # NaNs, padding the last block, sort last
+        block_values = np.concatenate((values, np.full(padding, np.nan)))[cells]
+        order = np.argsort(block_values, axis=1)
+    else:
+        # blocks of global ranks, in order to search them for the ranks of the scores
+        global_order = np.argsort(values)
+        global_ranks = np.empty(size + padding, dtype=np.int64)
+        global_ranks[global_order] = positions
+        global_ranks[size:] = np.arange(size, size + padding)
+        block_values = global_ranks[cells]
+        order = global_order[None, :] if blocks == 1 else np.argsort(block_values, axis=1)
+    sorted_block_values = np.take_along_axis(block_values, order, axis=1)
+    ranks = _block_ranks(order)
+
+    rows = np.minimum(starts // stride, blocks - 1)
+    lo, hi = starts - rows * stride, ends - rows * stride
+    if own:
+        # each value's thresholds are the bounds of its run of equal values in the block
+        tie_starts, tie_ends = _tie_bounds(sorted_block_values, ranks.dtype)
+        own_cells = rows * width + ranks.ravel()[rows * width + positions - rows * stride]
+        below_thresholds, above_thresholds = tie_starts.ravel()[own_cells], tie_ends.ravel()[own_cells]
+    else:
+        below_thresholds, above_thresholds = _searched_thresholds(values[global_order], scores, sorted_block_values,
+                                                                  rows)
+
+    # a single equal value is in the window or not, so only scores with several need counting twice
+    ties = above_thresholds - below_thresholds
+    single = np.flatnonzero(ties == 1)
+    tied = np.flatnonzero(ties > 1)
+    equal = np.zeros(len(scores), dtype=np.int64)
+    single_positions = order.ravel()[rows[single] * width + below_thresholds[single]]
+    equal[single] = (lo[single] <= single_positions) & (single_positions < hi[single])
+
+    counts = _count_below(ranks, np.concatenate((rows, rows[tied])), np.concatenate((lo, lo[tied])),
+                          np.concatenate((hi, hi[tied])), np.concatenate((below_thresholds, above_thresholds[tied])))
+    below = counts[:len(scores)]
+    equal[tied] = counts[len(scores):] - below[tied]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        results = (2 * below + equal) * (50.0 / window_sizes)
+    results[(window_sizes == 0) | np.isnan(scores)] = np.nan
+    return results
+
+
 @plot_function
 def percentiles(x: pd.Series, y: Optional[pd.Series] = None, w: Union[Window, int, str] = Window(None, 0)) -> pd.Series:
     """
@@ -875,7 +1128,8 @@ def percentiles(x: pd.Series, y: Optional[pd.Series] = None, w: Union[Window, in
     if x.empty:
         return x
 
-    if y is None:
+    own = y is None
+    if own:
         y = x.copy()
 
     if isinstance(w.r, int) and w.r > len(y):
@@ -884,10 +1138,22 @@ def percentiles(x: pd.Series, y: Optional[pd.Series] = None, w: Union[Window, in
     if isinstance(w.w, int) and w.w > len(x):
         return pd.Series(dtype=float)
 
-    res = pd.Series(dtype=np.dtype(float))
-    for idx, val in y.iteritems():
-        sample = x.loc[(x.index > idx - w.w) & (x.index <= idx)] if isinstance(w.w, pd.DateOffset) else x[:idx][-w.w:]
-        res.loc[idx] = percentileofscore(sample, val, kind='mean')
+    if y.empty:
+        return pd.Series(dtype=float)
+
+    if isinstance(w.w, pd.DateOffset):
+        starts, ends = _time_window_bounds(x.index, w.w, y.index)
+    else:
+        # the last w observations of x up to and including each point of y
+        try:
+            ends = _to_datetime_index(x.index).searchsorted(_to_datetime_index(y.index), side='right')
+        except TypeError:
+            ends = x.index.searchsorted(y.index, side='right')
+        ends = ends.astype(np.int64)
+        starts = np.maximum(ends - w.w, 0)
+
+    values = _window_percentiles(x.values.astype(float), starts, ends, None if own else y.values.astype(float))
+    res = pd.Series(values, index=y.index, dtype=np.dtype(float))
 
     if isinstance(w.r, pd.DateOffset):
         return res.loc[res.index[0] + w.r:]
@@ -929,14 +1195,10 @@ def percentile(x: pd.Series, n: float, w: Union[Window, int, str] = None) -> Uni
 
     n /= 100
     w = normalize_window(x, w)
-    if isinstance(w.w, pd.DateOffset):
-        try:
-            values = [x.loc[(x.index > idx - w.w) & (x.index <= idx)].quantile(n) for idx in x.index]
-        except TypeError:
-            raise MqTypeError(f'cannot use relative dates with index {x.index}')
-        res = pd.Series(values, index=x.index, dtype=np.dtype(float))
-    else:
-        res = x.rolling(w.w, 0).quantile(n)
+    try:
+        res = _rolling(x, w).quantile(n)
+    except TypeError:
+        raise MqTypeError(f'cannot use relative dates with index {x.index}')
     return apply_ramp(res, w)
 
 